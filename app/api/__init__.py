@@ -1,11 +1,14 @@
 from flask import Blueprint
 from flask_restplus import Api
 from app.config import AppConfig
+from app.api.utils.cache import cache_response, cached_response
+from app.api.utils.compression import compress_response
 
 from app.core.exceptions import FatalError, ClientFatalError, ResourceNotFoundError, \
                                 ClientOperationFailedError, ClientConnectionError, \
                                 OperationNotValid, ConfigurationError, ParsingError, \
-                                ValidationError, MalformedConfigurationError
+                                ValidationError, MalformedConfigurationError, \
+                                AuthenticationError
 
 
 bp = Blueprint('api', __name__, url_prefix='/api/v1')
@@ -20,6 +23,24 @@ api = Api(
 from app.api.controllers.node_controller import ns as ns_node
 api.add_namespace(ns_node, path='/node')
 
+from app.api.controllers.job_controller import ns as ns_jobs
+api.add_namespace(ns_jobs, path='/jobs')
+
+from app.api.controllers.event_controller import ns as ns_events
+api.add_namespace(ns_events, path='/events')
+
+# the serialization of the responses is traced (see app.api.tracing)
+from app.api.tracing import traced_output_json
+api.representation('application/json')(traced_output_json)
+
+# negotiated compression (only for the resources with compressed = True)
+bp.after_request(compress_response)
+
+# cached read-only responses (only for the resources with a cache policy).
+# The after_request hooks run in reverse order: responses are cached uncompressed
+bp.before_request(cached_response)
+bp.after_request(cache_response)
+
 # API Exceptions handlers
 
 @api.errorhandler(FatalError)
@@ -65,3 +86,7 @@ def handle_validation_error(error):
 @api.errorhandler(MalformedConfigurationError)
 def handle_malformed_configuration_error(error):
     return ({ 'message': '{0}'.format(error) }, 500)
+
+@api.errorhandler(AuthenticationError)
+def handle_authentication_error(error):
+    return ({ 'message': '{0}'.format(error) }, 401)
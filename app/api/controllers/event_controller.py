@@ -0,0 +1,59 @@
+import json
+
+from flask import Response, request
+from flask_restplus import Resource
+
+from app.api.models import ns_events as ns
+from app.api.models import supervisord_events
+from app.api.services.event_service import EventService
+from app.api.services.state_service import StateService
+
+
+def _event_stream(last_event_id):
+    """ The changes of the cluster state as Server-Sent Events. """
+
+    for change in StateService.get_instance().watch(last_event_id):
+        if change is None:
+            yield ': keep-alive\n\n'
+        else:
+            seq, event, data = change
+            yield 'id: {0}\nevent: {1}\ndata: {2}\n\n'.format(seq, event, json.dumps(data))
+
+
+@ns.route('')
+class ClusterEvents(Resource):
+    """ The changes of the state of the nodes and of their lifecycle operations """
+
+    @ns.response(200, 'A stream (text/event-stream) of snapshot, node and operation events')
+    @ns.header('Last-Event-ID', 'the id of the last event received (for resuming the stream)')
+    def get(self):
+        """ Stream the changes of the cluster state (Server-Sent Events) """
+
+        try:
+            last_event_id = int(request.headers.get('Last-Event-ID'))
+        except (TypeError, ValueError):
+            last_event_id = None
+
+        return Response(
+            _event_stream(last_event_id),
+            mimetype='text/event-stream',
+            headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
+@ns.route('/supervisord')
+class SupervisordEvents(Resource):
+    """ The events pushed by the supervisord event listeners of the nodes """
+
+    @ns.expect(supervisord_events, validate=True)
+    @ns.response(204, 'Events accepted')
+    @ns.response(401, 'Invalid credentials (the supervisord ones of the node)')
+    def post(self):
+        """ Ingest the events of a node (e.g. the state changes of the lifecycle operations) """
+
+        auth = request.authorization
+        EventService.get_instance().ingest(
+            node_id=ns.payload['node_id'],
+            events=ns.payload['events'],
+            username=auth.username if auth else None,
+            password=auth.password if auth else None)
+        return None, 204
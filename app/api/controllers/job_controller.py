@@ -0,0 +1,43 @@
+import json
+
+from flask import Response
+from flask_restplus import Resource, inputs, marshal, reqparse
+
+from app.api.models import job_info
+from app.api.models import ns_jobs as ns
+from app.api.services.job_service import JobService
+
+job_parser = reqparse.RequestParser() \
+    .add_argument('stream', type=inputs.boolean, required=False,
+        default=False, location='args',
+        help='set true for streaming the job updates (text/event-stream)')
+
+
+def _event_stream(updates):
+    """ The job updates as Server-Sent Events (until the job is done). """
+
+    for info in updates:
+        if info is None:
+            yield ': keep-alive\n\n'
+        else:
+            yield 'event: job\ndata: {}\n\n'.format(json.dumps(marshal(info, job_info)))
+
+
+@ns.route('/<string:job_id>', endpoint='job')
+@ns.param('job_id', 'the job identifier')
+class Job(Resource):
+    """ A lifecycle operation started/stopped asynchronously """
+
+    @ns.expect(job_parser, validate=True)
+    @ns.response(200, 'Success', job_info)
+    def get(self, job_id):
+        """ The progress of a job (or a stream of its updates) """
+
+        info = JobService.get_instance().job_info(job_id)
+        if not job_parser.parse_args()['stream']:
+            return marshal(info, job_info)
+
+        return Response(
+            _event_stream(JobService.get_instance().watch(job_id)),
+            mimetype='text/event-stream',
+            headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
@@ -1,12 +1,18 @@
-from flask_restplus import Namespace, Resource, fields, inputs, reqparse
+from flask import url_for
+from flask_restplus import Namespace, Resource, fields, inputs, marshal, reqparse
 
 from app.api.services.node_service import LifecycleOperationActionType
-from app.api.models import (hosted_component_info, lifecycle_operation_info,
+from app.api.models import (batch_lifecycle_operation_result,
+                            batch_lifecycle_operations, hosted_component_info,
+                            job_info, lifecycle_operation_info,
                             multi_lifecycle_operation_result)
+from app.api.services.job_service import JobService
+from app.api.tracing import traced_handler
 from app.api.models import ns_toskose_node as ns
 from app.api.models import toskose_node_info
 from app.api.services.node_service import (LifecycleOperationActionType,
                                            LogsActionType, NodeService)
+from app.api.utils.cache import MODEL, NODE
 
 node_service = NodeService()
 
@@ -14,9 +20,20 @@ node_service = NodeService()
 @ns.header('Content-Type', 'application/json')
 class NodeOperation(Resource):
     """ Base class for common configurations """
+
+    # gzip/deflate the (large) responses if the client accepts it
+    compressed = False
+
+    # the cache policy of the GET responses (see app.api.utils.cache)
+    cache = None
+
+    method_decorators = [traced_handler]
     
 @ns.route('/')
 class ToskoseNodeList(NodeOperation):
+
+    compressed = True
+    cache = NODE
     
     @ns.marshal_list_with(toskose_node_info)
     def get(self):
@@ -31,11 +48,27 @@ class ToskoseManagerReload(NodeOperation):
         return 'OK' if node_service.reload() \
             else ns.abort(500, message='failed to reload the manager')
 
+@ns.route('/batch')
+class ToskoseNodeBatch(NodeOperation):
+    """ Manage lifecycle operations on several nodes at once """
+
+    compressed = True
+
+    @ns.expect(batch_lifecycle_operations, validate=True)
+    @ns.marshal_list_with(batch_lifecycle_operation_result)
+    def post(self):
+        """ Start/stop/signal a batch of lifecycle operations (one request for each node) """
+        return node_service.execute_batch(
+            ns.payload['operations'],
+            wait=ns.payload.get('wait', True))
+
 @ns.route('/<string:node_id>')
 @ns.param('node_id', 'the node identifier')
 class ToskoseNode(NodeOperation):
     """ Manage a node lifecycle """
-    
+
+    cache = NODE
+
     @ns.marshal_with(toskose_node_info)
     def get(self, node_id):
         """ The current state of a node """
@@ -62,6 +95,8 @@ node_log_parser.add_argument('length', type=int, required=False,
 class ToskoseNodeLog(NodeOperation):
     """ Manage the logs of a node. """
 
+    compressed = True
+
     @ns.expect(node_log_parser, validate=True)
     def get(self, **kwargs):
         """ Fetch the log of a node """
@@ -88,11 +123,23 @@ class ToskoseNodeLog(NodeOperation):
 class ComponentLifecycleOperationList(NodeOperation):
     """ The list of lifecycle operations of an hosted component. """
 
+    cache = MODEL
+
     @ns.marshal_with(hosted_component_info)
     def get(self, **kwargs):
         """ Info about a hosted component """
         return node_service.hosted_component_info(**kwargs)
 
+operation_async_parser = reqparse.RequestParser() \
+    .add_argument('async', type=inputs.boolean, required=False,
+        default=False, location='args',
+        help='set true for running the operation in background (202 + job)')
+
+def _accepted(job):
+    """ 202 Accepted, the job can be tracked at /jobs/<job_id> """
+    return marshal(job, job_info), 202, \
+        {'Location': url_for('api.job', job_id=job.job_id)}
+
 @ns.route('/<string:node_id>/<string:component_id>/<string:operation>')
 @ns.param('operation', 'the lifecycle operation')
 @ns.param('component_id', 'the hosted component identifier')
@@ -100,6 +147,8 @@ class ComponentLifecycleOperationList(NodeOperation):
 class ComponentLifecycleOperation(NodeOperation):
     """ Manage lifecycle operations on a component hosted on a node. """
 
+    cache = NODE
+
     @ns.marshal_with(lifecycle_operation_info)
     def get(self, **kwargs):
         """ Info about the status of a lifecycle operation. """
@@ -108,17 +157,29 @@ class ComponentLifecycleOperation(NodeOperation):
             action=LifecycleOperationActionType.INFO,
             **kwargs)
     
+    @ns.expect(operation_async_parser, validate=True)
+    @ns.response(202, 'Accepted (async)', job_info)
     def post(self, **kwargs):
         """ Start a lifecycle operation. """
 
+        if operation_async_parser.parse_args()['async']:
+            return _accepted(JobService.get_instance().submit(
+                action=LifecycleOperationActionType.START, **kwargs))
+
         return 'OK' if node_service.execute(
             action=LifecycleOperationActionType.START,
             **kwargs) \
             else ns.abort(500, message='failed to start operation')
 
+    @ns.expect(operation_async_parser, validate=True)
+    @ns.response(202, 'Accepted (async)', job_info)
     def delete(self, **kwargs):
         """ Stop a lifecycle operation. """
 
+        if operation_async_parser.parse_args()['async']:
+            return _accepted(JobService.get_instance().submit(
+                action=LifecycleOperationActionType.STOP, **kwargs))
+
         return 'OK' if node_service.execute(
             action=LifecycleOperationActionType.STOP,
             **kwargs) \
@@ -166,6 +227,8 @@ operation_log_parser = reqparse.RequestParser() \
 class ComponentLifecycleOperationLog(NodeOperation):
     """ Manage the logs of a lifecycle operation. """
 
+    compressed = True
+
     @ns.expect(operation_log_parser, validate=True)
     def get(self, **kwargs):
         """ Fetch the log of a lifecycle operation """
@@ -0,0 +1,27 @@
+"""
+Liveness and readiness probes.
+
+Both answer from the state of the manager only: they never load the model nor
+contact the nodes, so they are cheap enough to be polled by the orchestrator.
+"""
+
+from flask import jsonify
+
+from app.manager import ToskoseManager
+
+
+def healthz():
+    """ Liveness: the process is up and serving requests. """
+
+    return jsonify({'status': 'alive'})
+
+
+def readyz():
+    """ Readiness: the model is loaded and the clients of the nodes are built. """
+
+    manager = ToskoseManager.get_instance()
+    status = manager.status
+    body = {'status': status}
+    if status == 'failed':
+        body['message'] = '{}'.format(manager.startup_error)
+    return jsonify(body), 200 if status == 'ready' else 503
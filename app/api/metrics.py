@@ -0,0 +1,35 @@
+"""
+Prometheus endpoint (/metrics) and the latency of the API requests.
+
+The latency is recorded per route (the URL rule, e.g.
+/api/v1/node/<string:node_id>), not per URL, to keep the series bounded.
+"""
+
+import time
+
+from flask import g, request
+
+from app.core.metrics import CONTENT_TYPE, HTTP_REQUEST_DURATION, REGISTRY
+
+
+def start_timer():
+    """ before_request hook (of the app, so the cached responses are timed too). """
+
+    g.request_start = time.perf_counter()
+
+
+def record_request(response):
+    """ after_request hook recording the latency of the request. """
+
+    start = g.pop('request_start', None)
+    if start is not None:
+        route = request.url_rule.rule if request.url_rule is not None else '<unmatched>'
+        HTTP_REQUEST_DURATION.observe(
+            time.perf_counter() - start, request.method, route, str(response.status_code))
+    return response
+
+
+def metrics():
+    """ The metrics of the manager, in the Prometheus text format. """
+
+    return REGISTRY.render(), 200, {'Content-Type': CONTENT_TYPE}
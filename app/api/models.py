@@ -325,3 +325,238 @@ class SubprocessOperationResultDTO:
     group: str
     status_code: str
     description: str
+
+
+"""
+Batch Lifecycle Operations Schema
+"""
+
+batch_lifecycle_operation = ns_toskose_node.model('BatchLifecycleOperation', {
+    'node_id': fields.String(
+        required=True,
+        description='The identifier of the node.'
+    ),
+    'component_id': fields.String(
+        required=True,
+        description='The identifier of the hosted component.'
+    ),
+    'operation': fields.String(
+        required=True,
+        description='The lifecycle operation.'
+    ),
+    'action': fields.String(
+        required=True,
+        enum=['start', 'stop', 'signal'],
+        description='The action to do with the lifecycle operation.'
+    ),
+    'signal': fields.String(
+        required=False,
+        default='SIGTERM',
+        description='The signal type (only for the signal action).'
+    )
+})
+
+batch_lifecycle_operations = ns_toskose_node.model('BatchLifecycleOperations', {
+    'operations': fields.List(
+        fields.Nested(batch_lifecycle_operation),
+        required=True,
+        description='The lifecycle operations. The operations on the same node are \
+        executed in the given order, the nodes are managed concurrently.'
+    ),
+    'wait': fields.Boolean(
+        required=False,
+        default=True,
+        description='Wait for the lifecycle operations to be fully started/stopped.'
+    )
+})
+
+batch_lifecycle_operation_result = ns_toskose_node.model('BatchLifecycleOperationResult', {
+    'node_id': fields.String(
+        required=True,
+        description='The identifier of the node.'
+    ),
+    'component_id': fields.String(
+        required=True,
+        description='The identifier of the hosted component.'
+    ),
+    'operation': fields.String(
+        required=True,
+        description='The lifecycle operation.'
+    ),
+    'action': fields.String(
+        required=True,
+        description='The action done with the lifecycle operation.'
+    ),
+    'success': fields.Boolean(
+        required=True,
+        description='True if the action succeeded.'
+    ),
+    'error': fields.String(
+        required=False,
+        description='The reason of the failure (if any).'
+    )
+})
+
+"""
+Batch Lifecycle Operations DTO
+"""
+@dataclass(frozen=True)
+class BatchLifecycleOperationResultDTO:
+    node_id: str
+    component_id: str
+    operation: str
+    action: str
+    success: bool
+    error: str = None
+
+
+"""
+Jobs Namespace
+"""
+ns_jobs = Namespace(
+    'jobs',
+    description='Operations for tracking the lifecycle operations started/stopped asynchronously.'
+)
+
+"""
+Job Schema
+"""
+
+job_info = ns_jobs.model('JobInfo', {
+    'job_id': fields.String(
+        required=True,
+        description='The identifier of the job.'
+    ),
+    'node_id': fields.String(
+        required=True,
+        description='The identifier of the node.'
+    ),
+    'component_id': fields.String(
+        required=True,
+        description='The identifier of the hosted component.'
+    ),
+    'operation': fields.String(
+        required=True,
+        description='The lifecycle operation.'
+    ),
+    'action': fields.String(
+        required=True,
+        description='The action done with the lifecycle operation (start|stop).'
+    ),
+    'status': fields.String(
+        required=True,
+        description='The status of the job (pending|running|succeeded|failed).'
+    ),
+    'state': fields.String(
+        required=False,
+        description='The last known state of the lifecycle operation (e.g. STARTING).'
+    ),
+    'description': fields.String(
+        required=False,
+        description='The last known description of the lifecycle operation.'
+    ),
+    'error': fields.String(
+        required=False,
+        description='The reason of the failure (if any).'
+    ),
+    'created': fields.Float(
+        required=True,
+        description='The UNIX time of the job creation.'
+    ),
+    'updated': fields.Float(
+        required=True,
+        description='The UNIX time of the last update of the job.'
+    )
+})
+
+"""
+Job DTO
+"""
+@dataclass(frozen=True)
+class JobInfoDTO:
+    job_id: str
+    node_id: str
+    component_id: str
+    operation: str
+    action: str
+    status: str
+    state: str
+    description: str
+    error: str
+    created: float
+    updated: float
+
+
+"""
+Events Namespace
+"""
+ns_events = Namespace(
+    'events',
+    description='Operations for the events of the nodes.'
+)
+
+"""
+Supervisord Events Schema
+"""
+
+supervisord_event = ns_events.model('SupervisordEvent', {
+    'eventname': fields.String(
+        required=True,
+        description='The supervisord event type (e.g. PROCESS_STATE_RUNNING, TICK_60).'
+    ),
+    'serial': fields.Integer(
+        required=False,
+        description='The serial number of the event (assigned by supervisord).'
+    ),
+    'timestamp': fields.Float(
+        required=False,
+        description='The UNIX time of the event.'
+    ),
+    'processname': fields.String(
+        required=False,
+        description='The process (lifecycle operation) of a PROCESS_STATE event.'
+    ),
+    'groupname': fields.String(
+        required=False,
+        description='The process group of a PROCESS_STATE event.'
+    ),
+    'from_state': fields.String(
+        required=False,
+        description='The previous state of the process of a PROCESS_STATE event.'
+    ),
+    'pid': fields.Integer(
+        required=False,
+        description='The UNIX Process ID (PID) of the process (RUNNING/EXITED/STOPPING).'
+    ),
+    'expected': fields.Integer(
+        required=False,
+        description='1 if the process exited with an expected exit code (EXITED).'
+    )
+})
+
+supervisord_events = ns_events.model('SupervisordEvents', {
+    'node_id': fields.String(
+        required=True,
+        description='The identifier of the node sending the events.'
+    ),
+    'events': fields.List(
+        fields.Nested(supervisord_event),
+        required=True,
+        description='The events, in the order they occurred.'
+    )
+})
+
+"""
+Process State DTO
+"""
+@dataclass(frozen=True)
+class ProcessStateDTO:
+    node_id: str
+    name: str
+    group: str
+    state: str
+    from_state: str
+    pid: int
+    expected: int
+    serial: int
+    timestamp: float
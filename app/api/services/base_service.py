@@ -1,3 +1,4 @@
+from app.api.utils.cache import invalidate_all
 from app.core.logging import LoggingFacility
 from app.manager import ToskoseManager
 
@@ -17,4 +18,5 @@ class BaseService():
         """
         logger.info('Re-initialization in progress')
         ToskoseManager.get_instance().initialization()
+        invalidate_all()
         return True
\ No newline at end of file
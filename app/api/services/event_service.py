@@ -0,0 +1,134 @@
+""" Events Pushed by the Nodes (supervisord event listeners, see toskosed/event_listener.py) """
+
+import hmac
+import threading
+import time
+
+from app.api.models import ProcessStateDTO
+from app.api.services.base_service import BaseService
+from app.api.services.state_service import StateService
+from app.api.utils.cache import invalidate_node, node_pushed
+from app.core.exceptions import AuthenticationError, ResourceNotFoundError
+from app.core.logging import LoggingFacility
+from app.manager import ToskoseManager
+
+logger = LoggingFacility.get_instance().get_logger()
+
+PROCESS_STATE_EVENT = 'PROCESS_STATE_'
+
+
+class EventService(BaseService):
+    """ Ingest the state changes of the processes (the lifecycle operations)
+    of the nodes, as pushed by their event listeners.
+
+    A state change invalidates the cached responses of the node, and it's
+    streamed to the subscribers of /api/v1/events (see StateService). The
+    nodes pushing their events are polled less (see app.api.utils.cache).
+    The state itself is always read from the node.
+    """
+
+    __instance = None
+    __instance_lock = threading.Lock()
+
+    @staticmethod
+    def get_instance():
+        """ The static access method """
+
+        if EventService.__instance == None:
+            with EventService.__instance_lock:
+                if EventService.__instance == None:
+                    EventService()
+
+        return EventService.__instance
+
+    def __init__(self):
+        if EventService.__instance != None:
+            raise Exception('This is a singleton')
+        else:
+            EventService.__instance = self
+
+        super().__init__()
+        # node -> the number of state changes received (see wait_for_change)
+        self._changes = {}
+        self._changed = threading.Condition()
+
+    @staticmethod
+    def _authenticate(node_id, username, password):
+        """ The events are sent with the supervisord credentials of the node.
+
+        An unknown node, or a standalone container (no supervisord), is
+        answered as invalid credentials: the nodes are not disclosed to the
+        unauthenticated clients.
+        """
+
+        manager = ToskoseManager.get_instance()
+        try:
+            node = manager.node_by_id(node_id)
+            standalone = manager.get_client(node_id) is None
+        except ResourceNotFoundError:
+            node, standalone = None, True
+        if standalone:
+            raise AuthenticationError('Invalid credentials for node {}'.format(node_id))
+
+        if node.user is None and node.password is None:
+            return
+        if username is None or password is None or \
+                not (hmac.compare_digest(str(username), str(node.user)) and
+                     hmac.compare_digest(str(password), str(node.password))):
+            raise AuthenticationError('Invalid credentials for node {}'.format(node_id))
+
+    def ingest(self, *, node_id, events, username=None, password=None):
+        """ Ingest the events pushed by the event listener of a node.
+
+        Returns:
+            int: the number of process state changes.
+        """
+
+        EventService._authenticate(node_id, username, password)
+
+        states = []
+        for event in events:
+            eventname = event.get('eventname') or ''
+            if eventname.startswith(PROCESS_STATE_EVENT):
+                states.append(ProcessStateDTO(
+                    node_id=node_id,
+                    name=event.get('processname'),
+                    group=event.get('groupname'),
+                    state=eventname[len(PROCESS_STATE_EVENT):],
+                    from_state=event.get('from_state'),
+                    pid=event.get('pid'),
+                    expected=event.get('expected'),
+                    serial=event.get('serial'),
+                    timestamp=event.get('timestamp') or time.time()))
+            elif eventname == 'REMOTE_COMMUNICATION':
+                logger.debug('Remote communication event', node=node_id, type=event.get('type'))
+
+        node_pushed(node_id)
+        if states:
+            with self._changed:
+                self._changes[node_id] = self._changes.get(node_id, 0) + len(states)
+                self._changed.notify_all()
+            invalidate_node(node_id)
+            StateService.get_instance().push(node_id, states)
+            logger.debug('State changes pushed', node=node_id, changes=len(states))
+        return len(states)
+
+    def changes(self, node_id):
+        """ The number of state changes pushed by a node. """
+
+        with self._changed:
+            return self._changes.get(node_id, 0)
+
+    def wait_for_change(self, node_id, seen, timeout):
+        """ Wait (up to timeout seconds) for a state change pushed by a node.
+
+        Args:
+            seen (int): the number of changes already seen (see changes).
+
+        Returns:
+            int: the number of changes pushed by the node.
+        """
+
+        with self._changed:
+            self._changed.wait_for(lambda: self._changes.get(node_id, 0) != seen, timeout=timeout)
+            return self._changes.get(node_id, 0)
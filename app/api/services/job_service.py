@@ -0,0 +1,234 @@
+""" Asynchronous Lifecycle Operations (Jobs) """
+
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from enum import Enum
+
+from app.api.models import JobInfoDTO
+from app.api.services.base_service import BaseService
+from app.api.services.event_service import EventService
+from app.api.services.node_service import LifecycleOperationActionType, NodeService
+from app.config import AppConfig
+from app.core import tracing
+from app.core.exceptions import BaseError, ResourceNotFoundError
+from app.core.logging import LoggingFacility
+from app.manager import ToskoseManager
+
+logger = LoggingFacility.get_instance().get_logger()
+
+
+class JobStatus(Enum):
+    PENDING = 'pending'
+    RUNNING = 'running'
+    SUCCEEDED = 'succeeded'
+    FAILED = 'failed'
+
+
+# the states of a lifecycle operation that is still starting/stopping
+STARTING_STATES = ('STARTING', 'BACKOFF')
+STOPPING_STATES = ('STOPPING', 'STARTING', 'RUNNING', 'BACKOFF')
+
+
+class Job:
+    """ A lifecycle operation started/stopped in background. """
+
+    __slots__ = ('job_id', 'node_id', 'component_id', 'operation', 'action',
+                 'status', 'state', 'description', 'error', 'created', 'updated',
+                 'version')
+
+    def __init__(self, node_id, component_id, operation, action):
+        self.job_id = uuid.uuid4().hex
+        self.node_id = node_id
+        self.component_id = component_id
+        self.operation = operation
+        self.action = action
+        self.status = JobStatus.PENDING
+        self.state = None
+        self.description = None
+        self.error = None
+        self.created = self.updated = time.time()
+        # incremented on every update (see JobService.watch)
+        self.version = 0
+
+    @property
+    def done(self):
+        return self.status in (JobStatus.SUCCEEDED, JobStatus.FAILED)
+
+    def info(self):
+        return JobInfoDTO(
+            job_id=self.job_id,
+            node_id=self.node_id,
+            component_id=self.component_id,
+            operation=self.operation,
+            action=self.action.name.lower(),
+            status=self.status.value,
+            state=self.state,
+            description=self.description,
+            error=self.error,
+            created=self.created,
+            updated=self.updated)
+
+
+class JobService(BaseService):
+    """ Run the start/stop of the lifecycle operations in background.
+
+    A job sends the RPC without waiting, then polls the state of the lifecycle
+    operation until it's started (or stopped). The state is checked again as
+    soon as the node pushes a state change (if it has an event listener).
+    The jobs are kept in memory (by the worker process that received the
+    request) for a while after they are done (TOSKOSE_JOBS_RETENTION).
+    """
+
+    __instance = None
+    __instance_lock = threading.Lock()
+
+    @staticmethod
+    def get_instance():
+        """ The static access method """
+
+        if JobService.__instance == None:
+            with JobService.__instance_lock:
+                if JobService.__instance == None:
+                    JobService()
+
+        return JobService.__instance
+
+    def __init__(self):
+        if JobService.__instance != None:
+            raise Exception('This is a singleton')
+        else:
+            JobService.__instance = self
+
+        super().__init__()
+        self._jobs = {}
+        # guards the jobs and notifies their updates
+        self._changed = threading.Condition()
+        # created on first use (not in the gunicorn master process)
+        self._executor = None
+
+    def _submit(self, job):
+        with self._changed:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=AppConfig._JOBS_WORKERS, thread_name_prefix='toskose-job')
+            self._purge()
+            self._jobs[job.job_id] = job
+        # the job is traced as a child of the request submitting it
+        self._executor.submit(tracing.bind(self._run), job)
+
+    def _purge(self):
+        """ Forget the jobs done for longer than the retention time. """
+
+        expired = time.time() - AppConfig._JOBS_RETENTION
+        for job_id in [job_id for job_id, job in self._jobs.items()
+                       if job.done and job.updated < expired]:
+            del self._jobs[job_id]
+
+    def _update(self, job, **kwargs):
+        with self._changed:
+            for k, v in kwargs.items():
+                setattr(job, k, v)
+            job.updated = time.time()
+            job.version += 1
+            self._changed.notify_all()
+
+    def _run(self, job):
+        node_service = NodeService()
+        events = EventService.get_instance()
+        operation = dict(node_id=job.node_id, component_id=job.component_id,
+                         operation=job.operation)
+        try:
+            self._update(job, status=JobStatus.RUNNING)
+            seen = events.changes(job.node_id)
+            node_service.execute(action=job.action, wait=False, **operation)
+
+            waiting_states = STARTING_STATES \
+                if job.action is LifecycleOperationActionType.START else STOPPING_STATES
+            deadline = time.monotonic() + AppConfig._JOBS_TIMEOUT
+            while True:
+                info = node_service.execute(action=LifecycleOperationActionType.INFO, **operation)
+                if info.state_name != job.state or info.description != job.description:
+                    self._update(job, state=info.state_name, description=info.description)
+                if info.state_name not in waiting_states:
+                    break
+                if time.monotonic() > deadline:
+                    raise TimeoutError('the operation is still in [{}] state after {}s'.format(
+                        info.state_name, AppConfig._JOBS_TIMEOUT))
+                seen = events.wait_for_change(job.node_id, seen, AppConfig._JOBS_POLL_INTERVAL)
+
+            if job.action is LifecycleOperationActionType.START and \
+                    not (info.state_name == 'RUNNING' or
+                         (info.state_name == 'EXITED' and info.exit_status == '0')):
+                self._update(job, status=JobStatus.FAILED, error=info.spawn_error or
+                             'The operation ended in [{}] state'.format(info.state_name))
+            else:
+                self._update(job, status=JobStatus.SUCCEEDED)
+
+        except (BaseError, TimeoutError) as err:
+            logger.warn('Job failed', job=job.job_id, node=job.node_id, error=err)
+            self._update(job, status=JobStatus.FAILED, error=str(err))
+        except Exception:
+            logger.exception('Job failed', job=job.job_id, node=job.node_id)
+            self._update(job, status=JobStatus.FAILED, error='An unexpected error occurred')
+
+    def submit(self, *, node_id, component_id, operation, action):
+        """ Start/stop a lifecycle operation in background.
+
+        The node, the component and the operation are validated before the job
+        is accepted.
+
+        Returns:
+            JobInfoDTO: the accepted (pending) job.
+        """
+
+        assert action in (LifecycleOperationActionType.START, LifecycleOperationActionType.STOP)
+
+        if operation not in ToskoseManager.get_instance().lifecycle_operations(node_id, component_id):
+            raise ResourceNotFoundError('operation {0} not available on {1}'.format(
+                operation, component_id))
+
+        job = Job(node_id, component_id, operation, action)
+        info = job.info()
+        self._submit(job)
+        logger.debug('Job submitted', job=job.job_id, action=action.name, operation=operation,
+                     component=component_id, node=node_id)
+        return info
+
+    def _job(self, job_id):
+        try:
+            return self._jobs[job_id]
+        except KeyError:
+            raise ResourceNotFoundError('job {} not found'.format(job_id))
+
+    def job_info(self, job_id):
+        with self._changed:
+            return self._job(job_id).info()
+
+    def watch(self, job_id, keep_alive=15):
+        """ Yield the job info on every update, until the job is done.
+
+        None is yielded if nothing changes for keep_alive seconds. The job is
+        looked up now (not while its updates are yielded), so it's watched
+        until it's done even if it's purged meanwhile.
+        """
+
+        with self._changed:
+            job = self._job(job_id)
+        return self._watch(job, keep_alive)
+
+    def _watch(self, job, keep_alive):
+        version = -1
+        while True:
+            with self._changed:
+                if job.version == version:
+                    self._changed.wait_for(lambda: job.version != version, timeout=keep_alive)
+                if job.version == version:
+                    info = None
+                else:
+                    version, info = job.version, job.info()
+                done = job.done
+            yield info
+            if done and info is not None:
+                return
@@ -1,18 +1,27 @@
 """ Container Node Services """
 
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from enum import Enum, auto
+from functools import lru_cache
+from xmlrpc.client import Fault
 from typing import Dict, List
 
-from app.api.models import (DockerInfoDTO, HostedComponentInfoDTO,
+from app.api.models import (BatchLifecycleOperationResultDTO,
+                            DockerInfoDTO, HostedComponentInfoDTO,
                             LifecycleOperationInfoDTO, SupervisordInfoDTO,
                             ToskoseNodeInfoDTO)
 from app.api.services.base_service import BaseService
+from app.api.utils.cache import invalidate_node
 from app.api.utils.utils import compute_uptime
-from app.client.exceptions import (SupervisordClientFatalError,
+from app.client.exceptions import (SupervisordClientConnectionError,
+                                   SupervisordClientFatalError,
                                    SupervisordClientFaultError,
                                    SupervisordClientProtocolError)
+from app.client.impl.xmlrpc_client import ErrorType, error_messages_builder
 from app.config import AppConfig
-from app.core.exceptions import (ClientConnectionError, ClientFatalError,
+from app.core import tracing
+from app.core.exceptions import (BaseError, ClientConnectionError, ClientFatalError,
                                  ClientOperationFailedError, FatalError,
                                  OperationNotValid, ResourceNotFoundError)
 from app.core.logging import LoggingFacility
@@ -36,12 +45,48 @@ class LogsType(Enum):
     NODE = auto()
     OPERATION = auto()
 
+@lru_cache(maxsize=256)
+def _static_node_info(model_version, node_id, standalone):
+    """ The parts of the node info depending on the model only (docker, supervisord),
+    computed once for each model version. """
+
+    node = ToskoseManager.get_instance().node_by_id(node_id)
+    docker_data = {
+        'image': node.toskosed_image.name,
+        'tag': node.toskosed_image.tag,
+    }
+    if standalone:
+        return docker_data, {}
+
+    supervisord_data = {
+        'hostname': node.hostname,
+        'port': node.port,
+        'username': node.user,
+        'password': node.password,
+        'log_level': node.log_level,
+        'api_protocol': getattr(node, 'api_protocol', AppConfig._CLIENT_PROTOCOL),
+        'hosted_components': [component.name for component in node.hosted],
+    }
+    return docker_data, supervisord_data
+
+
 class NodeService(BaseService):
 
     SUPPORTED_LOGS_STD = ['stdout', 'stderr']
 
     def __init__(self):
         super().__init__()
+        # the instance is shared by the requests (served by concurrent threads),
+        # so the client of the node is kept per thread (see initializer)
+        self._local = threading.local()
+
+    @property
+    def _client(self):
+        return getattr(self._local, 'client', None)
+
+    @_client.setter
+    def _client(self, client):
+        self._local.client = client
 
     def initializer(validate_node=True, client=True):
         def decorator(func):
@@ -49,37 +94,39 @@ class NodeService(BaseService):
 
                 node_id = kwargs.get('node_id')
 
-                """ validate the node identifier """
-                if validate_node:
+                with tracing.span('NodeService.' + func.__name__, node=node_id):
+
+                    """ validate the node identifier """
+                    if validate_node:
+                        try:
+                            ToskoseManager.get_instance().node_by_id(node_id)
+                        except ValueError:
+                            raise ResourceNotFoundError(
+                                'node {0} not found'.format(node_id))
+
+                    """ get the client instance """
+                    if client:
+                        self._client = \
+                            ToskoseManager.get_instance().get_client(node_id)
+
+                        if self._client is None:
+                            raise OperationNotValid('Cannot operate on a standalone container.')
+
+                        if not self._client.reachable():
+                            logger.error('The node cannot be reached (connection error)', node=node_id)
+                            raise ClientConnectionError(
+                                'node {0} is offline'.format(node_id))
+
                     try:
-                        ToskoseManager.get_instance().node_by_id(node_id)
-                    except ValueError:
-                        raise ResourceNotFoundError(
-                            'node {0} not found'.format(node_id))
-
-                """ get the client instance """
-                if client:
-                    self._client = \
-                        ToskoseManager.get_instance().get_client(node_id)
-
-                    if self._client is None:
-                        raise OperationNotValid('Cannot operate on a standalone container.')
-
-                    if not self._client.reachable():
-                        logger.error('[{}] node cannot be reached. (connection error)'.format(node_id))
-                        raise ClientConnectionError(
-                            'node {0} is offline'.format(node_id))
-
-                try:
-                    res = func(self, *args, **kwargs)
-                except (SupervisordClientFaultError, SupervisordClientProtocolError) as err:
-                    logger.warn(err)
-                    raise ClientOperationFailedError(str(err)) from err
-                except SupervisordClientFatalError as err:
-                    logger.warn(err)
-                    raise ClientFatalError('A Fatal error from the client is occurred') from err
-
-                return res
+                        res = func(self, *args, **kwargs)
+                    except (SupervisordClientFaultError, SupervisordClientProtocolError) as err:
+                        logger.warn('Operation failed', node=node_id, call=func.__name__, error=err)
+                        raise ClientOperationFailedError(str(err)) from err
+                    except SupervisordClientFatalError as err:
+                        logger.warn('Fatal client error', node=node_id, call=func.__name__, error=err)
+                        raise ClientFatalError('A Fatal error from the client is occurred') from err
+
+                    return res
             return wrapper
         return decorator
 
@@ -92,22 +139,12 @@ class NodeService(BaseService):
         ofc "the node" is the container node in the tosca model.
         """
 
-        docker_data = {
-            'image': node.toskosed_image.name,
-            'tag': node.toskosed_image.tag,
-        }
+        docker_data, static_supervisord_data = _static_node_info(
+            ToskoseManager.get_instance().model_version, node.name, client is None)
 
         supervisord_data = {}
         if client: 
-            supervisord_data = {
-                'hostname': node.hostname,
-                'port': node.port,
-                'username': node.user,
-                'password': node.password,
-                'log_level': node.log_level,
-                'api_protocol': AppConfig._CLIENT_PROTOCOL,
-                'hosted_components': [component.name for component in node.hosted],
-            } 
+            supervisord_data = dict(static_supervisord_data)
             if client.reachable():
                 supervisord_data.update({ 
                     'reachable': True,
@@ -150,11 +187,13 @@ class NodeService(BaseService):
             pid=str(res['pid'])
         )
 
+    @tracing.traced('NodeService.get_all_nodes_info')
     def get_all_nodes_info(self) -> List:
         """ Retrieve info about all the available nodes. """
 
         return [self.node_info(node.name) for node in ToskoseManager.get_instance().nodes]
 
+    @tracing.traced('NodeService.node_info')
     def node_info(self, node_id):
         """ Retrieve info about a node mixing info from the the application
         configuration and info fetched from the Node API through the client.
@@ -172,25 +211,10 @@ class NodeService(BaseService):
         e.g. lifecycle operations available
         """
 
-        node = ToskoseManager.get_instance().node_by_id(node_id)
-        for component in node.hosted:
-            result = list()
-            if component.name == component_id:
-                for interface_k, interface_v in component.interfaces.items():
-                    if interface_k.upper() == 'STANDARD':
-                        logger.debug('Extracting Standard interfaces from [{}]'.format(
-                            component_id))
-                        result += [std_int for std_int in interface_v.keys()]
-                    else:
-                        logger.debug('Extracting custom interfaces [{0}] from [{1}]'.format(
-                            interface_k, component_id))
-                        result += [custom_int for custom_int in interface_v.keys()]
-                return HostedComponentInfoDTO(
-                    component_id=component_id,
-                    lifecycle_operations=result)
-                        
-        raise ResourceNotFoundError('{0} not hosted on node {1}'.format(
-            component_id, node_id))
+        return HostedComponentInfoDTO(
+            component_id=component_id,
+            lifecycle_operations=list(
+                ToskoseManager.get_instance().lifecycle_operations(node_id, component_id)))
 
     @initializer()
     def execute(self, *, node_id, component_id, operation, action, wait=True,
@@ -214,8 +238,8 @@ class NodeService(BaseService):
         assert isinstance(action, LifecycleOperationActionType)
 
         name = '{0}-{1}'.format(component_id, operation)
-        logger.debug('[{0}] lifecycle operation [{1}] on component [{2}] over [{3}] node'.format(
-            action.name, operation, component_id, node_id))
+        logger.debug('Lifecycle operation', action=action.name, operation=operation,
+                     component=component_id, node=node_id)
 
         if action is LifecycleOperationActionType.START:
 
@@ -227,20 +251,29 @@ class NodeService(BaseService):
                 raise OperationNotValid(
                     'Cannot start the operation because it\'s already in [{}] state'.format(
                         lifecycle_operation.state_name))
-            return self._client.start_process(name, wait)
+            try:
+                return self._client.start_process(name, wait)
+            finally:
+                invalidate_node(node_id)
         elif action is LifecycleOperationActionType.STOP:
-            return self._client.stop_process(name, wait)
+            try:
+                return self._client.stop_process(name, wait)
+            finally:
+                invalidate_node(node_id)
         elif action is LifecycleOperationActionType.INFO:
             return NodeService.__build_lifecycle_operation_info_dto(
                 node_id, component_id, operation,
                 self._client.get_process_info(name))
         elif action is LifecycleOperationActionType.SIGNAL:
-            return self._client.signal_process(name, signal)
+            try:
+                return self._client.signal_process(name, signal)
+            finally:
+                invalidate_node(node_id)
         else:
-            logger.warn('An invalid action [{0}] is occurred.'.format(
-                    action.name))
+            logger.warn('An invalid action is occurred', action=action.name, node=node_id)
             raise FatalError('A fatal error is occurred.')        
 
+    @initializer()
     def stop_all_operations(self, *, node_id, wait=True):
         """ Stop all the lifecycle operations running on the node. 
         
@@ -249,7 +282,137 @@ class NodeService(BaseService):
             wait (bool): wait for all lifecycle operations to be terminated.
         """
 
-        return self._client.stop_all_processes(wait)
+        try:
+            return self._client.stop_all_processes(wait)
+        finally:
+            invalidate_node(node_id)
+
+    # the supervisord methods of the batch actions
+    BATCH_METHODS = {
+        LifecycleOperationActionType.START: 'supervisor.startProcess',
+        LifecycleOperationActionType.STOP: 'supervisor.stopProcess',
+        LifecycleOperationActionType.SIGNAL: 'supervisor.signalProcess',
+    }
+
+    @staticmethod
+    def __batch_call(operation, wait):
+        """ The multicall request of a batch operation (validated against the model). """
+
+        node_id = operation['node_id']
+        component_id = operation['component_id']
+        try:
+            action = LifecycleOperationActionType[operation['action'].upper()]
+            method = NodeService.BATCH_METHODS[action]
+        except KeyError:
+            raise OperationNotValid('The action {} is not supported in a batch.'.format(
+                operation['action']))
+
+        manager = ToskoseManager.get_instance()
+        if operation['operation'] not in manager.lifecycle_operations(node_id, component_id):
+            raise ResourceNotFoundError('operation {0} not available on {1}'.format(
+                operation['operation'], component_id))
+        if manager.get_client(node_id) is None:
+            raise OperationNotValid('Cannot operate on a standalone container.')
+
+        name = '{0}-{1}'.format(component_id, operation['operation'])
+        if action is LifecycleOperationActionType.SIGNAL:
+            params = [name, operation.get('signal') or 'SIGTERM']
+        else:
+            params = [name, wait]
+        return {'methodName': method, 'params': params}
+
+    @staticmethod
+    def __batch_result(operation, error=None):
+        return BatchLifecycleOperationResultDTO(
+            node_id=operation['node_id'],
+            component_id=operation['component_id'],
+            operation=operation['operation'],
+            action=operation['action'],
+            success=error is None,
+            error=error)
+
+    @staticmethod
+    def __execute_node_batch(node_id, batch):
+        """ Send the operations of a node in a single system.multicall.
+
+        Args:
+            node_id (str): The node identifier.
+            batch (list): The (index, operation, call) of the operations on the node.
+
+        Returns:
+            list: the (index, BatchLifecycleOperationResultDTO) of the operations.
+        """
+
+        logger.debug('Batch of lifecycle operations', node=node_id, operations=len(batch))
+        client = ToskoseManager.get_instance().get_client(node_id)
+        try:
+            responses = client.multicall([call for _, _, call in batch])
+        except (SupervisordClientConnectionError, SupervisordClientFatalError,
+                SupervisordClientProtocolError, ClientConnectionError) as err:
+            logger.warn('Batch failed', node=node_id, error=err)
+            return [(index, NodeService.__batch_result(
+                        operation, 'node {0} cannot be reached'.format(node_id)))
+                    for index, operation, _ in batch]
+        except (SupervisordClientFaultError, BaseError) as err:
+            # e.g. the multicall itself faulted: only the operations of this node fail
+            logger.warn('Batch failed', node=node_id, error=err)
+            return [(index, NodeService.__batch_result(operation, str(err)))
+                    for index, operation, _ in batch]
+        finally:
+            invalidate_node(node_id)
+
+        results = []
+        for (index, operation, call), response in zip(batch, responses):
+            error = None
+            if isinstance(response, dict):
+                # {'faultCode': int, 'faultString': str}
+                error = error_messages_builder(
+                    ErrorType.FAULT,
+                    Fault(response.get('faultCode'), response.get('faultString')),
+                    *call['params'])
+            results.append((index, NodeService.__batch_result(operation, error)))
+        return results
+
+    def execute_batch(self, operations, wait=True):
+        """ Start/stop/signal a batch of lifecycle operations.
+
+        The operations are grouped by node, and the operations of a node are sent
+        in a single system.multicall (executed in the given order). The nodes are
+        managed concurrently. A failure affects only the related operations (or the
+        operations of a node, if it can't be reached).
+
+        Args:
+            operations (list): The operations, {node_id, component_id, operation, action[, signal]}.
+            wait (bool): wait for the lifecycle operations to be fully started/stopped.
+
+        Returns:
+            list: the result of each operation (in the given order).
+        """
+
+        results = [None] * len(operations)
+        batches = {}
+        for index, operation in enumerate(operations):
+            try:
+                call = NodeService.__batch_call(operation, wait)
+            except (ResourceNotFoundError, OperationNotValid) as err:
+                results[index] = NodeService.__batch_result(operation, str(err))
+                continue
+            batches.setdefault(operation['node_id'], []).append((index, operation, call))
+
+        if len(batches) > 1:
+            with ThreadPoolExecutor(max_workers=min(
+                    len(batches), AppConfig._API_BATCH_WORKERS)) as executor:
+                node_results = list(executor.map(
+                    tracing.bind(lambda item: NodeService.__execute_node_batch(*item)),
+                    batches.items()))
+        else:
+            node_results = [NodeService.__execute_node_batch(node_id, batch)
+                            for node_id, batch in batches.items()]
+
+        for node_result in node_results:
+            for index, result in node_result:
+                results[index] = result
+        return results
 
     @initializer()
     def node_logs(self, *, node_id, action, offset=0, length=0):
@@ -271,7 +434,7 @@ class NodeService(BaseService):
         name = '{0}-{1}'.format(component_id, operation)
 
         if std_type not in NodeService.SUPPORTED_LOGS_STD:
-            logger.warn('{} logs channel not supported'.format(std_type))
+            logger.warn('Logs channel not supported', node=node_id, channel=std_type)
             raise OperationNotValid('The std {} is not supported yet.'.format(std_type))
 
         if action is LogsActionType.READ:
@@ -284,6 +447,13 @@ class NodeService(BaseService):
         if action is LogsActionType.CLEAR:
             return self._client.clear_process_log(name)
 
+    @initializer()
+    def send_remote_comm_event(self, *, node_id, type, data):
+        """ Emit a REMOTE_COMMUNICATION event to the event listeners of the node
+        (e.g. to check that its events are pushed to the manager). """
+
+        return self._client.send_remote_comm_event(type, data)
+
     """ not implemented """
 
     def reload_config(self):
@@ -291,10 +461,6 @@ class NodeService(BaseService):
         #self._client.reload_config()
         pass
 
-    def send_remote_comm_event(self, *, node_id, type, data):
-        """ not implemented yet """
-        pass
-
     def add_process_group(self, *, node_id, name):
         """ not implemented yet """
         pass
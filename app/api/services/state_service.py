@@ -0,0 +1,250 @@
+""" Cluster State Changes (streamed by /api/v1/events) """
+
+import collections
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+from app.api.services.base_service import BaseService
+from app.client.exceptions import (SupervisordClientConnectionError,
+                                   SupervisordClientFatalError,
+                                   SupervisordClientFaultError,
+                                   SupervisordClientProtocolError)
+from app.config import AppConfig
+from app.core.logging import LoggingFacility
+from app.manager import ToskoseManager
+
+logger = LoggingFacility.get_instance().get_logger()
+
+# the number of changes kept for the subscribers lagging behind (or reconnecting)
+BUFFER_SIZE = 256
+
+# the fields of a lifecycle operation whose changes are streamed
+# (not the description, it changes with the uptime)
+OPERATION_FIELDS = ('state', 'pid', 'exit_status', 'spawn_error')
+
+
+@lru_cache(maxsize=256)
+def _operations_by_process(model_version, node_id):
+    """ supervisord program -> (component, lifecycle operation), e.g. api-create -> (api, create) """
+
+    manager = ToskoseManager.get_instance()
+    return {
+        '{0}-{1}'.format(component.name, operation): (component.name, operation)
+        for component in manager.node_by_id(node_id).hosted
+        for operation in manager.lifecycle_operations(node_id, component.name)
+    }
+
+
+class StateService(BaseService):
+    """ Stream the changes of the state of the nodes (supervisord) and of their
+    lifecycle operations.
+
+    A single poller (per worker process) fetches the state of all the nodes,
+    only while there are subscribers, and the state changes pushed by the
+    nodes (see app.api.services.event_service) are streamed as soon as they
+    are received. The subscribers get a snapshot, then the changes: N
+    subscribers cost the nodes as much as one.
+    """
+
+    __instance = None
+    __instance_lock = threading.Lock()
+
+    @staticmethod
+    def get_instance():
+        """ The static access method """
+
+        if StateService.__instance == None:
+            with StateService.__instance_lock:
+                if StateService.__instance == None:
+                    StateService()
+
+        return StateService.__instance
+
+    def __init__(self):
+        if StateService.__instance != None:
+            raise Exception('This is a singleton')
+        else:
+            StateService.__instance = self
+
+        super().__init__()
+        # node -> {'reachable', 'supervisor_state', 'operations': {process -> fields}}
+        self._nodes = {}
+        self._polled = False
+        # (seq, event, data)
+        self._changes = collections.deque(maxlen=BUFFER_SIZE)
+        self._seq = 0
+        self._subscribers = 0
+        self._poller = None
+        self._changed = threading.Condition()
+
+    """ the state of the nodes """
+
+    @staticmethod
+    def _fetch(node_id, client):
+        """ The state of a node and of its lifecycle operations. """
+
+        try:
+            supervisor_state = client.get_state()['statename']
+            processes = client.get_all_process_info()
+        except (SupervisordClientConnectionError, SupervisordClientFatalError,
+                SupervisordClientFaultError, SupervisordClientProtocolError) as err:
+            logger.debug('Node state not available', node=node_id, error=err)
+            return {'reachable': False, 'supervisor_state': None, 'operations': {}}
+
+        return {
+            'reachable': True,
+            'supervisor_state': supervisor_state,
+            'operations': {
+                process['name']: {
+                    'state': process['statename'],
+                    'pid': process['pid'],
+                    'exit_status': process['exitstatus'],
+                    'spawn_error': process['spawnerr'],
+                } for process in processes
+            }
+        }
+
+    def _poll(self, executor):
+        manager = ToskoseManager.get_instance()
+        clients = [(node.name, manager.get_client(node.name)) for node in manager.nodes]
+        clients = [(node_id, client) for node_id, client in clients if client is not None]
+        states = executor.map(lambda item: StateService._fetch(*item), clients)
+
+        with self._changed:
+            nodes = {}
+            for (node_id, _), state in zip(clients, states):
+                nodes[node_id] = state
+                self._diff(node_id, self._nodes.get(node_id), state)
+            self._nodes = nodes
+            self._polled = True
+            self._changed.notify_all()
+
+    def _operation(self, node_id, process, fields):
+        component_id, operation = _operations_by_process(
+            ToskoseManager.get_instance().model_version, node_id).get(process, (None, None))
+        data = {'node_id': node_id, 'component_id': component_id, 'operation': operation,
+                'process': process}
+        data.update(fields)
+        return data
+
+    def _emit(self, event, data):
+        self._seq += 1
+        self._changes.append((self._seq, event, data))
+
+    def _diff(self, node_id, old, new):
+        """ Emit the changes between two states of a node. """
+
+        old = old or {'reachable': None, 'supervisor_state': None, 'operations': {}}
+        if (old['reachable'], old['supervisor_state']) != (new['reachable'], new['supervisor_state']):
+            self._emit('node', {'node_id': node_id, 'reachable': new['reachable'],
+                                'supervisor_state': new['supervisor_state']})
+        for process, fields in new['operations'].items():
+            if old['operations'].get(process) != fields:
+                self._emit('operation', self._operation(node_id, process, fields))
+
+    def push(self, node_id, states):
+        """ Stream the state changes pushed by a node (ProcessStateDTO). """
+
+        with self._changed:
+            node = self._nodes.get(node_id)
+            if node is None or not self._subscribers:
+                return
+            new = dict(node, reachable=True, operations=dict(node['operations']))
+            for state in states:
+                fields = dict(new['operations'].get(state.name) or dict.fromkeys(OPERATION_FIELDS))
+                fields['state'] = state.state
+                if state.pid is not None:
+                    fields['pid'] = state.pid
+                new['operations'][state.name] = fields
+            self._diff(node_id, node, new)
+            self._nodes[node_id] = new
+            self._changed.notify_all()
+
+    def snapshot(self):
+        """ The last known state of all the nodes. """
+
+        with self._changed:
+            return self._snapshot()
+
+    def _snapshot(self):
+        return [
+            {'node_id': node_id, 'reachable': node['reachable'],
+             'supervisor_state': node['supervisor_state'],
+             'operations': [self._operation(node_id, process, fields)
+                            for process, fields in node['operations'].items()]}
+            for node_id, node in self._nodes.items()
+        ]
+
+    """ the poller """
+
+    def _run_poller(self):
+        with ThreadPoolExecutor(max_workers=AppConfig._API_BATCH_WORKERS,
+                                thread_name_prefix='toskose-state') as executor:
+            while True:
+                with self._changed:
+                    if not self._subscribers:
+                        # nobody is listening: the state would become stale
+                        self._poller = None
+                        self._nodes = {}
+                        self._changes.clear()
+                        self._polled = False
+                        return
+                try:
+                    self._poll(executor)
+                except Exception:
+                    logger.exception('Cannot poll the state of the nodes')
+                with self._changed:
+                    self._changed.wait_for(lambda: not self._subscribers,
+                                           timeout=AppConfig._EVENTS_STREAM_INTERVAL)
+
+    def _subscribe(self):
+        with self._changed:
+            self._subscribers += 1
+            if self._poller is None:
+                self._poller = threading.Thread(
+                    target=self._run_poller, name='toskose-state-poller', daemon=True)
+                self._poller.start()
+
+    def _unsubscribe(self):
+        with self._changed:
+            self._subscribers -= 1
+            self._changed.notify_all()
+
+    def watch(self, last_event_id=None, keep_alive=15):
+        """ Yield the changes of the cluster state as (seq, event, data).
+
+        The first one is a snapshot (event 'snapshot'), unless the subscriber
+        is resuming (last_event_id) and the changes it missed are still
+        buffered. None is yielded if nothing changes for keep_alive seconds.
+        """
+
+        self._subscribe()
+        try:
+            with self._changed:
+                self._changed.wait_for(lambda: self._polled, timeout=keep_alive)
+                seq = last_event_id
+                if seq is None or not self._changes or seq > self._seq \
+                        or seq < self._changes[0][0] - 1:
+                    seq = self._seq
+                    change = (seq, 'snapshot', self._snapshot())
+                else:
+                    change = None
+            if change is not None:
+                yield change
+
+            while True:
+                with self._changed:
+                    self._changed.wait_for(lambda: self._seq != seq, timeout=keep_alive)
+                    if self._changes and seq < self._changes[0][0] - 1:
+                        # lagging behind, the changes in between are lost
+                        changes = [(self._seq, 'snapshot', self._snapshot())]
+                    else:
+                        changes = [change for change in self._changes if change[0] > seq]
+                if not changes:
+                    yield None
+                for change in changes:
+                    seq = change[0]
+                    yield change
+        finally:
+            self._unsubscribe()
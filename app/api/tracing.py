@@ -0,0 +1,64 @@
+"""
+Tracing of the API requests (see app.core.tracing).
+
+Every request is the root span of its trace, or a child of the caller's span
+if it carries a traceparent header. The response carries the traceparent of
+the request span, so a slow response can be looked up in the exported spans.
+"""
+
+import functools
+
+from flask import g, request
+from flask_restplus.representations import output_json
+
+from app.core import tracing
+
+
+def start_request_span():
+    """ before_request hook (of the app, so the cached responses are traced too). """
+
+    if not tracing.enabled():
+        return
+    rule = request.url_rule.rule if request.url_rule is not None else '<unmatched>'
+    g.request_span = tracing.span(
+        '{} {}'.format(request.method, rule),
+        traceparent=request.headers.get('traceparent'),
+        method=request.method,
+        target=request.full_path.rstrip('?'),
+    ).activate()
+
+
+def tag_response(response):
+    """ after_request hook adding the status and the traceparent of the request span. """
+
+    span = g.get('request_span')
+    if span is not None:
+        span.set('status', response.status_code)
+        response.headers['traceparent'] = span.traceparent
+    return response
+
+
+def end_request_span(error=None):
+    """ teardown_request hook (ending the span even if the request failed). """
+
+    span = g.pop('request_span', None)
+    if span is not None:
+        span.deactivate()
+        span.end(error)
+
+
+def traced_handler(method):
+    """ A method decorator of the resources, tracing the handler (and the marshalling). """
+
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        with tracing.span('{}.{}'.format(type(method.__self__).__name__, method.__name__)):
+            return method(*args, **kwargs)
+    return wrapper
+
+
+def traced_output_json(data, code, headers=None):
+    """ The JSON representation of the responses, traced. """
+
+    with tracing.span('serialize'):
+        return output_json(data, code, headers)
@@ -0,0 +1,215 @@
+"""
+Server-side cache of the read-only API responses.
+
+Only the resources that opt in with a cache policy are cached (GET only):
+
+- MODEL: the response depends on the loaded model only (e.g. the lifecycle
+  operations of a hosted component). It's cached until the model changes.
+- NODE: the response is fetched from supervisord (e.g. the state of a node).
+  It's cached for a short time (TOSKOSE_API_CACHE_TTL) and invalidated as soon
+  as a lifecycle operation of the node is started, stopped or signaled, or
+  its state changes (events pushed by the node, see app.api.services.event_service).
+  The responses of a node pushing its events are cached longer
+  (TOSKOSE_API_CACHE_EVENTS_TTL): polling is only a fallback.
+
+The responses carry a (weak) ETag, so the clients can revalidate them with
+If-None-Match and get a 304 without the body.
+"""
+
+import hashlib
+import threading
+import time
+
+from flask import current_app, g, request
+
+from app.config import AppConfig
+from app.core.metrics import API_CACHE_REQUESTS, gauge
+from app.manager import ToskoseManager
+
+
+MODEL = 'model'
+NODE = 'node'
+
+# the lists of nodes are invalidated together with any node
+_ALL_NODES = None
+
+_CACHE_CONTROL = 'no-cache'
+
+
+class _Entry:
+
+    __slots__ = ('data', 'etag', 'tag', 'expires')
+
+    def __init__(self, data, etag, tag, expires=None):
+        self.data = data
+        self.etag = etag
+        self.tag = tag
+        self.expires = expires
+
+
+class ResponseCache:
+    """ A bounded, thread-safe map of cached responses.
+
+    Every entry has a tag (e.g. the model version) and optionally an
+    expiration time: an entry is returned only if its tag matches and it's
+    not expired.
+    """
+
+    def __init__(self, max_entries=1024):
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._max_entries = max_entries
+
+    def get(self, key, tag):
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None or entry.tag != tag \
+                or (entry.expires is not None and entry.expires < time.monotonic()):
+            return None
+        return entry
+
+    def put(self, key, entry):
+        with self._lock:
+            if key not in self._entries and len(self._entries) >= self._max_entries:
+                self._purge()
+            self._entries[key] = entry
+
+    def _purge(self):
+        now = time.monotonic()
+        expired = [key for key, entry in self._entries.items()
+                   if entry.expires is not None and entry.expires < now]
+        for key in expired or list(self._entries):
+            del self._entries[key]
+
+    def invalidate(self, match):
+        """ Drop the entries whose key matches (e.g. lambda key: key[0] == 'maven'). """
+
+        with self._lock:
+            for key in [key for key in self._entries if match(key)]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+_model_cache = ResponseCache()
+_node_cache = ResponseCache()
+
+# node -> invalidations counter (a response fetched before an invalidation is not cached)
+_generations = {}
+_generations_lock = threading.Lock()
+
+# node -> the (monotonic) time of the last event pushed by the node
+_pushed = {}
+
+
+def invalidate_node(node_id):
+    """ Drop the cached supervisord-derived responses of a node (and the lists of nodes). """
+
+    with _generations_lock:
+        for key in (node_id, _ALL_NODES):
+            _generations[key] = _generations.get(key, 0) + 1
+    _node_cache.invalidate(lambda key: key[0] in (node_id, _ALL_NODES))
+
+
+def node_pushed(node_id):
+    """ Record that a node pushed an event (its state changes are not missed). """
+
+    _pushed[node_id] = time.monotonic()
+
+
+def _node_ttl(node_id):
+    pushed = _pushed.get(node_id)
+    if pushed is not None and time.monotonic() - pushed < AppConfig._EVENTS_LISTENER_TIMEOUT:
+        return max(AppConfig._API_CACHE_EVENTS_TTL, AppConfig._API_CACHE_TTL)
+    return AppConfig._API_CACHE_TTL
+
+
+def invalidate_all():
+    """ Drop all the cached responses (e.g. the manager was re-initialized). """
+
+    with _generations_lock:
+        for key in list(_generations):
+            _generations[key] += 1
+        _generations[_ALL_NODES] = _generations.get(_ALL_NODES, 0) + 1
+    _node_cache.clear()
+    _model_cache.clear()
+
+
+def _cache_policy(endpoint):
+    view = current_app.view_functions.get(endpoint)
+    resource = getattr(view, 'view_class', None)
+    policy = getattr(resource, 'cache', None)
+    if policy == NODE and AppConfig._API_CACHE_TTL <= 0:
+        return None
+    return policy
+
+
+def _lookup(policy):
+    """ The cache, the key and the tag of the current request. """
+
+    if policy == MODEL:
+        return _model_cache, request.full_path, ToskoseManager.get_instance().model_version
+
+    node_id = (request.view_args or {}).get('node_id', _ALL_NODES)
+    with _generations_lock:
+        generation = _generations.get(node_id, 0)
+    return _node_cache, (node_id, request.full_path), generation
+
+
+def _conditional(response, etag):
+    response.set_etag(etag, weak=True)
+    response.headers['Cache-Control'] = _CACHE_CONTROL
+    return response.make_conditional(request)
+
+
+def cached_response():
+    """ before_request hook answering from the cache (if possible). """
+
+    if request.method != 'GET':
+        return None
+    policy = _cache_policy(request.endpoint)
+    if policy is None:
+        return None
+
+    cache, key, tag = _lookup(policy)
+    entry = cache.get(key, tag)
+    if entry is None:
+        API_CACHE_REQUESTS.inc(policy, 'miss')
+        # cache the response (see cache_response)
+        g.response_cache = (policy, cache, key, tag)
+        return None
+
+    API_CACHE_REQUESTS.inc(policy, 'hit')
+    response = current_app.response_class(entry.data, mimetype='application/json')
+    return _conditional(response, entry.etag)
+
+
+def cache_response(response):
+    """ after_request hook caching the response (if it was not cached yet). """
+
+    cached = g.pop('response_cache', None)
+    if cached is None or response.status_code != 200 \
+            or response.direct_passthrough or response.is_streamed:
+        return response
+
+    policy, cache, key, tag = cached
+    data = response.get_data()
+    etag = hashlib.sha1(data).hexdigest()
+    expires = time.monotonic() + _node_ttl(key[0]) if policy == NODE else None
+    cache.put(key, _Entry(data, etag, tag, expires))
+    return _conditional(response, etag)
+
+
+def _hit_ratio():
+    lookups = {}
+    for (policy, result), count in API_CACHE_REQUESTS.values().items():
+        hits, total = lookups.get(policy, (0, 0))
+        lookups[policy] = (hits + (count if result == 'hit' else 0), total + count)
+    return {(policy,): hits / total for policy, (hits, total) in lookups.items()}
+
+
+gauge('toskose_api_cache_hit_ratio',
+      'The ratio of the API cache lookups answered from the cache (since the start).',
+      _hit_ratio, ('cache',))
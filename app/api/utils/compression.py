@@ -0,0 +1,60 @@
+"""
+Negotiated gzip/deflate compression of the API responses.
+
+Only the resources that opt in (compressed = True, e.g. logs and bulk status)
+are compressed, and only if the response is larger than a threshold.
+"""
+
+import gzip
+import zlib
+
+from flask import current_app, request
+
+from app.config import AppConfig
+
+
+SUPPORTED_ENCODINGS = ('gzip', 'deflate')
+
+
+def _compressible_view(endpoint):
+    view = current_app.view_functions.get(endpoint)
+    resource = getattr(view, 'view_class', None)
+    return getattr(resource, 'compressed', False)
+
+
+def _negotiate(accept_encodings):
+    """ Select the supported encoding with the highest quality (if any). """
+
+    quality, encoding = max(
+        (accept_encodings[encoding], encoding) for encoding in SUPPORTED_ENCODINGS)
+    return encoding if quality > 0 else None
+
+
+def compress_response(response):
+    """ after_request hook compressing the response of the compressible resources. """
+
+    if response.status_code != 200 \
+            or response.direct_passthrough \
+            or response.is_streamed \
+            or 'Content-Encoding' in response.headers \
+            or not _compressible_view(request.endpoint):
+        return response
+
+    response.vary.add('Accept-Encoding')
+
+    data = response.get_data()
+    if len(data) < AppConfig._API_COMPRESSION_MIN_SIZE:
+        return response
+
+    encoding = _negotiate(request.accept_encodings)
+    if encoding is None:
+        return response
+
+    if encoding == 'gzip':
+        data = gzip.compress(data, compresslevel=AppConfig._API_COMPRESSION_LEVEL)
+    else:
+        data = zlib.compress(data, AppConfig._API_COMPRESSION_LEVEL)
+
+    response.set_data(data)
+    response.headers['Content-Encoding'] = encoding
+    return response
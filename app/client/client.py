@@ -1,9 +1,11 @@
 from enum import Enum, auto
 from app.client.impl.xmlrpc_client import ToskoseXMLRPCclient
+from app.client.impl.jsonrpc_client import ToskoseJSONRPCclient
 
 
 class ProtocolType(Enum):
     XMLRPC = auto()
+    JSONRPC = auto()
 
 class ToskoseClientFactory:
 
@@ -12,5 +14,7 @@ class ToskoseClientFactory:
         protocol_type = protocol_type.upper()
         if protocol_type == ProtocolType.XMLRPC.name:
             return ToskoseXMLRPCclient(**kwargs)
+        elif protocol_type == ProtocolType.JSONRPC.name:
+            return ToskoseJSONRPCclient(**kwargs)
         else:
             raise ValueError("Invalid client protocol: {}".format(protocol_type))
@@ -3,6 +3,7 @@ import socket
 from abc import ABC, abstractmethod
 from typing import List, Dict
 
+from app.core import tracing
 from app.core.logging import LoggingFacility
 from app.core.exceptions import ClientConnectionError
 
@@ -12,11 +13,17 @@ logger = LoggingFacility.get_instance().get_logger()
 
 class BaseClient(ABC):
 
-    def __init__(self, hostname=None, port=None, username=None, password=None):
+    def __init__(self, hostname=None, port=None, username=None, password=None, name=None):
         self._hostname = hostname
         self._port = port
         self._username = username
         self._password = password
+        # the identifier of the node (e.g. in the metrics), the hostname by default
+        self._name = name if name is not None else hostname
+
+    @property
+    def name(self):
+        return self._name
 
     @property
     def hostname(self):
@@ -37,9 +44,10 @@ class BaseClient(ABC):
     @property
     def ipv4(self):
         try:
-            return socket.gethostbyname(self.hostname)
+            with tracing.span('dns', host=self.hostname):
+                return socket.gethostbyname(self.hostname)
         except socket.error:
-            logger.warn('Failed to resolve hostname [{}]'.format(self.hostname))
+            logger.warn('Failed to resolve hostname', node=self.name, host=self.hostname)
             raise ClientConnectionError('Connection failed')
 
     @abstractmethod
@@ -0,0 +1,146 @@
+import base64
+import gzip
+import http.client
+import itertools
+import json
+import threading
+import urllib.parse
+from xmlrpc.client import Fault, ProtocolError
+
+from app.config import AppConfig
+from app.core.logging import LoggingFacility
+from app.client.impl.xmlrpc_client import ToskoseXMLRPCclient
+
+
+logger = LoggingFacility.get_instance().get_logger()
+
+
+class _Method:
+    """ A callable bound to a (dotted) remote method name. """
+
+    def __init__(self, send, name):
+        self.__send = send
+        self.__name = name
+
+    def __getattr__(self, name):
+        return _Method(self.__send, '{}.{}'.format(self.__name, name))
+
+    def __call__(self, *args):
+        return self.__send(self.__name, args)
+
+
+class JSONRPCProxy:
+    """ A minimal JSON-RPC 2.0 proxy with the same call interface of
+    xmlrpc.client.ServerProxy (e.g. proxy.supervisor.getState()).
+
+    Remote errors are raised as xmlrpc.client.Fault (the error code is the
+    supervisord fault code) and HTTP errors as xmlrpc.client.ProtocolError,
+    so the failures are handled exactly as the XML-RPC ones.
+
+    If accept_gzip is set, gzip-encoded responses are requested (the sidecar
+    compresses only the large ones).
+
+    The kept-alive connection is per thread (the proxy can be shared).
+    """
+
+    def __init__(self, uri, accept_gzip=True):
+        parsed = urllib.parse.urlsplit(uri)
+        self._uri = uri
+        self._host = parsed.hostname
+        self._port = parsed.port
+        self._path = parsed.path or '/'
+        self._headers = {
+            'Content-Type': 'application/json',
+            'Accept': 'application/json',
+        }
+        if accept_gzip:
+            self._headers['Accept-Encoding'] = 'gzip'
+        if parsed.username is not None:
+            credentials = '{}:{}'.format(
+                urllib.parse.unquote(parsed.username),
+                urllib.parse.unquote(parsed.password or ''))
+            self._headers['Authorization'] = 'Basic {}'.format(
+                base64.b64encode(credentials.encode('utf-8')).decode('ascii'))
+        self._ids = itertools.count(1)
+        self._local = threading.local()
+
+    def __getattr__(self, name):
+        return _Method(self.__request, name)
+
+    def __connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = self._local.connection = \
+                http.client.HTTPConnection(self._host, self._port)
+        return connection
+
+    def __close(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
+
+    def __request(self, method, params):
+        body = json.dumps({
+            'jsonrpc': '2.0',
+            'id': next(self._ids),
+            'method': method,
+            'params': list(params),
+        }).encode('utf-8')
+
+        # retry once if the kept-alive connection has gone cold
+        for attempt in (0, 1):
+            try:
+                connection = self.__connection()
+                connection.request('POST', self._path, body, self._headers)
+                response = connection.getresponse()
+                data = response.read()
+                break
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                self.__close()
+                if attempt:
+                    raise
+            except Exception:
+                self.__close()
+                raise
+
+        if response.status != 200:
+            raise ProtocolError(
+                self._uri, response.status, response.reason,
+                dict(response.getheaders()))
+
+        if response.getheader('Content-Encoding', '') == 'gzip':
+            data = gzip.decompress(data)
+
+        payload = json.loads(data.decode('utf-8'))
+        error = payload.get('error')
+        if error is not None:
+            raise Fault(error.get('code', 0), error.get('message', ''))
+        return payload.get('result')
+
+
+class ToskoseJSONRPCclient(ToskoseXMLRPCclient):
+    """ A client for the JSON-RPC sidecar (toskosed/jsonrpc_bridge.py).
+
+    The sidecar exposes the same namespace of the supervisord XML-RPC API
+    (supervisor.*, system.*), so only the proxy differs from the XML-RPC client.
+    """
+
+    @staticmethod
+    def build_rpc_endpoint(hostname, port, username=None, password=None):
+        """ Build the RPC endpoint """
+
+        auth = ""
+        if username is not None and password is not None:
+            auth = "{username}:{password}@".format(
+                username=urllib.parse.quote(str(username), safe=''),
+                password=urllib.parse.quote(str(password), safe=''))
+
+        return "http://{auth}{hostname}:{port}/jsonrpc".format(auth=auth, hostname=hostname, port=port)
+
+    def build(self):
+        """ Build a connection with the JSON-RPC sidecar """
+
+        return JSONRPCProxy(
+            self._rpc_endpoint,
+            accept_gzip=AppConfig._CLIENT_COMPRESSION)
@@ -1,13 +1,17 @@
+from app.config import AppConfig
 from app.core.logging import LoggingFacility
 from xmlrpc.client import ServerProxy, ProtocolError, Fault
 from app.client.impl.supervisord_client import SupervisordBaseClient
+from app.client.impl.xmlrpc_transport import ParserType, ToskoseTransport
+from app.client.exceptions import Error
 from app.client.exceptions import SupervisordClientFatalError
 from app.client.exceptions import SupervisordClientConnectionError
 from app.client.exceptions import SupervisordClientProtocolError
 from app.client.exceptions import SupervisordClientFaultError
+from app.core import tracing
+from app.core.metrics import RPC_DURATION, RPC_ERRORS
 
-import logging
-import textwrap
+import time
 from enum import Enum, auto
 
 
@@ -47,31 +51,23 @@ def error_messages_builder(type, error, *args):
 class ToskoseXMLRPCclient(SupervisordBaseClient):
 
     def _handling_failures(func):
-        """ Handling connection errors or failures in RPC """
+        """ Handling connection errors or failures in RPC (and measuring the RPC) """
 
-        def wrapper(self, *args, **kwargs):
+        def handled(self, *args, **kwargs):
             try:
                 return func(self, *args, **kwargs)
             except ConnectionRefusedError as conn_err:
-                logger.error(
-                    'Cannot establish a connection to http://{0}:{1}\n \
-                    Error: {2}'.format(
-                        self.ipv4,
-                        self.port,
-                        conn_err))
+                logger.error('Cannot establish a connection to the node',
+                             node=self.name, host=self.hostname, port=self.port, error=conn_err)
                 raise SupervisordClientConnectionError(
                     "A problem occurred while contacting the node",
                     host=self.ipv4,
                     port=self.port) from conn_err
 
             except Fault as ferr:
-                logger.error(textwrap.dedent('\
-                    A Fault Error is occurred: {} (code: {})\
-                    '.format(
-                        ferr.faultString, 
-                        ferr.faultCode,
-                    )))                
-                
+                logger.error('A Fault Error is occurred', node=self.name, method=func.__name__,
+                             fault=ferr.faultString, code=ferr.faultCode)
+
                 raise SupervisordClientFaultError(
                     error_messages_builder(
                         ErrorType.FAULT,
@@ -80,60 +76,70 @@ class ToskoseXMLRPCclient(SupervisordBaseClient):
                     )) from ferr
 
             except ProtocolError as perr:
-                logger.error(textwrap.dedent('\
-                    A Protocol Error is occurred: {} \
-                    [URL: {}]\
-                    [HTTP Headers: {}] \
-                    (code: {})\
-                    '.format(
-                        perr.errmsg,
-                        perr.url,
-                        perr.headers,
-                        perr.errcode,
-                    )))
+                logger.error('A Protocol Error is occurred', node=self.name, method=func.__name__,
+                             error=perr.errmsg, url=perr.url, headers=perr.headers, code=perr.errcode)
 
                 raise SupervisordClientProtocolError(
                     'A protocol error occurred') from perr
 
             except OverflowError as err:
-                logger.error('An overflow error occurred (an integer \
-                exceeds the XML-RPC buffer limits)')
+                logger.error('An overflow error occurred (an integer exceeds the XML-RPC buffer limits)',
+                             node=self.name, method=func.__name__)
                 raise SupervisordClientFatalError(
                     'A fatal error occurred') from err
 
             except OSError as err:
-                logger.error('OS error: {0}'.format(err))
+                logger.error('OS error', node=self.name, method=func.__name__, error=err)
                 raise SupervisordClientFatalError(
                     'A fatal error occurred') from err
 
             except ValueError as err:
-                logger.error('Value error: {0}'.format(err))
+                logger.error('Value error', node=self.name, method=func.__name__, error=err)
                 raise SupervisordClientFatalError(
                     'A fatal error occurred') from err
             except:
-                logger.error('Unexpected Error: ')
+                logger.exception('Unexpected Error', node=self.name, method=func.__name__)
                 raise SupervisordClientFatalError(
                     'A fatal error occurred')
 
+        def wrapper(self, *args, **kwargs):
+            start = time.perf_counter()
+            try:
+                with tracing.span('rpc ' + func.__name__, node=self.name):
+                    return handled(self, *args, **kwargs)
+            except Error as err:
+                RPC_ERRORS.inc(self.name, func.__name__, type(err).__name__)
+                raise
+            finally:
+                RPC_DURATION.observe(time.perf_counter() - start, self.name, func.__name__)
+
         return wrapper
 
-    def __init__(self, *args, **kwargs):
-        super(ToskoseXMLRPCclient, self).__init__(*args, **kwargs)
-        
-        self._rpc_endpoint = \
-            ToskoseXMLRPCclient.build_rpc_endpoint(**kwargs)
+    def __init__(self, *args, parser=None, name=None, **kwargs):
+        super(ToskoseXMLRPCclient, self).__init__(*args, name=name, **kwargs)
+
+        if parser is None:
+            parser = AppConfig._CLIENT_XMLRPC_PARSER
+        try:
+            self._parser = parser if isinstance(parser, ParserType) \
+                else ParserType[parser.upper()]
+        except KeyError:
+            raise ValueError('Invalid XML-RPC parser: {}'.format(parser))
+
+        self._rpc_endpoint = self.build_rpc_endpoint(**kwargs)
         self._instance = self.build()
 
-        logger = logging.getLogger(__class__.__name__)
-        logger.info(__class__.__name__ + "logger started")
+        logger.debug('Client built', node=self.name, client=type(self).__name__)
 
     def reachable(self):
         # used to trigger connection
-        try:
-            self.get_identification()
-            return True
-        except SupervisordClientFatalError as conn_err:
-            return False
+        with tracing.span('reachable', node=self.name) as span:
+            try:
+                self.get_identification()
+                return True
+            except SupervisordClientFatalError as conn_err:
+                span.set('reachable', False)
+                return False
 
     @staticmethod
     def build_rpc_endpoint(hostname, port, username=None, password=None):
@@ -148,7 +154,11 @@ class ToskoseXMLRPCclient(SupervisordBaseClient):
     def build(self):
         """ Build a connection with the XML-RPC Server """
 
-        return ServerProxy(self._rpc_endpoint)
+        return ServerProxy(
+            self._rpc_endpoint,
+            transport=ToskoseTransport(
+                parser=self._parser,
+                accept_gzip=AppConfig._CLIENT_COMPRESSION))
 
     """ Supervisord Process Management """
 
@@ -238,9 +248,9 @@ class ToskoseXMLRPCclient(SupervisordBaseClient):
         """ not implemented yet """
         pass
 
+    @_handling_failures
     def send_remote_comm_event(self, type, data):
-        """ not implemented yet """
-        pass
+        return self._instance.supervisor.sendRemoteCommEvent(type, data)
 
     @_handling_failures
     def reload_config(self):
@@ -294,6 +304,6 @@ class ToskoseXMLRPCclient(SupervisordBaseClient):
         """ not implemented yet """
         pass
 
+    @_handling_failures
     def multicall(self, calls):
-        """ not implemented yet """
-        pass
+        return self._instance.system.multicall(calls)
@@ -0,0 +1,180 @@
+"""
+HTTP transport and response decoding for the XML-RPC client.
+
+The stock xmlrpc.client unmarshaller dispatches a Python callback for every
+start/end/data event produced by expat, which is slow on large process tables
+(getAllProcessInfo) and on multi-megabyte log payloads. The FAST parser lets
+the C-accelerated ElementTree parser build the whole response tree and then
+converts it to Python values in a single pass.
+"""
+
+import base64
+import threading
+from enum import Enum, auto
+from xml.etree import ElementTree
+from xmlrpc.client import (Binary, DateTime, Fault, GzipDecodedResponse,
+                           ResponseError, Transport)
+
+
+# the stock Transport reads the response 1KB at a time
+_READ_CHUNK_SIZE = 64 * 1024
+
+
+class ParserType(Enum):
+    STOCK = auto()
+    FAST = auto()
+
+
+def _local_tag(tag):
+    """ Strip the namespace (e.g. {http://ws.apache.org/xmlrpc/namespaces/extensions}nil) """
+
+    return tag.rsplit('}', 1)[-1].rsplit(':', 1)[-1]
+
+
+def _decode_boolean(elem):
+    if elem.text == '0':
+        return False
+    if elem.text == '1':
+        return True
+    raise TypeError('bad boolean value')
+
+
+def _decode_struct(elem):
+    struct = {}
+    for member in elem:
+        name, value = member[0], member[1]
+        if name.tag != 'name':
+            name, value = value, name
+        struct[name.text or ''] = _decode_value(value)
+    return struct
+
+
+def _decode_array(elem):
+    return [_decode_value(value) for value in elem[0]]
+
+
+_DECODERS = {
+    'string': lambda elem: elem.text or '',
+    'int': lambda elem: int(elem.text),
+    'i1': lambda elem: int(elem.text),
+    'i2': lambda elem: int(elem.text),
+    'i4': lambda elem: int(elem.text),
+    'i8': lambda elem: int(elem.text),
+    'biginteger': lambda elem: int(elem.text),
+    'boolean': _decode_boolean,
+    'double': lambda elem: float(elem.text),
+    'float': lambda elem: float(elem.text),
+    'bigdecimal': lambda elem: float(elem.text),
+    'nil': lambda elem: None,
+    'dateTime.iso8601': lambda elem: DateTime(elem.text),
+    'base64': lambda elem: Binary(base64.decodebytes((elem.text or '').encode('ascii'))),
+    'struct': _decode_struct,
+    'array': _decode_array,
+}
+
+
+def _decode_value(elem):
+    """ Convert a <value> element to the corresponding Python object. """
+
+    if not len(elem):
+        # a value without a type element is a string
+        return elem.text or ''
+    typed = elem[0]
+    decoder = _DECODERS.get(typed.tag)
+    if decoder is None:
+        decoder = _DECODERS.get(_local_tag(typed.tag))
+        if decoder is None:
+            raise TypeError('unknown tag {}'.format(typed.tag))
+    return decoder(typed)
+
+
+class FastUnmarshaller:
+    """ Convert a methodResponse tree into the tuple returned by the stock
+    Unmarshaller (or raise the Fault it carries). """
+
+    def __init__(self):
+        self.root = None
+
+    def close(self):
+        if self.root is None or self.root.tag != 'methodResponse' or not len(self.root):
+            raise ResponseError()
+
+        body = self.root[0]
+        if body.tag == 'fault':
+            raise Fault(**_decode_value(body[0]))
+        if body.tag != 'params':
+            raise ResponseError()
+        return tuple(_decode_value(param[0]) for param in body)
+
+    def getmethodname(self):
+        return None
+
+
+class FastParser:
+    """ Incremental C-accelerated parser feeding a FastUnmarshaller. """
+
+    def __init__(self, target):
+        self._target = target
+        self._parser = ElementTree.XMLParser()
+
+    def feed(self, data):
+        self._parser.feed(data)
+
+    def close(self):
+        self._target.root = self._parser.close()
+
+
+class ToskoseTransport(Transport):
+    """ An XML-RPC transport with a selectable response parser.
+
+    If accept_gzip is set, the requests carry "Accept-Encoding: gzip" and
+    gzip-encoded responses are decompressed before parsing (servers that
+    can't compress simply ignore the header).
+
+    The kept-alive connection is per thread, so a transport (and the client
+    using it) can be shared by the request threads.
+    """
+
+    def __init__(self, parser=ParserType.FAST, accept_gzip=True, **kwargs):
+        self._local = threading.local()
+        super(ToskoseTransport, self).__init__(**kwargs)
+        self._parser_type = parser
+        self.accept_gzip_encoding = accept_gzip
+
+    @property
+    def _connection(self):
+        # (host, http.client.HTTPConnection) as in the stock Transport
+        return getattr(self._local, 'connection', (None, None))
+
+    @_connection.setter
+    def _connection(self, connection):
+        self._local.connection = connection
+
+    def getparser(self):
+        if self._parser_type is ParserType.FAST:
+            target = FastUnmarshaller()
+            return FastParser(target), target
+        return super(ToskoseTransport, self).getparser()
+
+    def parse_response(self, response):
+        if hasattr(response, 'getheader') and \
+                response.getheader('Content-Encoding', '') == 'gzip':
+            stream = GzipDecodedResponse(response)
+        else:
+            stream = response
+
+        p, u = self.getparser()
+
+        while True:
+            data = stream.read(_READ_CHUNK_SIZE)
+            if not data:
+                break
+            if self.verbose:
+                print('body:', repr(data))
+            p.feed(data)
+
+        if stream is not response:
+            stream.close()
+        p.close()
+
+        return u.close()
@@ -14,6 +14,32 @@ DEFAULT_HOST = "0.0.0.0"
 DEFAULT_PORT = 10000
 
 DEFAULT_CLIENT_PROTOCOL = 'XMLRPC'
+DEFAULT_CLIENT_XMLRPC_PARSER = 'FAST'
+DEFAULT_CLIENT_COMPRESSION = 'true'
+
+DEFAULT_API_COMPRESSION_MIN_SIZE = 1400
+DEFAULT_API_COMPRESSION_LEVEL = 6
+DEFAULT_API_CACHE_TTL = 2
+DEFAULT_API_BATCH_WORKERS = 8
+DEFAULT_API_CACHE_EVENTS_TTL = 30
+DEFAULT_EVENTS_LISTENER_TIMEOUT = 150
+DEFAULT_EVENTS_STREAM_INTERVAL = 2
+
+DEFAULT_JOBS_WORKERS = 4
+DEFAULT_JOBS_POLL_INTERVAL = 1
+DEFAULT_JOBS_TIMEOUT = 3600
+DEFAULT_JOBS_RETENTION = 3600
+
+DEFAULT_TOSCA_FULL_VALIDATION = 'false'
+DEFAULT_STARTUP_PARALLEL = 'false'
+DEFAULT_STARTUP_WARM_UP = 'true'
+
+DEFAULT_TRACING_EXPORTER = 'none'
+
+DEFAULT_LOGS_LEVEL = 'INFO'
+DEFAULT_LOGS_FORMAT = 'text'
+DEFAULT_LOGS_MAX_BYTES = 10 * 1024 * 1024
+DEFAULT_LOGS_BACKUP_COUNT = 10
 
 def handle_printed_version(mode):
     printed_version = 'Unknown'
@@ -26,12 +52,40 @@ def handle_printed_version(mode):
     return '{}-{}'.format(app.__version__, printed_version)
 
 
+def env_flag(name, default):
+    return os.environ.get(name, default).strip().lower() in ('1', 'true', 'yes', 'on')
+
+
 class AppConfig(object):
     """ Application Configuration
 
     _CLIENT_PROTOCOL: the client protocol used to communicate with the Supervisord instances
+    _CLIENT_XMLRPC_PARSER: the XML-RPC response parser (FAST|STOCK)
+    _CLIENT_COMPRESSION: ask the nodes for gzip-compressed responses
+    _API_COMPRESSION_MIN_SIZE: the size (bytes) below which the API responses are not compressed
+    _API_COMPRESSION_LEVEL: the gzip/deflate compression level of the API responses (1-9)
+    _API_CACHE_TTL: the time (seconds) the responses fetched from the nodes are cached (0 to disable)
+    _API_BATCH_WORKERS: the maximum number of nodes managed concurrently by a batch of lifecycle operations
+    _API_CACHE_EVENTS_TTL: the time (seconds) the responses fetched from a node pushing its events are cached
+    _EVENTS_LISTENER_TIMEOUT: the time (seconds) without events after which the event listener of a node is considered lost
+    _EVENTS_STREAM_INTERVAL: the interval (seconds) between two polls of the nodes while /api/v1/events is streamed
+    _JOBS_WORKERS: the maximum number of lifecycle operations started/stopped concurrently in background
+    _JOBS_POLL_INTERVAL: the interval (seconds) between two checks of the state of a background operation
+    _JOBS_TIMEOUT: the time (seconds) after which a background operation still starting/stopping is failed
+    _JOBS_RETENTION: the time (seconds) a background operation is tracked after it's done
+    _TOSCA_FULL_VALIDATION: always validate the TOSCA manifest with toscaparser (even if stamped)
+    _TOSCA_STAMP_KEY: the key of the HMAC-signed validation stamps (plain SHA-256 stamps if unset)
+    _STARTUP_PARALLEL: parse the TOSCA manifest in a worker process while loading the Toskose config
+        (a fresh interpreter, ~0.3s to start: only worth it for large manifests)
+    _STARTUP_WARM_UP: initialize the manager in background when the app is created (not on the first request)
+    _TRACING_EXPORTER: the sink of the tracing spans (none|file|module:factory)
+    _TRACING_FILE: the file of the spans exported by the file exporter (traces.jsonl in the logs path if unset)
     _LOGS_FILE_NAME: the name of the Toskose Manager's log file
     _LOGS_PATH: the absolute path of the Toskose Manager's log file
+    _LOGS_LEVEL: the minimum level of the logged messages (DEBUG|INFO|WARNING|ERROR)
+    _LOGS_FORMAT: the format of the logs (text|json, a JSON object per line)
+    _LOGS_MAX_BYTES: the size (bytes) at which the log file is rotated
+    _LOGS_BACKUP_COUNT: the number of rotated log files kept
     _APP_CONFIG_NAME: the name of the Toskose Manager's configuration file
     _APP_CONFIG_PATH: the absolute path of the Toskose Manager's configuration file
     _APP_MODE: the execution configuration of Toskose Manager (development|testing|production)
@@ -39,9 +93,41 @@ class AppConfig(object):
     """
 
     _CLIENT_PROTOCOL = os.environ.get('TOSKOSE_CLIENT_PROTOCOL', DEFAULT_CLIENT_PROTOCOL)
+    _CLIENT_XMLRPC_PARSER = os.environ.get('TOSKOSE_CLIENT_XMLRPC_PARSER', DEFAULT_CLIENT_XMLRPC_PARSER)
+    _CLIENT_COMPRESSION = env_flag('TOSKOSE_CLIENT_COMPRESSION', DEFAULT_CLIENT_COMPRESSION)
+
+    _API_COMPRESSION_MIN_SIZE = int(os.environ.get(
+        'TOSKOSE_API_COMPRESSION_MIN_SIZE', DEFAULT_API_COMPRESSION_MIN_SIZE))
+    _API_COMPRESSION_LEVEL = int(os.environ.get(
+        'TOSKOSE_API_COMPRESSION_LEVEL', DEFAULT_API_COMPRESSION_LEVEL))
+    _API_CACHE_TTL = float(os.environ.get('TOSKOSE_API_CACHE_TTL', DEFAULT_API_CACHE_TTL))
+    _API_BATCH_WORKERS = int(os.environ.get('TOSKOSE_API_BATCH_WORKERS', DEFAULT_API_BATCH_WORKERS))
+    _API_CACHE_EVENTS_TTL = float(os.environ.get('TOSKOSE_API_CACHE_EVENTS_TTL', DEFAULT_API_CACHE_EVENTS_TTL))
+    _EVENTS_LISTENER_TIMEOUT = float(os.environ.get(
+        'TOSKOSE_EVENTS_LISTENER_TIMEOUT', DEFAULT_EVENTS_LISTENER_TIMEOUT))
+    _EVENTS_STREAM_INTERVAL = float(os.environ.get(
+        'TOSKOSE_EVENTS_STREAM_INTERVAL', DEFAULT_EVENTS_STREAM_INTERVAL))
+
+    _JOBS_WORKERS = int(os.environ.get('TOSKOSE_JOBS_WORKERS', DEFAULT_JOBS_WORKERS))
+    _JOBS_POLL_INTERVAL = float(os.environ.get('TOSKOSE_JOBS_POLL_INTERVAL', DEFAULT_JOBS_POLL_INTERVAL))
+    _JOBS_TIMEOUT = float(os.environ.get('TOSKOSE_JOBS_TIMEOUT', DEFAULT_JOBS_TIMEOUT))
+    _JOBS_RETENTION = float(os.environ.get('TOSKOSE_JOBS_RETENTION', DEFAULT_JOBS_RETENTION))
+
+    _TOSCA_FULL_VALIDATION = env_flag('TOSKOSE_TOSCA_FULL_VALIDATION', DEFAULT_TOSCA_FULL_VALIDATION)
+    _TOSCA_STAMP_KEY = os.environ.get('TOSKOSE_TOSCA_STAMP_KEY')
+
+    _STARTUP_PARALLEL = env_flag('TOSKOSE_STARTUP_PARALLEL', DEFAULT_STARTUP_PARALLEL)
+    _STARTUP_WARM_UP = env_flag('TOSKOSE_STARTUP_WARM_UP', DEFAULT_STARTUP_WARM_UP)
+
+    _TRACING_EXPORTER = os.environ.get('TOSKOSE_TRACING_EXPORTER', DEFAULT_TRACING_EXPORTER)
+    _TRACING_FILE = os.environ.get('TOSKOSE_TRACING_FILE')
 
     _LOGS_CONFIG_NAME = 'logging.conf'
     _LOGS_PATH = os.environ.get('TOSKOSE_LOGS_PATH', DEFAULT_LOGS_PATH)
+    _LOGS_LEVEL = os.environ.get('TOSKOSE_LOGS_LEVEL', DEFAULT_LOGS_LEVEL).strip().upper()
+    _LOGS_FORMAT = os.environ.get('TOSKOSE_LOGS_FORMAT', DEFAULT_LOGS_FORMAT)
+    _LOGS_MAX_BYTES = int(os.environ.get('TOSKOSE_LOGS_MAX_BYTES', DEFAULT_LOGS_MAX_BYTES))
+    _LOGS_BACKUP_COUNT = int(os.environ.get('TOSKOSE_LOGS_BACKUP_COUNT', DEFAULT_LOGS_BACKUP_COUNT))
 
     _APP_MODE = os.environ.get('TOSKOSE_APP_MODE', DEFAULT_APP_MODE)
     _APP_VERSION = handle_printed_version(_APP_MODE)
@@ -66,4 +66,11 @@ class MalformedConfigurationError(BaseError):
     """ Raised when the configuration file is malformed or corrupted. """
 
     def __init__(self, message):
-        super().__init__(message)
\ No newline at end of file
+        super().__init__(message)
+
+
+class AuthenticationError(BaseError):
+    """ Raised when a request carries missing or wrong credentials. """
+
+    def __init__(self, message):
+        super().__init__(message)
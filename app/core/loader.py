@@ -1,5 +1,7 @@
+import collections
+import hashlib
 import os
-import ruamel.yaml
+import threading
 
 from app.core.logging import LoggingFacility
 from app.core.exceptions import ValidationError
@@ -9,20 +11,137 @@ from app.core.exceptions import MalformedConfigurationError
 logger = LoggingFacility.get_instance().get_logger()
 
 
+_yaml = None
+
+
+def _yaml_loader():
+    """ The ruamel.yaml module and its fastest safe loader, imported on first use
+    (not needed to start the app). """
+
+    global _yaml
+    if _yaml is None:
+        import ruamel.yaml
+        try:
+            # C-accelerated (libyaml)
+            loader = ruamel.yaml.CSafeLoader
+        except AttributeError:
+            loader = ruamel.yaml.SafeLoader
+        _yaml = (ruamel.yaml, loader)
+    return _yaml
+
+
+# the maximum number of parsed documents kept (the least recently used are dropped)
+MAX_CACHED_DOCUMENTS = 32
+
+
+class _DocumentCache:
+    """ The parsed documents, keyed by path (mtime and size) and by content hash.
+
+    An unchanged file costs a stat call, a copy of an already parsed file
+    (e.g. the configurations copied in a temporary dir) costs a hash.
+
+    The paths that don't exist anymore (e.g. the temporary dirs of the
+    previous loads) are dropped when a path is added, then the documents no
+    path refers to, and at most MAX_CACHED_DOCUMENTS documents are kept.
+    """
+
+    def __init__(self, max_documents=MAX_CACHED_DOCUMENTS):
+        self._lock = threading.Lock()
+        self._max_documents = max_documents
+        # path -> (mtime_ns, size, digest)
+        self._by_path = {}
+        # digest -> document (the least recently used first)
+        self._by_digest = collections.OrderedDict()
+
+    def get(self, path, stat):
+        with self._lock:
+            entry = self._by_path.get(path)
+            if entry is not None and entry[:2] == (stat.st_mtime_ns, stat.st_size) \
+                    and entry[2] in self._by_digest:
+                self._by_digest.move_to_end(entry[2])
+                return self._by_digest[entry[2]]
+        return None
+
+    def get_by_digest(self, path, stat, digest):
+        with self._lock:
+            if digest in self._by_digest:
+                self._add_path(path, stat, digest)
+                return self._by_digest[digest]
+        return None
+
+    def put(self, path, stat, digest, document):
+        with self._lock:
+            self._by_digest[digest] = document
+            self._add_path(path, stat, digest)
+
+    def _add_path(self, path, stat, digest):
+        self._by_path[path] = (stat.st_mtime_ns, stat.st_size, digest)
+        self._by_digest.move_to_end(digest)
+
+        for other in [other for other in self._by_path if other != path and not os.path.exists(other)]:
+            del self._by_path[other]
+        referenced = {entry[2] for entry in self._by_path.values()}
+        for other in [other for other in self._by_digest if other not in referenced]:
+            del self._by_digest[other]
+
+        while len(self._by_digest) > self._max_documents:
+            dropped, _ = self._by_digest.popitem(last=False)
+            for other in [other for other, entry in self._by_path.items() if entry[2] == dropped]:
+                del self._by_path[other]
+
+    def clear(self):
+        with self._lock:
+            self._by_path.clear()
+            self._by_digest.clear()
+
+
+_cache = _DocumentCache()
+
+
 class Loader:
     def __init__(self):
         pass
 
-    def load(self, path, **kwargs):
-        """ Load the configuration from a given file. """
+    @staticmethod
+    def clear_cache():
+        _cache.clear()
+
+    def load(self, path, cache=True, **kwargs):
+        """ Load the configuration from a given file.
+
+        The parsed documents are cached and shared, so they must be treated as
+        read-only. Use cache=False for a private copy (e.g. to update it in place).
+        """
 
         if not os.path.exists(path):
             raise ValueError('The given path {} doesn\'t exists.'.format(path))
 
-        logger.debug('Loading data from {}'.format(path))
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        if cache:
+            document = _cache.get(path, stat)
+            if document is not None:
+                logger.debug('Loaded (cached)', path=path)
+                return document
+
+        logger.debug('Loading data', path=path)
+        with open(path, 'rb') as f:
+            content = f.read()
+
+        if cache:
+            digest = hashlib.sha256(content).hexdigest()
+            document = _cache.get_by_digest(path, stat, digest)
+            if document is not None:
+                logger.debug('Loaded (cached, same content)', path=path)
+                return document
+
+        yaml, yaml_loader = _yaml_loader()
         try:
-            with open(path, 'r') as f:
-                return ruamel.yaml.load(f, Loader=ruamel.yaml.Loader)
-        except ruamel.yaml.error.YAMLError as err:
-            logger.exception('Failed to load {}'.format(path))
-            raise MalformedConfigurationError(os.path.basename(path)) from err
\ No newline at end of file
+            document = yaml.load(content, Loader=yaml_loader)
+        except yaml.error.YAMLError as err:
+            logger.exception('Failed to load', path=path)
+            raise MalformedConfigurationError(os.path.basename(path)) from err
+
+        if cache and document is not None:
+            _cache.put(path, stat, digest, document)
+        return document
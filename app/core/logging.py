@@ -1,15 +1,162 @@
+import atexit
+import contextlib
+import json
 import os
+import queue
 import sys
 from pathlib import Path
 import time
 import datetime
 import logging
+import logging.handlers
 
 from app.config import AppConfig
+from app.core import tracing
+
+
+def _plain(value):
+    """ A field value that can be written as JSON (and not changed by the caller
+    while the record is queued). """
+
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, (list, tuple, set)):
+        return [_plain(item) for item in value]
+    if isinstance(value, dict):
+        return {str(key): _plain(item) for key, item in value.items()}
+    return str(value)
+
+
+class StructuredLogger:
+    """ The logger of the manager (see LoggingFacility.get_logger).
+
+    The messages take key-value fields besides the (printf-style) arguments,
+    and nothing is formatted if the level is disabled:
+
+        logger.debug('Parsing node', node=node.name, type=node.type)
+        logger.warn('Batch failed on node %s', node_id, error=err)
+
+    The fields are appended to the text logs (key=value), or written as
+    JSON keys (TOSKOSE_LOGS_FORMAT=json), with the ids of the current
+    tracing span (if any).
+    """
+
+    def __init__(self, logger):
+        self._logger = logger
+
+    @property
+    def logger(self):
+        return self._logger
+
+    def isEnabledFor(self, level):
+        return self._logger.isEnabledFor(level)
+
+    def log(self, level, msg, *args, **fields):
+        if self._logger.isEnabledFor(level):
+            self._log(level, msg, args, fields)
+
+    def _log(self, level, msg, args, fields):
+        exc_info = fields.pop('exc_info', None)
+        span = tracing.current_span()
+        if span is not None:
+            fields['trace_id'] = span.trace_id
+            fields['span_id'] = span.span_id
+        self._logger.log(level, msg, *args, exc_info=exc_info, extra={'fields': fields})
+
+    def debug(self, msg, *args, **fields):
+        if self._logger.isEnabledFor(logging.DEBUG):
+            self._log(logging.DEBUG, msg, args, fields)
+
+    def info(self, msg, *args, **fields):
+        if self._logger.isEnabledFor(logging.INFO):
+            self._log(logging.INFO, msg, args, fields)
+
+    def warning(self, msg, *args, **fields):
+        if self._logger.isEnabledFor(logging.WARNING):
+            self._log(logging.WARNING, msg, args, fields)
+
+    warn = warning
+
+    def error(self, msg, *args, **fields):
+        if self._logger.isEnabledFor(logging.ERROR):
+            self._log(logging.ERROR, msg, args, fields)
+
+    def exception(self, msg, *args, exc_info=True, **fields):
+        if self._logger.isEnabledFor(logging.ERROR):
+            self._log(logging.ERROR, msg, args, dict(fields, exc_info=exc_info))
+
+    def critical(self, msg, *args, **fields):
+        if self._logger.isEnabledFor(logging.CRITICAL):
+            self._log(logging.CRITICAL, msg, args, fields)
+
+
+class TextFormatter(logging.Formatter):
+    """ The message followed by its fields (key=value). """
+
+    def formatMessage(self, record):
+        message = super().formatMessage(record)
+        fields = getattr(record, 'fields', None)
+        if not fields:
+            return message
+        return message + ' ' + ' '.join(
+            '{}={}'.format(key, TextFormatter._value(value)) for key, value in fields.items())
+
+    @staticmethod
+    def _value(value):
+        if isinstance(value, str):
+            return value if value and not any(c in value for c in ' ="\n') else json.dumps(value)
+        return json.dumps(value)
+
+
+class JsonFormatter(logging.Formatter):
+    """ A JSON object per record (the fields are keys of the object). """
+
+    def format(self, record):
+        entry = {
+            'time': self.formatTime(record),
+            'level': record.levelname,
+            'message': record.getMessage(),
+        }
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry['exception'] = record.exc_text
+        for key, value in (getattr(record, 'fields', None) or {}).items():
+            entry.setdefault(key, value)
+        return json.dumps(entry, default=str)
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """ Queue the records with their message, exception and fields already
+    rendered (the formatters run in the listener thread). """
+
+    def prepare(self, record):
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        fields = getattr(record, 'fields', None)
+        if fields:
+            record.fields = {key: _plain(value) for key, value in fields.items()}
+        return record
+
+
+class _CapturingHandler(_QueueHandler):
+    """ Collect the prepared records in a list (see LoggingFacility.captured). """
+
+    def enqueue(self, record):
+        self.queue.append(record)
 
 
 class LoggingFacility:
-    """ A singleton containing the logging settings """
+    """ A singleton containing the logging settings
+
+    The records are not written by the threads logging them (e.g. the request
+    threads): they are queued (QueueHandler) and written to the log file and to
+    stderr by a background thread (QueueListener). The level is checked by the
+    logger, so the filtered out messages are never formatted.
+    """
 
     __instance = None
 
@@ -29,11 +176,19 @@ class LoggingFacility:
             LoggingFacility.__instance = self
 
         self._logger = logging.getLogger(__name__)
-        self._logger.setLevel(logging.DEBUG)
+        self._structured_logger = StructuredLogger(self._logger)
 
         """ Formatter """
-        self.formatter = logging.Formatter('%(asctime)s %(levelname)s: %(message)s')
-            # [in %(pathname)s:%(lineno)d]')
+        if AppConfig._LOGS_FORMAT.strip().lower() == 'json':
+            self.formatter = JsonFormatter()
+        else:
+            self.formatter = TextFormatter('%(asctime)s %(levelname)s: %(message)s')
+                # [in %(pathname)s:%(lineno)d]')
+
+        """ Stream Handler """
+        stream_handler = logging.StreamHandler()
+        stream_handler.setFormatter(self.formatter)
+        self._handlers = [stream_handler]
 
         """ Output path """
         logs_path = AppConfig._LOGS_PATH
@@ -41,29 +196,61 @@ class LoggingFacility:
             """ logs path not set -- use default """
             logs_path = self.__create_default_log_path()
 
-        if not os.path.exists(logs_path):
-            self._logger.warn(
-                'Failed to setup logging: {} is not available. Logging will NOT be stored.'.format(
-                    logs_path))
-        else:
+        logs_available = os.path.exists(logs_path)
+        if logs_available:
 
             now = datetime.datetime.now()
             logs_path = os.path.join(logs_path, ('log_' + now.strftime("%Y-%m-%d") + '.log'))
 
             """ File Handler """
-            self._file_handler = logging.handlers.RotatingFileHandler(
+            file_handler = logging.handlers.RotatingFileHandler(
                 logs_path,
-                maxBytes=10240,
-                backupCount=10)
+                maxBytes=AppConfig._LOGS_MAX_BYTES,
+                backupCount=AppConfig._LOGS_BACKUP_COUNT)
+            file_handler.setFormatter(self.formatter)
+            self._handlers.append(file_handler)
+
+        """ Queue Handler (the handlers above are run by the listener thread) """
+        self._queue = queue.Queue(-1)
+        self._queue_handler = _QueueHandler(self._queue)
+        self._logger.addHandler(self._queue_handler)
+        self._listener = None
+        self.__start_listener()
+
+        # flush the queued records on exit
+        atexit.register(self.__stop_listener)
+        # the listener thread doesn't survive a fork (e.g. a process forked by
+        # the application), and the queue may be locked in the child
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self.__restart_listener)
+
+        level = logging.getLevelName(AppConfig._LOGS_LEVEL)
+        if not isinstance(level, int):
+            self._structured_logger.warning('Invalid logs level, using INFO', level=AppConfig._LOGS_LEVEL)
+            level = logging.INFO
+        self._logger.setLevel(level)
 
-            self._file_handler.setFormatter(self.formatter)
-            self._file_handler.setLevel(logging.INFO)
+        if not logs_available:
+            self._structured_logger.warning(
+                'Failed to setup logging: the logs path is not available. Logging will NOT be stored.',
+                path=logs_path)
 
-            streamHandler = logging.StreamHandler()
-            streamHandler.setFormatter(self.formatter)
+    def __start_listener(self):
+        self._listener = logging.handlers.QueueListener(
+            self._queue, *self._handlers, respect_handler_level=True)
+        self._listener.start()
 
-            self._logger.addHandler(self._file_handler)
-            self._logger.addHandler(streamHandler)
+    def __stop_listener(self):
+        if self._listener is not None:
+            self._listener.stop()
+            self._listener = None
+
+    def __restart_listener(self):
+        self._queue = queue.Queue(-1)
+        self._queue_handler.queue = self._queue
+        for handler in [self._queue_handler] + self._handlers:
+            handler.createLock()
+        self.__start_listener()
 
     def __create_default_log_path(self):
 
@@ -74,8 +261,36 @@ class LoggingFacility:
 
         return logs_path
 
+    @contextlib.contextmanager
+    def captured(self):
+        """ Collect the records instead of writing them (e.g. in a worker
+        process, to send them back to the parent, see replay).
+
+        Yields the list of the (picklable) records.
+        """
+
+        records = []
+        handler = _CapturingHandler(records)
+        self._logger.removeHandler(self._queue_handler)
+        self._logger.addHandler(handler)
+        try:
+            yield records
+        finally:
+            self._logger.removeHandler(handler)
+            self._logger.addHandler(self._queue_handler)
+
+    def replay(self, records):
+        """ Write the records captured by another process. """
+
+        for record in records:
+            self._logger.handle(record)
+
     def get_logger(self):
-        return self._logger
+        """ The (structured) logger of the manager. """
+
+        return self._structured_logger
 
     def get_handler(self):
-        return self._file_handler
+        """ The handler queuing the records (e.g. for the Flask logger). """
+
+        return self._queue_handler
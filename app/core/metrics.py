@@ -0,0 +1,255 @@
+"""
+Metrics of the manager, exposed in the Prometheus text format (see /metrics).
+
+The counters and the histograms are updated on the hot paths (e.g. every
+supervisord RPC), so every thread updates its own cells (shards) without
+locking: the lock is only taken when a thread updates a metric for the first
+time, when the thread ends (its cells are folded into the base cells) and
+when the metrics are collected (the cells of all the threads are summed up).
+"""
+
+import bisect
+import math
+import threading
+import weakref
+
+
+# seconds, from a cached response to a slow node
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _labels(names, values, extra=None):
+    pairs = list(zip(names, values))
+    if extra is not None:
+        pairs.append(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join('{}="{}"'.format(name, _escape(value)) for name, value in pairs) + '}'
+
+
+def _number(value):
+    if value == math.inf:
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Shard:
+    """ The cells of a thread (a weakly referenceable holder). """
+
+    __slots__ = ('cells', '__weakref__')
+
+    def __init__(self):
+        self.cells = {}
+
+
+class _Metric:
+    """ A metric whose cells (labels -> value) are kept per thread.
+
+    The cells of a thread are folded into the base cells when the thread
+    ends, so the shards are only those of the running threads.
+    """
+
+    type = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._local = threading.local()
+        # reentrant: a shard may be retired by the thread holding the lock
+        self._lock = threading.RLock()
+        self._base = {}
+        self._shards = {}
+
+    @staticmethod
+    def _merge(total, value):
+        raise NotImplementedError
+
+    def _cells(self):
+        try:
+            return self._local.shard.cells
+        except AttributeError:
+            shard = self._local.shard = _Shard()
+            with self._lock:
+                self._shards[id(shard.cells)] = shard.cells
+            # the thread-local shard is released when the thread ends
+            weakref.finalize(shard, self._retire, shard.cells)
+            return shard.cells
+
+    def _retire(self, cells):
+        with self._lock:
+            self._shards.pop(id(cells), None)
+            for labels, value in cells.items():
+                self._base[labels] = self._merge(self._base.get(labels), value)
+
+    def _merged(self):
+        with self._lock:
+            merged = {labels: self._merge(None, value) for labels, value in self._base.items()}
+            for cells in self._shards.values():
+                # a copy (atomic): the owner thread may be adding cells
+                for labels, value in cells.copy().items():
+                    merged[labels] = self._merge(merged.get(labels), value)
+        return merged
+
+    def header(self):
+        return ['# HELP {} {}'.format(self.name, self.documentation),
+                '# TYPE {} {}'.format(self.name, self.type)]
+
+
+class Counter(_Metric):
+
+    type = 'counter'
+
+    def inc(self, *labelvalues, amount=1):
+        cells = self._cells()
+        cells[labelvalues] = cells.get(labelvalues, 0) + amount
+
+    @staticmethod
+    def _merge(total, value):
+        return (total or 0) + value
+
+    def values(self):
+        """ labels -> value (of all the threads) """
+
+        return self._merged()
+
+    def collect(self):
+        lines = self.header()
+        for labels, value in sorted(self.values().items()):
+            lines.append('{}{} {}'.format(self.name, _labels(self.labelnames, labels), _number(value)))
+        return lines
+
+
+class Histogram(_Metric):
+    """ The cells are [bucket counts..., +Inf count, sum]. """
+
+    type = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, *labelvalues):
+        cells = self._cells()
+        cell = cells.get(labelvalues)
+        if cell is None:
+            cell = cells[labelvalues] = [0] * (len(self.buckets) + 2)
+        cell[bisect.bisect_left(self.buckets, value)] += 1
+        cell[-1] += value
+
+    @staticmethod
+    def _merge(total, cell):
+        if total is None:
+            return list(cell)
+        return [a + b for a, b in zip(total, cell)]
+
+    def collect(self):
+        lines = self.header()
+        for labels, cell in sorted(self._merged().items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), cell):
+                cumulative += count
+                lines.append('{}_bucket{} {}'.format(
+                    self.name, _labels(self.labelnames, labels, ('le', _number(bound))), cumulative))
+            lines.append('{}_sum{} {}'.format(self.name, _labels(self.labelnames, labels), _number(cell[-1])))
+            lines.append('{}_count{} {}'.format(self.name, _labels(self.labelnames, labels), cumulative))
+        return lines
+
+
+class Gauge(_Metric):
+    """ A value computed when the metrics are collected.
+
+    Args:
+        function: returns the value, or a dict labels -> value (None to omit it).
+    """
+
+    type = 'gauge'
+
+    def __init__(self, name, documentation, function, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._function = function
+
+    def collect(self):
+        lines = self.header()
+        values = self._function()
+        if values is None:
+            return lines
+        if not isinstance(values, dict):
+            values = {(): values}
+        for labels, value in sorted(values.items()):
+            lines.append('{}{} {}'.format(self.name, _labels(self.labelnames, labels), _number(value)))
+        return lines
+
+
+class Registry:
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics = {}
+
+    def register(self, metric):
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError('Metric {} already registered'.format(metric.name))
+            self._metrics[metric.name] = metric
+        return metric
+
+    def render(self):
+        """ All the metrics in the Prometheus text format. """
+
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.collect())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+
+def counter(name, documentation, labelnames=()):
+    return REGISTRY.register(Counter(name, documentation, labelnames))
+
+
+def histogram(name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+    return REGISTRY.register(Histogram(name, documentation, labelnames, buckets))
+
+
+def gauge(name, documentation, function, labelnames=()):
+    return REGISTRY.register(Gauge(name, documentation, function, labelnames))
+
+
+""" The metrics of the manager """
+
+HTTP_REQUEST_DURATION = histogram(
+    'toskose_http_request_duration_seconds',
+    'The time spent serving the API requests (until the response is returned).',
+    ('method', 'route', 'status'))
+
+RPC_DURATION = histogram(
+    'toskose_rpc_duration_seconds',
+    'The duration of the supervisord RPCs.',
+    ('node', 'method'))
+
+RPC_ERRORS = counter(
+    'toskose_rpc_errors_total',
+    'The failed supervisord RPCs.',
+    ('node', 'method', 'error'))
+
+MODEL_LOAD_DURATION = histogram(
+    'toskose_model_load_duration_seconds',
+    'The duration of the loads (startup) and reloads of the configuration and of the model.',
+    ('kind',),
+    buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0))
+
+API_CACHE_REQUESTS = counter(
+    'toskose_api_cache_requests_total',
+    'The lookups of the API responses cache.',
+    ('cache', 'result'))
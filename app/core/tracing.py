@@ -0,0 +1,258 @@
+"""
+Tracing of the API requests, down to the supervisord RPCs.
+
+A trace is a tree of spans (e.g. the request, the NodeService call, the
+client lookup, the reachable() probe, each RPC), timed and exported when they
+end. The current span is kept in a context variable, so the nested spans find
+their parent without passing it around; a request continues the trace of the
+caller if it carries a W3C traceparent header.
+
+The spans are recorded only if an exporter is set (see configure): otherwise
+span() returns a shared no-op span.
+
+    with tracing.span('rpc get_process_info', node='maven') as span:
+        span.set('process', name)
+        ...
+"""
+
+import contextvars
+import importlib
+import json
+import os
+import re
+import threading
+import time
+
+from app.config import AppConfig
+
+
+_TRACEPARENT = re.compile(r'^([0-9a-f]{2})-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$')
+
+_current = contextvars.ContextVar('toskose_span', default=None)
+_exporter = None
+
+
+def _new_id(size):
+    return os.urandom(size).hex()
+
+
+def parse_traceparent(header):
+    """ The (trace id, parent span id) of a traceparent header, None if invalid. """
+
+    match = _TRACEPARENT.match((header or '').strip().lower())
+    if match is None:
+        return None
+    version, trace_id, parent_id, _ = match.groups()
+    if version == 'ff' or trace_id == '0' * 32 or parent_id == '0' * 16:
+        return None
+    return trace_id, parent_id
+
+
+class Span:
+    """ A timed operation of a trace (a context manager making it the current span). """
+
+    __slots__ = ('name', 'trace_id', 'span_id', 'parent_id', 'attributes',
+                 'start', 'duration', 'error', '_counter', '_token')
+
+    def __init__(self, name, trace_id, parent_id=None, attributes=None):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = _new_id(8)
+        self.parent_id = parent_id
+        self.attributes = attributes or {}
+        self.start = time.time()
+        self.duration = None
+        self.error = None
+        self._counter = time.perf_counter()
+        self._token = None
+
+    @property
+    def traceparent(self):
+        return '00-{}-{}-01'.format(self.trace_id, self.span_id)
+
+    def set(self, key, value):
+        self.attributes[key] = value
+
+    def activate(self):
+        """ Make it the current span (until deactivate). """
+
+        self._token = _current.set(self)
+        return self
+
+    def deactivate(self):
+        if self._token is not None:
+            _current.reset(self._token)
+            self._token = None
+
+    def end(self, error=None):
+        """ Stop the span and export it (once). """
+
+        if self.duration is not None:
+            return
+        self.duration = (time.perf_counter() - self._counter) * 1000
+        if error is not None:
+            self.error = '{}: {}'.format(type(error).__name__, error)
+        exporter = _exporter
+        if exporter is not None:
+            try:
+                exporter.export(self)
+            except Exception:
+                # tracing never fails the traced operation
+                pass
+
+    def to_dict(self):
+        return {
+            'name': self.name,
+            'trace_id': self.trace_id,
+            'span_id': self.span_id,
+            'parent_id': self.parent_id,
+            'start': self.start,
+            'duration_ms': self.duration,
+            'error': self.error,
+            'attributes': self.attributes,
+        }
+
+    def __enter__(self):
+        return self.activate()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.deactivate()
+        self.end(exc)
+        return False
+
+
+class _NoSpan:
+    """ The span returned when tracing is disabled. """
+
+    __slots__ = ()
+
+    traceparent = None
+
+    def set(self, key, value):
+        pass
+
+    def activate(self):
+        return self
+
+    def deactivate(self):
+        pass
+
+    def end(self, error=None):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NO_SPAN = _NoSpan()
+
+
+def enabled():
+    return _exporter is not None
+
+
+def current_span():
+    return _current.get()
+
+
+def span(name, *, traceparent=None, **attributes):
+    """ A new span, child of the current one (or of the traceparent header,
+    or the root of a new trace). Use it as a context manager, or activate()
+    and end() it. """
+
+    if _exporter is None:
+        return _NO_SPAN
+    parent = _current.get()
+    if parent is not None:
+        return Span(name, parent.trace_id, parent.span_id, attributes)
+    context = parse_traceparent(traceparent)
+    if context is not None:
+        return Span(name, context[0], context[1], attributes)
+    return Span(name, _new_id(16), None, attributes)
+
+
+def traced(name):
+    """ Decorator tracing every call of a function. """
+
+    def decorator(func):
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def bind(func):
+    """ Run func (e.g. in a worker thread) as a child of the current span. """
+
+    parent = _current.get()
+    if parent is None:
+        return func
+
+    def wrapper(*args, **kwargs):
+        token = _current.set(parent)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _current.reset(token)
+    return wrapper
+
+
+class SpanExporter:
+    """ The sink of the ended spans (called by the thread ending the span). """
+
+    def export(self, span):
+        raise NotImplementedError
+
+    def shutdown(self):
+        pass
+
+
+class FileExporter(SpanExporter):
+    """ Append the spans to a file, one JSON object per line (for offline analysis). """
+
+    def __init__(self, path):
+        self._lock = threading.Lock()
+        self._file = open(path, 'a', buffering=1)
+
+    def export(self, span):
+        line = json.dumps(span.to_dict(), default=str) + '\n'
+        with self._lock:
+            self._file.write(line)
+
+    def shutdown(self):
+        with self._lock:
+            self._file.close()
+
+
+def set_exporter(exporter):
+    """ Set the sink of the spans (None to disable the tracing). """
+
+    global _exporter
+    previous, _exporter = _exporter, exporter
+    if previous is not None and previous is not exporter:
+        previous.shutdown()
+
+
+def configure():
+    """ Set the exporter of the configuration (TOSKOSE_TRACING_EXPORTER):
+
+    - none: tracing disabled
+    - file: a FileExporter writing to TOSKOSE_TRACING_FILE
+    - module:name: a callable building the exporter (e.g. a custom sink)
+    """
+
+    name = AppConfig._TRACING_EXPORTER.strip()
+    if name.lower() in ('', 'none'):
+        set_exporter(None)
+    elif name.lower() == 'file':
+        path = AppConfig._TRACING_FILE or os.path.join(AppConfig._LOGS_PATH, 'traces.jsonl')
+        set_exporter(FileExporter(path))
+    else:
+        module, _, attribute = name.partition(':')
+        if not attribute:
+            raise ValueError('Invalid tracing exporter: {}'.format(name))
+        set_exporter(getattr(importlib.import_module(module), attribute)())
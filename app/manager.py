@@ -1,24 +1,25 @@
 import os
 import shutil
-import socket
-import sys
 import tempfile
-import copy
-from distutils.dir_util import copy_tree
-from enum import Enum, auto
-
-from yaml.tokens import DirectiveToken
+import threading
+import time
+from contextlib import contextmanager
+from enum import Enum
+from types import MappingProxyType
 
 from app.client.client import ProtocolType, ToskoseClientFactory
 from app.config import AppConfig, ToskoseConfig
+from app.core import tracing
 from app.core.commons import CommonErrorMessages
 from app.core.exceptions import (ConfigurationError, FatalError, ClientConnectionError,
                                  MalformedConfigurationError, ValidationError,
                                  ResourceNotFoundError)
 from app.core.loader import Loader
 from app.core.logging import LoggingFacility
+from app.core.metrics import MODEL_LOAD_DURATION, gauge
 from app.tosca.parser import ToscaParser
 from app.tosca.model.artifacts import ToskosedImage
+from app.tosca.model.nodes import Container
 from app.validation import validate_configuration
 
 
@@ -35,13 +36,17 @@ class ConfigType(Enum):
 class ToskoseManager():
     """ A singleton containing the application settings """
     __instance = None
+    __instance_lock = threading.Lock()
 
     @staticmethod
     def get_instance():
         """ The static access method """
 
         if ToskoseManager.__instance == None:
-            ToskoseManager()
+            # the requests are served by concurrent threads
+            with ToskoseManager.__instance_lock:
+                if ToskoseManager.__instance == None:
+                    ToskoseManager()
 
         return ToskoseManager.__instance
 
@@ -55,7 +60,23 @@ class ToskoseManager():
         self._config = None
         self._model = None
 
-        self.initialization()
+        # read-only lookup tables built from the model (see _build_indexes)
+        self._containers = MappingProxyType({})
+        self._components = MappingProxyType({})
+        self._operations = MappingProxyType({})
+        # the (shared) client of each configured node
+        self._clients = MappingProxyType({})
+
+        # the duration (ms) of each phase of the last initialization
+        self.startup_timings = {}
+        # incremented on every (re-)initialization (e.g. to invalidate the cached responses)
+        self.model_version = 0
+
+        # the model is built on first use (see ensure_initialized), not when
+        # the manager (or the app) is created
+        self._initialized = False
+        self._init_lock = threading.RLock()
+        self._startup_error = None
                     
     @staticmethod
     def _load_configurations(config_dir, config_name=None):
@@ -71,10 +92,10 @@ class ToskoseManager():
                     configs.append(fname)
 
             if len(configs) > 1:
-                logger.warn('Multiple configurations detected in {}'.format(config_dir))
-                logger.warn('No configuration specified, selected the first one {}'.format(configs[0]))
+                logger.warn('Multiple configurations detected', path=config_dir)
+                logger.warn('No configuration specified, selected the first one', config=configs[0])
             elif len(configs) == 1:
-                logger.info('Detected configuration {}'.format(fname))
+                logger.info('Detected configuration', config=configs[0])
             else:
                 logger.error('No configurations detected. Abort.')
                 raise FatalError('A fatal error is occurred. See logs for further details.')
@@ -88,13 +109,28 @@ class ToskoseManager():
 
         return config_path
 
+    @staticmethod
     def _cross_validation(config, manifest):
         """ Validate the configuration file against the TOSCA model. 
         
         e.g. check if the nodes are the same
         """
-        pass   
 
+        nodes = config.get('nodes') or {}
+        containers = {container.name for container in manifest.containers}
+
+        unknown = [node_id for node_id in nodes if node_id not in containers]
+        if unknown:
+            logger.error('Nodes of the Toskose config that are not container nodes of the TOSCA manifest',
+                         nodes=unknown)
+            raise ConfigurationError('The Toskose config doesn\'t match the TOSCA manifest')
+
+        for container in manifest.containers:
+            if container.hosted and container.name not in nodes:
+                logger.warn('A node hosting software components is not in the Toskose config',
+                            node=container.name)
+
+    @staticmethod
     def _merge_imports(manifest_dir):
         imports_dir = os.path.join(manifest_dir, 'imports')
         if not os.path.exists(imports_dir):
@@ -108,6 +144,27 @@ class ToskoseManager():
     def _load(self, config_type, config_dir=None, config_name=None):
         """ Load a configuration file """
 
+        return ToskoseManager._load_file(config_type, config_dir, config_name, self._loader)
+
+    @staticmethod
+    @contextmanager
+    def _working_dir(config_type, config_dir):
+        """ The manifest is handled in a temporary copy (its imports are merged),
+        the config is read in place (the loader caches the unchanged files). """
+
+        if config_type != ConfigType.TOSCA_MANIFEST:
+            yield config_dir
+            return
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            shutil.copytree(config_dir, os.path.join(tmp_dir, config_type.value))
+            yield os.path.join(tmp_dir, os.path.basename(config_dir))
+
+    @staticmethod
+    def _load_file(config_type, config_dir=None, config_name=None, loader=None):
+        """ Load a configuration file (it doesn't need a manager instance,
+        so it can run in a worker process). """
+
         if config_dir is None:
             if config_type == ConfigType.TOSKOSE_CONFIG:
                 config_dir = ToskoseConfig.APP_CONFIG_PATH
@@ -119,9 +176,7 @@ class ToskoseManager():
         if not os.path.exists(config_dir):
             raise FatalError('The dir {} doesn\'t exist.'.format(config_dir))
 
-        with tempfile.TemporaryDirectory() as tmp_dir:
-            shutil.copytree(config_dir, os.path.join(tmp_dir, config_type.value))
-            config_dir = os.path.join(tmp_dir, os.path.basename(config_dir))
+        with ToskoseManager._working_dir(config_type, config_dir) as config_dir:
             config_path = ToskoseManager._load_configurations(config_dir, config_name)
 
             try:
@@ -133,95 +188,339 @@ class ToskoseManager():
                     ToskoseManager._merge_imports(config_dir)
                     return ToscaParser().build_model(config_path) # also make validation
                 elif config_type == ConfigType.TOSKOSE_CONFIG:
-                    return validate_configuration(self._loader.load(config_path))
+                    return validate_configuration((loader or Loader()).load(config_path))
                 else:
-                    logger.error('configuration type {} not recognized. Abort.'.format(config_type))
+                    logger.error('Configuration type not recognized. Abort.', type=config_type)
                     raise FatalError(CommonErrorMessages._DEFAULT_FATAL_ERROR_MSG)
 
             except (ValidationError, MalformedConfigurationError) as err:
-                logger.warn('An error is occurred during the validation of {}'.format(config_path))
+                logger.warn('An error is occurred during the validation', path=config_path)
                 raise ConfigurationError('The configuration {} is invalid or corrupted'.format(
                     os.path.basename(config_path))) from err
 
     def update_model(self):
         """ Update the generated TOSCA model according to the Toskose config. """
-        for container in self._model.containers:
-            for node_id, node_data in self._config['nodes'].items():
-                if container.name == node_id:
-                    for data_key, data_value in node_data.items():
-                        if 'docker' in data_key:
-                            container.add_artifact(ToskosedImage(
-                                data_value['name'],
-                                data_value['tag']
-                            ))
-                        # TODO: workaround
-                        # change 'hostname' with 'alias' 
-                        # (also in the TOSCA model, toskose tool too)
-                        if 'alias' in data_key:
-                            setattr(container, 'hostname', data_value)
-
-                        else:
-                            setattr(container, data_key, data_value)
-                            # TODO update model with associated fields
-                            # TODO ensure the config/model validation
-                            # TODO ensure that config has exactly the fields
+        for node_id, node_data in self._config['nodes'].items():
+            container = self._model[node_id]
+            if not isinstance(container, Container):
+                continue
+            for data_key, data_value in node_data.items():
+                if 'docker' in data_key:
+                    container.add_artifact(ToskosedImage(
+                        data_value['name'],
+                        data_value['tag']
+                    ))
+                # TODO: workaround
+                # change 'hostname' with 'alias' 
+                # (also in the TOSCA model, toskose tool too)
+                if 'alias' in data_key:
+                    setattr(container, 'hostname', data_value)
+
+                else:
+                    try:
+                        setattr(container, data_key, data_value)
+                    except AttributeError:
+                        logger.warn('Unknown field in the configuration of the node, ignored',
+                                    node=node_id, field=data_key)
+                    # TODO update model with associated fields
+                    # TODO ensure the config/model validation
+                    # TODO ensure that config has exactly the fields
+
+    @staticmethod
+    def _extract_lifecycle_operations(component):
+        """ The lifecycle operations of a component (Standard first, then the custom ones). """
+
+        operations = []
+        for interface_k, interface_v in component.interfaces.items():
+            if interface_k.upper() == 'STANDARD':
+                logger.debug('Extracting Standard interfaces', component=component.name)
+            else:
+                logger.debug('Extracting custom interfaces', interface=interface_k, component=component.name)
+            operations += [operation for operation in interface_v.keys()]
+        return tuple(operations)
+
+    def _build_indexes(self):
+        """ Build the lookup tables of the model.
+
+        - containers by name
+        - hosted components by (node, component)
+        - lifecycle operations by (node, component)
+
+        The model doesn't change after the initialization, so the tables are
+        built once and exposed read-only.
+        """
+
+        containers = {container.name: container for container in self._model.containers}
+        components = {}
+        operations = {}
+        for container in containers.values():
+            for component in container.hosted:
+                key = (container.name, component.name)
+                components[key] = component
+                operations[key] = ToskoseManager._extract_lifecycle_operations(component)
+
+        self._containers = MappingProxyType(containers)
+        self._components = MappingProxyType(components)
+        self._operations = MappingProxyType(operations)
+
+    def _build_clients(self):
+        """ Build the client of each configured node (the standalone containers
+        have none). The clients don't contact the nodes until they are used, and
+        keep a connection for each request thread. """
+
+        clients = {}
+        for node_id, node_config in self._config['nodes'].items():
+            try:
+                clients[node_id] = ToskoseClientFactory.create(
+                    # the protocol can be overridden per node (e.g. JSONRPC sidecar)
+                    protocol_type=node_config.get('api_protocol', AppConfig._CLIENT_PROTOCOL),
+                    # TODO: workaround
+                    # change 'hostname' with 'alias'
+                    # (also in the TOSCA model, toskose tool too)
+                    hostname=node_config['alias'],
+                    port=node_config['port'],
+                    username=node_config['user'],
+                    password=node_config['password'],
+                    name=node_id,
+                )
+            except ValueError as err:
+                logger.error('Invalid client configuration', node=node_id, error=err)
+                raise ConfigurationError('Invalid client configuration of node {0}: {1}'.format(
+                    node_id, err))
+
+        self._clients = MappingProxyType(clients)
+
+    def _load_all(self, timings):
+        """ Load the Toskose config and the TOSCA manifest.
+
+        The manifest parsing is CPU-bound (toscaparser), so it can run in a
+        worker process while the config is loaded here (_STARTUP_PARALLEL, off
+        by default: starting the worker costs more than a small manifest takes
+        to be parsed). If a worker process is not
+        available (or the model can't be sent back), everything is loaded here.
+
+        The worker is spawned, not forked: the manager runs threads (e.g. the
+        logs listener) whose locks may be held at the time of a fork. Its log
+        records are sent back with the model, and written here.
+        """
+
+        if AppConfig._STARTUP_PARALLEL:
+            # only needed here (once), not to import the manager
+            import multiprocessing
+            from concurrent.futures import ProcessPoolExecutor
+            try:
+                pool = ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn'))
+            except (OSError, NotImplementedError, ValueError) as err:
+                logger.warn('Cannot start a worker process, loading sequentially', error=err)
+            else:
+                with pool:
+                    manifest = pool.submit(_load_manifest_in_worker, ToskoseConfig.APP_MANIFEST_PATH)
+                    config, timings['config'] = _timed(self._load, ConfigType.TOSKOSE_CONFIG)
+                    try:
+                        result, error, records = manifest.result()
+                    except Exception as err:
+                        # e.g. BrokenProcessPool, or the model can't be pickled
+                        # (PicklingError, TypeError, AttributeError, RecursionError)
+                        logger.warn('Failed to load the TOSCA manifest in a worker process, loading it here',
+                                    error=err)
+                    else:
+                        LoggingFacility.get_instance().replay(records)
+                        if error is not None:
+                            raise error
+                        model, timings['manifest'] = result
+                        return config, model
+                model, timings['manifest'] = _load_manifest(ToskoseConfig.APP_MANIFEST_PATH)
+                return config, model
+
+        config, timings['config'] = _timed(self._load, ConfigType.TOSKOSE_CONFIG)
+        model, timings['manifest'] = _load_manifest(ToskoseConfig.APP_MANIFEST_PATH)
+        return config, model
 
     def initialization(self):
         """ Initialization
         
-        - Load configuration files (TOSCA Manifest + Toskose Config)
+        - Load configuration files (TOSCA Manifest + Toskose Config), concurrently
+        - Validate the Toskose Config against the TOSCA Manifest
         - Update the TOSCA model representation
+        - Build the clients of the nodes
         """
 
-        self._config = self._load(ConfigType.TOSKOSE_CONFIG)
-        self._model = self._load(ConfigType.TOSCA_MANIFEST)
-        if self._config is None or self._model is None:
-            logger.error('Failed to load the TOSCA manifest or the Toskose configuration files')
-            raise FatalError(CommonErrorMessages._DEFAULT_FATAL_ERROR_MSG)
-        
-        self.update_model()
+        with self._init_lock, tracing.span('ToskoseManager.initialization'):
+            timings = {}
+            start = time.perf_counter()
+
+            self._config, self._model = self._load_all(timings)
+            if self._config is None or self._model is None:
+                logger.error('Failed to load the TOSCA manifest or the Toskose configuration files')
+                raise FatalError(CommonErrorMessages._DEFAULT_FATAL_ERROR_MSG)
+
+            _, timings['cross_validation'] = _timed(
+                ToskoseManager._cross_validation, self._config, self._model)
+            _, timings['update_model'] = _timed(self.update_model)
+            _, timings['indexes'] = _timed(self._build_indexes)
+            _, timings['clients'] = _timed(self._build_clients)
+            timings['total'] = (time.perf_counter() - start) * 1000
+
+            self.startup_timings = timings
+            MODEL_LOAD_DURATION.observe(
+                timings['total'] / 1000, 'startup' if self.model_version == 0 else 'reload')
+            self.model_version += 1
+            self._initialized = True
+            self._startup_error = None
+
+        logger.info('Initialization completed in %.1fms', timings['total'], model_version=self.model_version,
+                    **{'{}_ms'.format(k): round(v, 1) for k, v in timings.items() if k != 'total'})
+
+    def update_inputs(self, inputs):
+        """ Update the TOSCA inputs of the model, without reloading it.
+
+        Only the nodes depending on the changed inputs are refreshed (see
+        ToscaParser.update_inputs).
+
+        Returns:
+            list: the names of the refreshed nodes.
+        """
+
+        self.ensure_initialized()
+        with self._init_lock:
+            refreshed = ToscaParser.update_inputs(self._model, inputs)
+            if refreshed:
+                self._build_indexes()
+                self.model_version += 1
+        logger.info('TOSCA inputs updated', nodes=refreshed, model_version=self.model_version)
+        return refreshed
+
+    @property
+    def initialized(self):
+        return self._initialized
+
+    @property
+    def status(self):
+        """ The readiness of the manager (ready|starting|failed), from its state only. """
+
+        if self._initialized:
+            return 'ready'
+        return 'failed' if self._startup_error is not None else 'starting'
+
+    @property
+    def startup_error(self):
+        return self._startup_error
+
+    def ensure_initialized(self):
+        """ Initialize the manager on first use (once, even with concurrent requests). """
+
+        if not self._initialized:
+            with self._init_lock:
+                if not self._initialized:
+                    self.initialization()
+
+    def warm_up(self):
+        """ Initialize the manager ahead of the first request (e.g. in a background thread).
+
+        Returns:
+            bool: True if the manager is ready, False otherwise (the error is kept
+            for the readiness probe, and the next request tries again).
+        """
+
+        try:
+            self.ensure_initialized()
+        except Exception as err:
+            logger.exception('Failed to initialize the Toskose Manager')
+            self._startup_error = err
+            return False
+        return True
 
     def node_validation(func):
         """ Decorator for validating a node """
         def wrapper(self, *args, **kwargs):
-            for container in self._model.containers:
-                if container.name == args[0]:
-                    return func(self, *args, **kwargs)
-            raise ResourceNotFoundError('node {} not exist'.format(args[0]))
+            self.ensure_initialized()
+            if args[0] not in self._containers:
+                raise ResourceNotFoundError('node {} not exist'.format(args[0]))
+            return func(self, *args, **kwargs)
         return wrapper
 
     @property
     def nodes(self):
-        if self._model is None:
-            logger.warn("The TOSCA model was not initialized.")
-            self.initialization()
-        return self._model.containers
+        self.ensure_initialized()
+        return self._containers.values()
 
     @node_validation
     def node_by_id(self, node_id):
-        for container in self._model.containers:
-            if container.name == node_id:
-                return container
+        return self._containers[node_id]
+
+    @node_validation
+    def component_by_id(self, node_id, component_id):
+        try:
+            return self._components[(node_id, component_id)]
+        except KeyError:
+            raise ResourceNotFoundError('{0} not hosted on node {1}'.format(
+                component_id, node_id))
+
+    @node_validation
+    def lifecycle_operations(self, node_id, component_id):
+        """ The lifecycle operations of a component hosted on a node. """
+
+        try:
+            return self._operations[(node_id, component_id)]
+        except KeyError:
+            raise ResourceNotFoundError('{0} not hosted on node {1}'.format(
+                component_id, node_id))
 
     @node_validation
     def get_client(self, node_id):
 
-        logger.debug('Requested client instance for node [{}]'.format(node_id))
+        logger.debug('Requested client instance', node=node_id)
 
         # TODO: workaround
         # use the TOSCA model instead
-        if node_id not in self._config['nodes']:
-            logger.debug('Detected a standalone node container [{}]'.format(node_id))
-            return None
-
-        node_config = self._config['nodes'][node_id]
-        return ToskoseClientFactory.create(
-            protocol_type=AppConfig._CLIENT_PROTOCOL,
-            # TODO: workaround
-            # change 'hostname' with 'alias' 
-            # (also in the TOSCA model, toskose tool too)
-            hostname=node_config['alias'],
-            port=node_config['port'],
-            username=node_config['user'],
-            password=node_config['password'],
-        )
\ No newline at end of file
+        with tracing.span('ToskoseManager.get_client', node=node_id):
+            client = self._clients.get(node_id)
+        if client is None:
+            logger.debug('Detected a standalone node container', node=node_id)
+        return client
+
+
+def _timed(func, *args):
+    """ Call func and return its result and the elapsed time (ms). """
+
+    start = time.perf_counter()
+    result = func(*args)
+    return result, (time.perf_counter() - start) * 1000
+
+
+def _load_manifest(manifest_dir):
+    """ Load the TOSCA manifest (and the time it took). """
+
+    return _timed(ToskoseManager._load_file, ConfigType.TOSCA_MANIFEST, manifest_dir)
+
+
+def _load_manifest_in_worker(manifest_dir):
+    """ Load the TOSCA manifest in a worker process.
+
+    Returns:
+        tuple: the result of _load_manifest (None if it failed), the error
+        (None if it succeeded) and the log records of the worker.
+    """
+
+    with LoggingFacility.get_instance().captured() as records:
+        try:
+            return _load_manifest(manifest_dir), None, records
+        except Exception as err:
+            return None, err, records
+
+
+""" The metrics of the manager state (computed when the metrics are collected) """
+
+gauge('toskose_model_version',
+      'The version of the model (incremented on every load and reload).',
+      lambda: ToskoseManager.get_instance().model_version)
+
+gauge('toskose_clients',
+      'The clients of the nodes (built on every load and reload).',
+      lambda: len(ToskoseManager.get_instance()._clients))
+
+gauge('toskose_model_load_phase_seconds',
+      'The duration of each phase of the last load or reload.',
+      lambda: {(phase,): ms / 1000 for phase, ms in ToskoseManager.get_instance().startup_timings.items()
+               if phase != 'total'},
+      ('phase',))
@@ -1,12 +1,8 @@
-import os
 import sys
-from pathlib import Path
-import unittest
 import logging
-import logging.handlers as handlers
+import threading
 
 from flask import Flask, jsonify
-from flask_bcrypt import Bcrypt
 
 from app.config import AppConfig
 from app.config import configs
@@ -16,7 +12,8 @@ from app.core.logging import LoggingFacility
 from app.manager import ToskoseManager
 
 
-bcrypt = Bcrypt()
+# the flask extensions are imported and created with the app (see create_app)
+bcrypt = None
 
 
 def create_app():
@@ -28,7 +25,9 @@ def create_app():
     app.config.from_object(configs[AppConfig._APP_MODE])
 
     # init flask extensions/plugins
-    bcrypt.init_app(app)
+    global bcrypt
+    from flask_bcrypt import Bcrypt
+    bcrypt = Bcrypt(app)
 
     # API INFO
     from app import __full_name__, __author__,__email__,__version__,__repository__
@@ -45,6 +44,25 @@ def create_app():
     # Add a flask route to expose information
     app.add_url_rule("/api/info", "info", view_func=api_info)
 
+    # liveness/readiness probes (from the cached state only)
+    from app.api.health import healthz, readyz
+    app.add_url_rule("/healthz", "healthz", view_func=healthz)
+    app.add_url_rule("/readyz", "readyz", view_func=readyz)
+
+    # prometheus metrics (and the latency of every request)
+    from app.api.metrics import metrics, record_request, start_timer
+    app.before_request(start_timer)
+    app.after_request(record_request)
+    app.add_url_rule("/metrics", "metrics", view_func=metrics)
+
+    # tracing spans (exported to TOSKOSE_TRACING_EXPORTER, if any)
+    from app.core import tracing
+    from app.api.tracing import end_request_span, start_request_span, tag_response
+    tracing.configure()
+    app.before_request(start_request_span)
+    app.after_request(tag_response)
+    app.teardown_request(end_request_span)
+
     # register blueprints
     from app.api import bp as bp_tosca_api
     app.register_blueprint(bp_tosca_api)
@@ -59,6 +77,14 @@ def create_app():
         app.logger.setLevel(logging.INFO)
         app.logger.info('- Toskose Manager API started -')
 
+    # load the model and build the node clients before the first request
+    # (/readyz reports when it's done)
+    if AppConfig._STARTUP_WARM_UP:
+        threading.Thread(
+            target=ToskoseManager.get_instance().warm_up,
+            name='toskose-warm-up',
+            daemon=True).start()
+
     return app
 
 
@@ -0,0 +1,283 @@
+"""
+Resolution of the TOSCA functions (get_input, get_property, get_artifact).
+
+The functions of the node templates and of the outputs are collected once,
+together with the locations they read from, in a dependency graph. They are
+then resolved in topological order (so a get_property pointing to another
+function reads the resolved value), and reference cycles are reported as
+parsing errors. When only the inputs change, update_inputs re-resolves just
+the functions depending (transitively) on them (see ToscaParser.update_inputs,
+refreshing the affected nodes of the model).
+
+e.g.
+# topology_template:
+#   inputs:
+#     api_port:
+#       type: integer
+#       default: 8000
+# ...
+# node_templates:
+#   maven:
+#     properties:
+#       ports:
+#         8080: { get_input: api_port }   =resolved=
+"""
+
+import os
+import sys
+
+from app.core.exceptions import ParsingError
+from app.core.logging import LoggingFacility
+from app.tosca.model.artifacts import File
+
+
+logger = LoggingFacility.get_instance().get_logger()
+
+GET_INPUT = 'get_input'
+GET_PROPERTY = 'get_property'
+GET_ARTIFACT = 'get_artifact'
+
+SUPPORTED_FUNCTIONS = (GET_PROPERTY, GET_ARTIFACT, GET_INPUT)
+
+_NODES = 'node_templates'
+_OUTPUTS = 'outputs'
+
+_UNVISITED, _VISITING, _DONE = 0, 1, 2
+
+_MISSING = object()
+
+
+def _toscaparser_function_type():
+    """ The toscaparser Function class, if toscaparser was used at all
+    (it's not imported for the trusted manifests). """
+
+    module = sys.modules.get('toscaparser.functions')
+    return module.Function if module is not None else None
+
+
+class FunctionSite:
+    """ A function placeholder found in the template.
+
+    Attributes:
+        path (tuple): the location of the placeholder (e.g. ('node_templates', 'maven', 'properties', 'ports', 8080)).
+        container (dict): the dict holding the placeholder (updated in place).
+        key: the key of the placeholder in the container.
+        owner (str): the node (or output) the placeholder belongs to.
+        function (str): the function name (e.g. get_input).
+        args: the function arguments.
+    """
+
+    __slots__ = ('path', 'container', 'key', 'owner', 'function', 'args')
+
+    def __init__(self, path, container, key, owner, function, args):
+        self.path = path
+        self.container = container
+        self.key = key
+        self.owner = owner
+        self.function = function
+        self.args = args
+
+    @property
+    def location(self):
+        return '.'.join(str(p) for p in self.path[1:])
+
+    def __str__(self):
+        return '{} ({}: {})'.format(self.location, self.function, self.args)
+
+
+class FunctionResolver:
+    """ Resolve the TOSCA functions of a (toscaparser) topology template in place.
+
+    Args:
+        topology_template (Dict): the raw topology template (e.g. tosca.topology_template.tpl).
+        base_path (str): The path of the TOSCA-based application.
+    """
+
+    def __init__(self, topology_template, base_path):
+        self._nodes = topology_template.get(_NODES) or {}
+        self._outputs = topology_template.get(_OUTPUTS) or {}
+        self._tosca_inputs = topology_template.get('inputs') or {}
+        self._base_path = base_path
+        self._inputs = {}
+
+        self._sites = []
+        self._collect()
+
+        # site -> the sites it depends on / the sites depending on it
+        self._depends = {site: self._dependencies(site) for site in self._sites}
+        self._dependents = {site: [] for site in self._sites}
+        for site, deps in self._depends.items():
+            for dep in deps:
+                self._dependents[dep].append(site)
+
+        self._order = self._topological_order(self._sites)
+
+    def _collect(self):
+        """ Collect the function sites (only dicts are walked). """
+
+        self._by_path = {}
+        # every path prefix -> the sites below it
+        self._below = {}
+
+        tosca_function = _toscaparser_function_type()
+
+        def walk(owner, path, node):
+            for k, v in node.items():
+                site_path = path + (k,)
+                if tosca_function is not None and isinstance(v, tosca_function):
+                    # function parsed by toscaparser library (its args are a list)
+                    if v.name not in SUPPORTED_FUNCTIONS:
+                        node[k] = v.result()
+                        continue
+                    function, args = v.name, v.args
+                    if function == GET_INPUT and len(args) == 1:
+                        args = args[0]
+                elif isinstance(v, dict):
+                    function = next((f for f in SUPPORTED_FUNCTIONS if f in v), None)
+                    if function is None:
+                        walk(owner, site_path, v)
+                        continue
+                    args = v[function]
+                else:
+                    continue
+                site = FunctionSite(site_path, node, k, owner, function, args)
+                if function == GET_INPUT and not isinstance(args, str):
+                    error_msg = 'Invalid arguments of {}: the input name is required'.format(site)
+                    logger.error(error_msg)
+                    raise ParsingError(error_msg)
+                self._sites.append(site)
+                self._by_path[site_path] = site
+                for i in range(1, len(site_path)):
+                    self._below.setdefault(site_path[:i], []).append(site)
+
+        for name, node in self._nodes.items():
+            walk(name, (_NODES, name), node)
+        for name, output in self._outputs.items():
+            walk(name, (_OUTPUTS, name), output)
+
+    def _target_path(self, site):
+        """ The location read by a get_property/get_artifact function. """
+
+        args = site.args if isinstance(site.args, list) else [site.args]
+        if not args:
+            raise ParsingError('Invalid arguments of {}'.format(site))
+        node = site.owner if args[0] == 'SELF' else args[0]
+        section = 'properties' if site.function == GET_PROPERTY else 'artifacts'
+        return (_NODES, node, section) + tuple(args[1:])
+
+    def _dependencies(self, site):
+        if site.function == GET_INPUT:
+            return []
+
+        target = self._target_path(site)
+        deps = []
+        # the target is (inside) the result of another function
+        for i in range(2, len(target) + 1):
+            dep = self._by_path.get(target[:i])
+            if dep is not None:
+                deps.append(dep)
+        # the target contains other functions
+        deps.extend(self._below.get(target, ()))
+        return deps
+
+    def _topological_order(self, sites):
+        """ Order the sites so that every site follows its dependencies. """
+
+        order = []
+        state = {}
+        for root in sites:
+            if state.get(root, _UNVISITED) is not _UNVISITED:
+                continue
+            state[root] = _VISITING
+            stack = [(root, iter(self._depends[root]))]
+            while stack:
+                site, deps = stack[-1]
+                for dep in deps:
+                    dep_state = state.get(dep, _UNVISITED)
+                    if dep_state is _VISITING:
+                        cycle = [s for s, _ in stack]
+                        cycle = cycle[cycle.index(dep):] + [dep]
+                        error_msg = 'Cyclic reference between TOSCA functions: {}'.format(
+                            ' -> '.join(s.location for s in cycle))
+                        logger.error(error_msg)
+                        raise ParsingError(error_msg)
+                    if dep_state is _UNVISITED:
+                        state[dep] = _VISITING
+                        stack.append((dep, iter(self._depends[dep])))
+                        break
+                else:
+                    stack.pop()
+                    state[site] = _DONE
+                    order.append(site)
+        return order
+
+    def _input(self, site):
+        name = site.args
+        if name in self._inputs:
+            return self._inputs[name]
+        try:
+            return self._tosca_inputs[name]['default']
+        except (KeyError, TypeError):
+            error_msg = 'Missing input [{0}] required by {1}'.format(name, site.location)
+            logger.error(error_msg)
+            raise ParsingError(error_msg)
+
+    def _read(self, site):
+        target = self._target_path(site)
+        value = self._nodes
+        try:
+            for key in target[1:]:
+                value = value[key]
+        except (KeyError, IndexError, TypeError):
+            error_msg = 'Cannot resolve {0}: {1} not found'.format(
+                site, '.'.join(str(p) for p in target[1:]))
+            logger.error(error_msg)
+            raise ParsingError(error_msg)
+        return value
+
+    def _evaluate(self, site):
+        if site.function == GET_INPUT:
+            return self._input(site)
+        if site.function == GET_PROPERTY:
+            return self._read(site)
+        # GET_ARTIFACT
+        return File(None, os.path.abspath(os.path.join(self._base_path, self._read(site))))
+
+    def node_template(self, name):
+        """ The (resolved) template of a node. """
+
+        return self._nodes[name]
+
+    def _resolve(self, sites):
+        for site in sites:
+            site.container[site.key] = self._evaluate(site)
+
+    def resolve(self, inputs=None):
+        """ Resolve all the functions with the given inputs (defaults otherwise). """
+
+        self._inputs = dict(inputs or {})
+        self._resolve(self._order)
+
+    def update_inputs(self, inputs):
+        """ Re-resolve only the functions affected by the changed inputs.
+
+        Returns the re-resolved FunctionSites (in resolution order).
+        """
+
+        inputs = dict(inputs or {})
+        changed = {name for name in set(self._inputs) | set(inputs)
+                   if self._inputs.get(name, _MISSING) != inputs.get(name, _MISSING)}
+        self._inputs = inputs
+
+        affected = set()
+        pending = [site for site in self._sites
+                   if site.function == GET_INPUT and site.args in changed]
+        while pending:
+            site = pending.pop()
+            if site not in affected:
+                affected.add(site)
+                pending.extend(self._dependents[site])
+
+        sites = [site for site in self._order if site in affected]
+        self._resolve(sites)
+        return sites
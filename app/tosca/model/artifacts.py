@@ -4,6 +4,8 @@ Artifacts module
 
 class Artifact(object):
 
+    __slots__ = ('name',)
+
     def __init__(self, name):
         self.name = name
 
@@ -17,6 +19,8 @@ class Artifact(object):
 
 class File(Artifact):
 
+    __slots__ = ('path', 'file')
+
     def __init__(self, name, abs_path):
         super(File, self).__init__(name)
         split_path = abs_path.split('/')
@@ -37,6 +41,8 @@ class File(Artifact):
 
 class DockerImage(Artifact):
 
+    __slots__ = ('tag',)
+
     def __init__(self, attr=None):
         super(DockerImage, self).__init__('')
         if attr is None:
@@ -56,12 +62,16 @@ class DockerImage(Artifact):
 
 class DockerImageExecutable(DockerImage):
 
+    __slots__ = ()
+
     def __str__(self):
         return 'DockerImageExecutable'
 
 
 class Dockerfile(Artifact):
 
+    __slots__ = ('tag', 'dockerfile')
+
     def __init__(self, attr, dockerfile):
         super(Dockerfile, self).__init__('')
         self.name, self.tag = attr.split(':') if ':' in attr \
@@ -78,6 +88,8 @@ class Dockerfile(Artifact):
 
 class DockerfileExecutable(Dockerfile):
 
+    __slots__ = ()
+
     def __str__(self):
         return 'DockerfileExecutable'
 
@@ -88,6 +100,8 @@ class ToskosedImage(DockerImage):
     [repository/]user/image_name[:tag]
     """
 
+    __slots__ = ('registry_password', 'base_name', 'base_tag')
+
     def __init__ (self, name, tag=None, registry_password=None,
                   base_name=None, base_tag=None):
         self.name = name
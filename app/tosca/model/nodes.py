@@ -1,6 +1,8 @@
 '''
 Nodes module
 '''
+from operator import attrgetter
+
 from app.tosca.model import protocol
 from app.tosca.model.artifacts import (Artifact, Dockerfile, DockerfileExecutable,
                         DockerImage, DockerImageExecutable, ToskosedImage, File)
@@ -21,18 +23,29 @@ def _add_to_list(l_name, i):
     return l_name
 
 
+def _slot_names(cls):
+    for klass in reversed(cls.__mro__):
+        for name in klass.__dict__.get('__slots__', ()):
+            yield name
+
+
 def _str_obj(o):
-    return ', '.join(["{}: {}".format(k, v) for k, v in vars(o).items()])
+    return ', '.join(["{}: {}".format(k, getattr(o, k, None)) for k in _slot_names(type(o))])
 
 
 class Root(object):
 
+    # the nodes are slotted: large topologies hold thousands of them
+    __slots__ = ('name', 'tpl', '_depend', '_connection', '_volume', 'artifacts',
+                 '_mark', 'up_requirements', 'protocol', 'interfaces')
+
+    # attribute name -> accessor (see __getitem__)
+    _ATTRIBUTE = {}
+
     def __init__(self, name):
         self.name = name
         self.tpl = None
 
-        self._ATTRIBUTE = {}
-
         # requirements
         self._depend = []
         self._connection = []
@@ -48,6 +61,8 @@ class Root(object):
         # protocol
         self.protocol = None
 
+        self.interfaces = {}
+
     @property
     def full_name(self):
         return '{}.{}'.format(self.tpl.name, self.name)
@@ -97,7 +112,8 @@ class Root(object):
         return self.name
 
     def __getitem__(self, item):
-        return self._ATTRIBUTE.get(item, lambda: None)()
+        accessor = self._ATTRIBUTE.get(item)
+        return accessor(self) if accessor is not None else None
 
     def __eq__(self, other):
         return self.name == other.name
@@ -111,6 +127,19 @@ class Root(object):
 
 class Container(Root):
 
+    __slots__ = ('id', 'env', 'cmd', 'ports', 'hostname', 'share_data', 'is_manager',
+                 'hosted', '_overlay',
+                 # toskose configuration (see ToskoseManager.update_model)
+                 'port', 'user', 'password', 'log_level', 'docker', 'api_protocol')
+
+    _ATTRIBUTE = {
+        'id': attrgetter('id'),
+        'ports': attrgetter('ports'),
+        'env_variable': attrgetter('env'),
+        'command': attrgetter('cmd'),
+        'share_data': attrgetter('share_data'),
+    }
+
     def __init__(self, name, is_manager=False):
         super(Container, self).__init__(name)
         # attributes
@@ -122,14 +151,6 @@ class Container(Root):
         self.share_data = {} 
         self.is_manager = is_manager
         self.hosted = []
-
-        self._ATTRIBUTE = {
-            'id': lambda: self.id,
-            'ports': lambda: self.ports,
-            'env_variable': lambda: self.env,
-            'command': lambda: self.cmd,
-            'share_data': lambda: self.share_data,
-        }
         self._overlay = []
 
         self.interfaces = {'Standard': {'create', 'start', 'stop', 'delete'}}
@@ -192,15 +213,18 @@ class Container(Root):
 
 class Volume(Root):
 
+    __slots__ = ('id', 'size', 'driver_opt')
+
+    _ATTRIBUTE = {
+        'id': attrgetter('id'),
+        'size': attrgetter('size'),
+    }
+
     def __init__(self, name):
         super(Volume, self).__init__(name)
         # attributes
         self.id = None
         self.size = None
-        self._ATTRIBUTE = {
-            'id': lambda: self.id,
-            'size': lambda: self.size
-        }
 
         self.interfaces = {'Standard': {'create', 'delete'}}
 
@@ -230,10 +254,11 @@ class Volume(Root):
 
 class Software(Root):
 
+    __slots__ = ('_host', 'host_container')
+
     def __init__(self, name):
         super(Software, self).__init__(name)
         self.artifacts = []
-        self.interfaces = {}
 
         # requirements
         self._host = []
@@ -9,18 +9,27 @@ class Protocol():
     '''
     The Protocol class representation.
 
+    The states and the transitions are immutable and can be shared by many
+    protocols (see the default protocols), only the current state is per
+    instance.
+
     Attributes:
     initial_state -- the initial state (type:State)
     current_state -- the current state (type:State)
     states        -- a list of States (type:[State])
     transitions   -- the list of transitions (type:[Transition])
     '''
-    def __init__(self):
+
+    __slots__ = ('states', 'transitions', '_initial_state', '_current_state')
+
+    def __init__(self, states=None, transitions=None, initial_state=None):
         """Create a new Protocol object."""
-        self.states = []
-        self.transitions = []
+        self.states = states if states is not None else []
+        self.transitions = transitions if transitions is not None else []
         self._initial_state = None
         self._current_state = None
+        if initial_state is not None:
+            self.initial_state = initial_state
 
     @property
     def initial_state(self):
@@ -84,6 +93,9 @@ class State():
     requires    -- the list of the requirement required in the state (type:[str])
     transitions -- the transition list (type:[Transition])
     """
+
+    __slots__ = ('name', 'requires', 'offers', 'transitions')
+
     def __init__(self, name, requires=None, offers=None, transitions=None):
         """Create a new State object."""
         self.name = name
@@ -120,6 +132,9 @@ class Transition():
     interface -- the interface name (type:str)
     operation -- the operation name to be executed to change the State (type:str)
     """
+
+    __slots__ = ('source', 'target', 'interface', 'operation', 'requires')
+
     def __init__(self, source=None, target=None, interface='Standard',
                  operation=None, requires=None):
         """Create a new Transition object."""
@@ -156,19 +171,20 @@ STATES = STATE_DELETED, STATE_CREATED, STATE_CONFIGURED, STATE_RUNNING, STATE_ZO
          SOFTWARE_STATES
 
 # Default protocols
-def get_container_protocol():
-    """Return the default protocol for the Container component."""
-    protocol = Protocol()
-    protocol.states = deleted, created, running = [
+#
+# The tables (states and transitions) of the default protocols are built once
+# and shared by all the nodes of the same kind.
+
+def _container_tables():
+    states = deleted, created, running = [
         State(CONTAINER_STATE_DELETED),
         State(CONTAINER_STATE_CREATED, offers=[ALIVE]),
         State(CONTAINER_STATE_RUNNING,
               requires=[STORAGE, CONNECTION, DEPENDENCY],
               offers=[ALIVE, HOST, ENDPOINT, FEATURE])
     ]
-    protocol.initial_state = deleted
 
-    protocol.transitions = create, start, stop, delete = [
+    transitions = create, start, stop, delete = [
         Transition(deleted, created, operation='create'),
         Transition(created, running, operation='start'),
         Transition(running, created, operation='stop'),
@@ -179,13 +195,11 @@ def get_container_protocol():
     created.transitions = [delete, start]
     running.transitions = [stop]
 
-    return protocol
+    return states, transitions, deleted
 
 
-def get_software_protocol():
-    """Return the default protocol for the Software component."""
-    protocol = Protocol()
-    protocol.states = deleted, created, configured, running = [
+def _software_tables():
+    states = deleted, created, configured, running = [
         State(SOFTWARE_STATE_DELETED),
         State(SOFTWARE_STATE_CREATED, requires=[ALIVE], offers=[ALIVE]),
         State(SOFTWARE_STATE_CONFIGURED, requires=[ALIVE], offers=[ALIVE]),
@@ -193,9 +207,8 @@ def get_software_protocol():
               requires=[ALIVE, HOST, CONNECTION, DEPENDENCY],
               offers=[ALIVE, HOST, ENDPOINT, FEATURE])
     ]
-    protocol.initial_state = deleted
 
-    protocol.transitions = create, configure, start, stop, delete, delete_conf = [
+    transitions = create, configure, start, stop, delete, delete_conf = [
         Transition(deleted, created, operation='create', requires=[HOST]),
         Transition(created, configured, operation='configure', requires=[HOST]),
         Transition(configured, running, operation='start', requires=[HOST]),
@@ -209,18 +222,16 @@ def get_software_protocol():
     configured.transitions = [start, delete_conf]
     running.transitions = [stop]
 
-    return protocol
+    return states, transitions, deleted
 
-def get_volume_protocol():
-    """Return the default protocol for the Volume component."""
-    protocol = Protocol()
-    protocol.states = deleted, created = [
+
+def _volume_tables():
+    states = deleted, created = [
         State(VOLUME_STATE_DELETED),
         State(VOLUME_STATE_CREATED, offers=[ATTACHMENT])
     ]
-    protocol.initial_state = deleted
 
-    protocol.transitions = create, delete = [
+    transitions = create, delete = [
         Transition(deleted, created, operation='create'),
         Transition(created, deleted, operation='delete')
     ]
@@ -228,4 +239,24 @@ def get_volume_protocol():
     deleted.transitions = [create]
     created.transitions = [delete]
 
-    return protocol
+    return states, transitions, deleted
+
+
+_CONTAINER_TABLES = _container_tables()
+_SOFTWARE_TABLES = _software_tables()
+_VOLUME_TABLES = _volume_tables()
+
+
+def get_container_protocol():
+    """Return the default protocol for the Container component."""
+    return Protocol(*_CONTAINER_TABLES)
+
+
+def get_software_protocol():
+    """Return the default protocol for the Software component."""
+    return Protocol(*_SOFTWARE_TABLES)
+
+
+def get_volume_protocol():
+    """Return the default protocol for the Volume component."""
+    return Protocol(*_VOLUME_TABLES)
@@ -11,6 +11,12 @@ class Template:
 
     def __init__(self, name):
         self._nodes = {}
+        # typed views over _nodes, maintained by push()
+        self._containers = {}
+        self._software = {}
+        self._volumes = {}
+        # container name -> software nodes hosted on it
+        self._hosted = {}
         self.name = name
         self.description = 'No description.'
         self._outputs = []
@@ -18,6 +24,8 @@ class Template:
         self.manifest_path = None
         self.imports = []
         self.toskose_config_path = None
+        # the resolver of the TOSCA functions (see app.tosca.functions)
+        self.functions = None
 
     def add_import(self, name, path):
         if not os.path.exists(path):
@@ -28,34 +36,61 @@ class Template:
 
     @property
     def nodes(self):
-        return (v for k, v in self._nodes.items())
+        return self._nodes.values()
 
     @property
     def containers(self):
         """ The container nodes associated with the template.
 
-        Returns a generator expression.
+        Returns a (read-only) view, kept up to date by push.
         """
-        return (v for k, v in self._nodes.items() if isinstance(v, Container))
+        return self._containers.values()
 
     @property
     def volumes(self):
         """ The volume nodes associated with the template.
 
-        Returns a generator expression.
+        Returns a (read-only) view, kept up to date by push.
         """
-        return (v for k, v in self._nodes.items() if isinstance(v, Volume))
+        return self._volumes.values()
 
     @property
     def software(self):
         """ The software nodes associated with the template.
 
-        Returns a generator expression.
+        Returns a (read-only) view, kept up to date by push.
         """
-        return (v for k, v in self._nodes.items() if isinstance(v, Software))
+        return self._software.values()
+
+    def _typed(self, node):
+        if isinstance(node, Container):
+            return self._containers
+        if isinstance(node, Software):
+            return self._software
+        if isinstance(node, Volume):
+            return self._volumes
+        return None
 
     def push(self, node):
+        previous = self._nodes.get(node.name)
+        if previous is not None:
+            typed = self._typed(previous)
+            if typed is not None:
+                del typed[previous.name]
+
         self._nodes[node.name] = node
+        typed = self._typed(node)
+        if typed is not None:
+            typed[node.name] = node
+
+    def add_hosted(self, software, container):
+        """ Record that a software node is (transitively) hosted on a container. """
+        software.host_container = container
+        self._hosted.setdefault(container.name, []).append(software)
+
+    def hosted_on(self, container):
+        """ The software nodes hosted on a container (in push order). """
+        return self._hosted.get(container.name, ())
 
     def __getitem__(self, name):
         return self._nodes.get(name, None)
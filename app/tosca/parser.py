@@ -2,18 +2,19 @@
 The parser module for TOSCA-based applications.
 """
 
+import logging
 import os
 import re
 from typing import List, Dict
 
-from toscaparser.tosca_template import ToscaTemplate
-from toscaparser.functions import Function
-from toscaparser.common.exception import ValidationError
-
+from app.config import AppConfig
 from app.core.commons import CommonErrorMessages
 from app.core.logging import LoggingFacility
 from app.core.exceptions import ParsingError, FatalError
 
+from app.tosca.functions import FunctionResolver
+from app.tosca.stamp import verify_stamp
+from app.tosca.trusted import TrustedToscaTemplate
 from app.tosca.model.template import Template
 from app.tosca.model.nodes import Container, Software, Volume
 from app.tosca.model.artifacts import File
@@ -52,13 +53,6 @@ class ToscaRequirementTypes(object):
     REL_HOST = 'tosca.relationships.HostedOn'
 
 
-def get_attributes(args, nodes):
-    get = nodes
-    for a in args:
-        get = get[a]
-    return get
-
-
 class ToscaParser:
     """ A parser for TOSCA-based applications. """
 
@@ -68,9 +62,8 @@ class ToscaParser:
     @staticmethod
     def _update_hosted_nodes(tpl):
         for container in tpl.containers:
-            for sw in tpl.software:
-                if sw.host_container == container:
-                    container.add_hosted_node(sw)
+            for sw in tpl.hosted_on(container):
+                container.add_hosted_node(sw)
 
     @staticmethod
     def _add_pointer(tpl):
@@ -84,6 +77,47 @@ class ToscaParser:
             for rel in node.relationships:
                 rel.to.up_requirements.append(rel)
 
+    @staticmethod
+    def _resolve_host_containers(tpl):
+        """ Set the host_container of every software node.
+
+        The host chains (software -> software -> ... -> container) are walked
+        iteratively, and every node of a walked chain is memoised, so each node
+        is visited once whatever the depth of the stack and the order of the
+        nodes in the template.
+        """
+
+        for node in tpl.software:
+            path = []
+            on_path = set()
+            current = node
+            while isinstance(current, Software) and current.host_container is None:
+                if current.name in on_path:
+                    cycle = path[path.index(current):] + [current]
+                    error_msg = 'Hosting cycle detected: {}'.format(
+                        ' -> '.join(n.name for n in cycle))
+                    logger.error(error_msg)
+                    raise ParsingError(error_msg)
+                path.append(current)
+                on_path.add(current.name)
+
+                if not current._host:
+                    logger.error('A software component must have the "host" requirement', component=current.name)
+                    raise ParsingError(CommonErrorMessages._DEFAULT_PARSING_ERROR_MSG)
+                current = current.host.to
+
+            if isinstance(current, Container):
+                container = current
+            elif isinstance(current, Software):
+                container = current.host_container
+            else:
+                logger.error('Invalid host in the hosting chain', host=current,
+                             chain=' -> '.join(n.name for n in path))
+                raise ParsingError(CommonErrorMessages._DEFAULT_PARSING_ERROR_MSG)
+
+            for hosted in path:
+                hosted.host_container = container
+
     @staticmethod
     def _add_extension(tpl):
         """
@@ -93,31 +127,22 @@ class ToscaParser:
         - add software links to the corrisponding container
         """
 
-        # Add the host_container property
-        for node in tpl.software:
-            
-            def find_container(node):
-                if isinstance(node, Container):
-                    return node
-                elif node.host_container is not None:
-                    return node.host_container
-                elif node.host is None:
-                    raise ValueError('Software component must have the \"host\" requirements')
-                else:
-                    return find_container(node.host.to)
+        ToscaParser._resolve_host_containers(tpl)
 
-            node.host_container = find_container(node)
+        # Record the hosted nodes and manage the case when a Software
+        # is connected to a Container or a Software
+        for node in tpl.software:
+            tpl.add_hosted(node, node.host_container)
             logger.debug('%s .host %s, .host_container %s',
                 node, node.host.to, node.host_container)
 
-        # Manage the case when a Software is connected
-        # to a Container or a Software
-        for node in tpl.software:
             for con in node._connection:
                 if isinstance(con.to, Container):
                     container = con.to
-                if isinstance(con.to, Software):
+                elif isinstance(con.to, Software):
                     container = con.to.host_container
+                else:
+                    continue
                 logger.debug('manage connection of %s to %s', node, container)
                 node.host_container.add_overlay(container, con.to.name)
 
@@ -128,97 +153,119 @@ class ToscaParser:
                     con.alias = con.to.name
                     con.to = con.to.host_container
 
+    @staticmethod
+    def _set_container_properties(container, properties):
+        if 'env_variable' in properties:
+            container.env = properties.get('env_variable')
+        if 'command' in properties:
+            container.cmd = properties.get('command')
+        if 'ports' in properties:
+            container.ports = properties.get('ports')
+        if 'share_data' in properties:
+            container.share_data = properties.get('share_data')
+
+    @staticmethod
+    def _set_operation_inputs(software, interfaces):
+        for name, interface in (interfaces or {}).items():
+            for k, v in interface.items():
+                if 'inputs' in v and k in software.interfaces.get(name, {}):
+                    software.interfaces[name][k]['inputs'] = v['inputs']
+
+    @staticmethod
+    def update_inputs(template, inputs):
+        """ Update the TOSCA inputs of a model built by build_model.
+
+        Only the functions depending on the changed inputs are re-resolved, and
+        only the nodes holding them are refreshed (the container properties and
+        the inputs of the lifecycle operations).
+
+        Args:
+            template (Template): The model.
+            inputs (Dict): The new TOSCA inputs (the defaults otherwise).
+
+        Returns the names of the refreshed nodes.
+        """
+
+        resolver = template.functions
+        names = sorted({site.owner for site in resolver.update_inputs(inputs)
+                        if site.path[0] == 'node_templates'})
+        for name in names:
+            node = template[name]
+            node_tpl = resolver.node_template(name)
+            if isinstance(node, Container):
+                ToscaParser._set_container_properties(node, node_tpl.get('properties') or {})
+            elif isinstance(node, Software):
+                ToscaParser._set_operation_inputs(node, node_tpl.get('interfaces'))
+            logger.debug('Refreshed node after the inputs update', node=name)
+        return names
+
     @staticmethod
     def _parse_functions(tosca_template, inputs, base_path):
         """ Parse TOSCA functions.
-        
-        This function walks throught the TOSCA template searching for TOSCA functions
-        placeholders, then it updates the original template by resolving them.
-
-        e.g.
-        # topology_template:
-        #   inputs:
-        #     api_port:
-        #       type: integer
-        #       default: 8000
-        #       description: API port
-        # ...
-        # node_templates:
-        #   maven:
-        #     ...
-        #   properties:
-        #     ports:
-        #       8080: { get_input: api_port }   =resolved=
+
+        The TOSCA functions placeholders of the node templates and of the outputs
+        are resolved in place (see app.tosca.functions).
 
         Args:
             tosca_template (object): The (toscaparser) template.
             inputs (Dict): A dictionary containing TOSCA inputs.
             base_path (str): The path of the TOSCA-based application.
 
+        Returns the FunctionResolver, for updating the inputs later on.
         """
 
-        def get(name, value, args):
-            """ Returns the result of a TOSCA function. """
+        resolver = FunctionResolver(tosca_template.topology_template.tpl, base_path)
+        resolver.resolve(inputs)
+        return resolver
 
-            if 'SELF' == args[0]:
-                args[0] = name
-            return get_attributes(args[1:], nodes[args[0]][value])
+    @staticmethod
+    def _is_trusted(manifest_path):
+        """ A manifest is trusted if it has a valid stamp (see app.tosca.stamp)
+        and the full validation is not forced. """
 
-        def parse_node(name, node, tosca_inputs):
-            """ Parse a TOSCA node and update the node's attributes by resolving
-            inputs/outputs functions.
-            
-            Args:
-                name (str): The node name.
-                node: A dict containing the attributes associated to the node.
-                    (e.g. type, artifacts, requirements, interfaces, properties)
-                tosca_inputs: A dict containing the inputs associated to the TOSCA
-                    topology template.
-            """
-            for k, v in node.items():
-                # function parsed by toscaparser library
-                if isinstance(v, Function):
-                    node[k] = v.result()
-                elif isinstance(v, dict):   # otherwise
-                    
-                    # get_property function is found
-                    if 'get_property' in v:
-                        node[k] = get(name, 'properties', v['get_property'])
-
-                    # get_artifact function is found
-                    elif 'get_artifact' in v:
-                        art = get(name, 'artifacts', v['get_artifact'])
-                        node[k] = File(
-                            None,
-                            os.path.abspath(os.path.join(base_path, art)))
-                        
-                    # get_input function is found
-                    elif 'get_input' in v:
-                        if v['get_input'] in inputs:
-                            node[k] = inputs[v['get_input']]
-                        else:
-                            node[k] = tosca_inputs[v['get_input']]['default']
+        if AppConfig._TOSCA_FULL_VALIDATION:
+            return False
+        return verify_stamp(manifest_path, AppConfig._TOSCA_STAMP_KEY)
 
-                    else:
-                        parse_node(name, v, tosca_inputs)
+    @staticmethod
+    def _validated_template(manifest_path):
+        """ The toscaparser model of the manifest (imported here, it's slow to load).
 
-        nodes = tosca_template.topology_template.tpl['node_templates']
+        toscaparser makes the built-in validation of the node templates and
+        of the required fields.
+        """
 
-        tosca_inputs = None
-        if 'inputs' in tosca_template.topology_template.tpl:
-            tosca_inputs = tosca_template.topology_template.tpl['inputs']
+        from toscaparser.common.exception import ValidationError
+        from toscaparser.tosca_template import ToscaTemplate
 
-        for k, v in nodes.items():
-            parse_node(k, v, tosca_inputs)
+        try:
+            return ToscaTemplate(manifest_path)
+
+        # an error is occurred during the built-in validation of toscaparser's ToscaTemplate
+        except ValidationError as err:
+            # search the error line in the report
+            error_msg = None
+            for item in str(err).split("\n"):
+                for validation_error in _VALIDATION_ERRORS.keys():
+                    if validation_error in item:
+                        error_msg = item.replace(validation_error+':', '')
+                        break
+            if error_msg is not None:
+                logger.error('%s', error_msg)
+            else:
+                logger.error('An unknown error occurred during the validation of the manifest', error=err)
+            
+            raise ParsingError(CommonErrorMessages._DEFAULT_PARSING_ERROR_MSG)
 
-        tosca_outputs = None
-        if 'outputs' in tosca_template.topology_template.tpl:
-            tosca_outputs = tosca_template.topology_template.tpl['outputs']
-            for k, v in tosca_outputs.items():
-                parse_node(k, v, tosca_inputs)
+    def build_model(self, manifest_path, inputs=None, trusted=None):
+        """ Build the model representing the TOSCA-based application.
 
-    def build_model(self, manifest_path, inputs=None):
-        """ Build the model representing the TOSCA-based application. """
+        Args:
+            manifest_path (str): The path of the TOSCA manifest.
+            inputs (Dict): The TOSCA inputs (the defaults otherwise).
+            trusted (bool): skip the toscaparser validation (by default only
+                if the manifest has a valid stamp).
+        """
 
         if not os.path.exists(manifest_path):
             raise ValueError('The Manifest file {} doesn\'t exists'.format(manifest_path))
@@ -226,37 +273,42 @@ class ToscaParser:
         if inputs is None:
             inputs = {}
 
+        if trusted is None:
+            trusted = ToscaParser._is_trusted(manifest_path)
+
         try:
             manifest_file = os.path.basename(manifest_path)
             app_name, _ = os.path.splitext(manifest_file)
 
-            # toscaparser Model for tosca-based applications
-            # (Built-in validation for node_templates and required fields)
-            tosca = ToscaTemplate(manifest_path)
+            if trusted:
+                # the manifest was already validated (e.g. by the toskose tool)
+                logger.info('Loading the trusted manifest (validation skipped)', manifest=manifest_file)
+                tosca = TrustedToscaTemplate(manifest_path)
+            else:
+                tosca = ToscaParser._validated_template(manifest_path)
 
             # Note: tosca.path is the path to the manifest file
             base_path = '/'.join(tosca.path.split('/')[:-1])
-            logger.debug('Tosca application [{0}] located in: [{1}]'.format(
-                app_name, base_path))
+            logger.debug('Tosca application located', application=app_name, path=base_path)
 
             # Check Repositories
             repositories = tosca.tpl.get('repositories')
             if not repositories:
-                logger.error('No repositories found in {}'.format(
-                    manifest_file))
+                logger.error('No repositories found', manifest=manifest_file)
                 raise ParsingError(CommonErrorMessages._DEFAULT_PARSING_ERROR_MSG)
 
             # Check Topology Template
             topology_template = tosca.tpl.get('topology_template')
             if not topology_template:
-                logger.error('No topology template found in {}'.format(manifest_file))
+                logger.error('No topology template found', manifest=manifest_file)
                 raise ParsingError(CommonErrorMessages._DEFAULT_PARSING_ERROR_MSG)
 
             # Resolve TOSCA functions
-            ToscaParser._parse_functions(tosca, inputs, base_path)
+            resolver = ToscaParser._parse_functions(tosca, inputs, base_path)
             
             # THE model (our custom model)
             template = Template(app_name)
+            template.functions = resolver
 
             if hasattr(tosca, 'description'):
                 template.description = tosca.tpl.get('description')
@@ -273,7 +325,7 @@ class ToscaParser:
                         #TODO check if it's an URL (remote file with types, DL it)
                         #assuming local file
                         template.add_import(k,os.path.join(base_path, v))
-                        logger.debug('Added Import: {0}:{1}'.format(k,v))
+                        logger.debug('Added Import', name=k, path=v)
 
             template.tmp_dir = os.path.dirname(os.path.abspath(manifest_path))
             template.manifest_path = manifest_path
@@ -283,20 +335,19 @@ class ToscaParser:
                 
                 nodeObj = None
 
-                logger.debug('Parsing node [{0}] of type: [{1}]'.format(node.name, node.type))
+                logger.debug('Parsing node', node=node.name, type=node.type)
 
                 # Container Node
                 if node.is_derived_from(ToscaNodeTypes.CONTAINER):
                     nodeObj = Container(node.name)
 
                     # artifacts
-                    logger.debug('Collecting artifacts from node [{0}] of type [{1}]'.format(node.name, node.type))
+                    logger.debug('Collecting artifacts', node=node.name, type=node.type)
 
                     artifacts = node.entity_tpl.get('artifacts')
                     if artifacts:
                         if not isinstance(artifacts, dict):
-                            logger.error('Artifacts from node [{0}] of type [{1}] is invalid, only a dict is allowed.'.format(
-                                node.name, node.type))
+                            logger.error('Invalid artifacts, only a dict is allowed', node=node.name, type=node.type)
                             raise ParsingError(CommonErrorMessages._DEFAULT_PARSING_ERROR_MSG)
                         
                         for k, v in artifacts.items():
@@ -304,11 +355,10 @@ class ToscaParser:
                             # docker section
                             if k == 'my_image':
                                 if not isinstance(v, dict):
-                                    logger.error('Docker artifact from node [{0}] of type [{1}] is invalid, only a dict is allowed.'.format(
-                                        node.name, node.type))
+                                    logger.error('Invalid Docker artifact, only a dict is allowed', node=node.name, type=node.type)
                                     raise ParsingError(CommonErrorMessages._DEFAULT_PARSING_ERROR_MSG)
 
-                                logger.debug('Parsing the Docker artifact from node [{0}] of type [{1}]'.format(node.name, node.type))
+                                logger.debug('Parsing the Docker artifact', node=node.name, type=node.type)
                             
                                 image_name = v.get('file')
                                 artifact_type = v.get('type')
@@ -324,8 +374,8 @@ class ToscaParser:
                                     image_fields_error = 'missing the "repository" field'
 
                                 if image_fields_error:
-                                    logger.error('Failed to parse the docker artifact from node [{0}] of type [{1}]: {2}'.format(
-                                        node.name, node.type, image_fields_error))
+                                    logger.error('Failed to parse the Docker artifact', node=node.name, type=node.type,
+                                                 error=image_fields_error)
                                     raise ParsingError(CommonErrorMessages._DEFAULT_PARSING_ERROR_MSG)
 
                                 # handling the artifact
@@ -333,7 +383,7 @@ class ToscaParser:
                                     raise NotImplementedError('Dockerfile as docker artifact is not supported yet')
                                 
                                 elif artifact_type == ToscaNodeArtifactTypes.IMAGE or artifact_type == ToscaNodeArtifactTypes.IMAGE_EXE:
-                                    logger.debug('Parsing the Docker Image of the Docker artifact from node [{0}] of type [{1}]'.format(node.name, node.type))
+                                    logger.debug('Parsing the Docker Image of the Docker artifact', node=node.name, type=node.type)
 
                                     nodeObj.image = DockerImageExecutable(image_name) \
                                         if (artifact_type == ToscaNodeArtifactTypes.IMAGE_EXE) \
@@ -346,34 +396,23 @@ class ToscaParser:
                                             nodeObj.image = '/'.join([repository.strip('/'), nodeObj.image.format.strip('/')])
 
                                 else:
-                                    logger.error('Docker artifact from node [{0}] of type [{1}] has an unknown type'.format(
-                                        node.name, node.type))
+                                    logger.error('Unknown type of Docker artifact', node=node.name, type=node.type)
                                     raise ParsingError(CommonErrorMessages._DEFAULT_PARSING_ERROR_MSG)
 
                             else:
-                                logger.error('Missing the Docker section in the node [{0}] of type [{1}]'.format(
-                                    node.name, node.type))
+                                logger.error('Missing the Docker section', node=node.name, type=node.type)
                                 raise ParsingError(CommonErrorMessages._DEFAULT_PARSING_ERROR_MSG)
 
                     # properties
-                    logger.debug('Collecting properties from node [{0}] of type [{1}]'.format(node.name, node.type))
+                    logger.debug('Collecting properties', node=node.name, type=node.type)
 
                     properties = node.entity_tpl.get('properties')
                     if properties:
                         if not isinstance(properties, dict):
-                            logger.error('Properties from node [{0}] of type [{1}] is invalid, only a dict is allowed.'.format(
-                                node.name, node.type))
+                            logger.error('Invalid properties, only a dict is allowed', node=node.name, type=node.type)
                             raise ParsingError(CommonErrorMessages._DEFAULT_PARSING_ERROR_MSG)
 
-                        # handling properties
-                        if 'env_variable' in properties:
-                            nodeObj.env = properties.get('env_variable')
-                        if 'command' in properties:
-                            nodeObj.cmd = properties.get('command')
-                        if 'ports' in properties:
-                            nodeObj.ports = properties.get('ports')
-                        if 'share_data' in properties:
-                            nodeObj.share_data = properties.get('share_data')
+                        ToscaParser._set_container_properties(nodeObj, properties)
                     
                 # Volume Node
                 elif node.is_derived_from(ToscaNodeTypes.VOLUME):
@@ -388,18 +427,15 @@ class ToscaParser:
                     # Artifacts
                     artifacts = node.entity_tpl.get('artifacts')
                     if artifacts:
-                        logger.debug('Detected artifacts in node [{0}] of type [{1}]: {2}'.format(
-                            node.name, node.type, artifacts))
+                        logger.debug('Detected artifacts', node=node.name, type=node.type, artifacts=artifacts)
                         for art_name, art_path in artifacts.items():
                             nodeObj.add_artifact(File(art_name,os.path.abspath(os.path.join(base_path, art_path))))
-                            logger.debug('Added new artifact for node [{0}] of type [{1}]. Current artifacts: {2}'.format(
-                                node.name, node.type, nodeObj.artifacts))
+                            logger.debug('Added new artifact', node=node.name, type=node.type, artifact=art_name)
 
                     # Interfaces
                     interfaces = node.entity_tpl.get('interfaces')
                     if interfaces:
-                        logger.debug('Detected interfaces in node [{0}] of type [{1}]: {2}'.format(
-                            node.name, node.type, interfaces))
+                        logger.debug('Detected interfaces', node=node.name, type=node.type, interfaces=list(interfaces))
                         parsed_interfaces = {}
                         for name, interface in interfaces.items():
                             parsed_interfaces[name] = parsed_interface = {}
@@ -408,17 +444,18 @@ class ToscaParser:
                                 if 'implementation' in v:
                                     abs_path = os.path.abspath(os.path.join(base_path, v['implementation']))
                                     operation['cmd'] = File(None, abs_path)
-                                    logger.debug('Detected an implementation. Path: {0} - File: {1}'.format(
-                                        operation['cmd'].path, operation['cmd'].file))
+                                    logger.debug('Detected an implementation', node=node.name, path=operation['cmd'].path,
+                                                 file=operation['cmd'].file)
                                 if 'inputs' in v:
                                     operation['inputs'] = v['inputs']
-                                    logger.debug('Detected Inputs: {}'.format(
-                                        { k: (v.file_path if isinstance(v, File) else v) for k, v in operation['inputs'].items()}))
+                                    if logger.isEnabledFor(logging.DEBUG):
+                                        logger.debug('Detected Inputs', node=node.name, inputs={
+                                            k: (v.file_path if isinstance(v, File) else v) for k, v in operation['inputs'].items()})
 
                         nodeObj.interfaces = parsed_interfaces
                     
                 else:
-                    logger.error('Node type {} not supported'.format(node.type))
+                    logger.error('Node type not supported', node=node.name, type=node.type)
                     raise ParsingError(CommonErrorMessages._DEFAULT_PARSING_ERROR_MSG)
 
                 # Requirements
@@ -430,8 +467,8 @@ class ToscaParser:
                     target = value['node'] if isinstance(value, dict) else value
 
                     req_type = get_req_type(name)
-                    logger.debug('Detected requirement in node [{0}] of type [{1}] - target: [{2}], requirement type: [{3}]'.format(
-                        node.name, node.type, target, req_type))
+                    logger.debug('Detected requirement', node=node.name, type=node.type, target=target,
+                                 requirement=req_type)
 
                     if req_type == ToscaRequirementTypes.REL_CONNECT:
                         nodeObj.add_connection(target)
@@ -462,19 +499,3 @@ class ToscaParser:
         except ValueError as err:
             logger.exception(err)
             raise ParsingError(CommonErrorMessages._DEFAULT_PARSING_ERROR_MSG)
-        
-        # an error is occurred during the built-in validation of toscaparser's ToscaTemplate
-        except ValidationError as err:
-            # search the error line in the report
-            error_msg = None
-            for item in str(err).split("\n"):
-                for validation_error in _VALIDATION_ERRORS.keys():
-                    if validation_error in item:
-                        error_msg = item.replace(validation_error+':', '')
-                        break
-            if error_msg is not None:
-                logger.error('{}'.format(error_msg))
-            else:
-                logger.error('An unknown error occurred during the validation of the manifest: {}'.format(err))
-            
-            raise ParsingError(CommonErrorMessages._DEFAULT_PARSING_ERROR_MSG)
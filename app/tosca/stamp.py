@@ -0,0 +1,139 @@
+"""
+Validation stamps of the TOSCA manifests.
+
+A stamp (<manifest>.stamp) records the digest of a manifest, and of the files
+it imports, once the manifest passed the full toscaparser validation (e.g. by
+the toskose tool when the images are built). A manifest with a matching stamp
+is trusted: the manager builds its model directly from the YAML, without
+validating it again.
+
+The digest is a SHA-256 hash or, if a key is given (TOSKOSE_TOSCA_STAMP_KEY),
+an HMAC-SHA256 signature.
+
+Usage: python -m app.tosca.stamp <manifest> [--no-validation]
+"""
+
+import argparse
+import hashlib
+import hmac
+import os
+import shutil
+import sys
+import tempfile
+
+from app.config import AppConfig
+from app.core.exceptions import MalformedConfigurationError, ParsingError
+from app.core.loader import Loader
+from app.core.logging import LoggingFacility
+
+
+logger = LoggingFacility.get_instance().get_logger()
+
+STAMP_SUFFIX = '.stamp'
+IMPORTS_DIR = 'imports'
+
+
+def stamp_path(manifest_path):
+    return manifest_path + STAMP_SUFFIX
+
+
+def resolve_import(base_path, import_path):
+    """ The local path of an import (next to the manifest or in the imports dir). """
+
+    path = os.path.join(base_path, import_path)
+    if not os.path.exists(path):
+        path = os.path.join(base_path, IMPORTS_DIR, import_path)
+    return path
+
+
+def _stamped_files(manifest_path):
+    base_path = os.path.dirname(os.path.abspath(manifest_path))
+    files = [manifest_path]
+    manifest = Loader().load(manifest_path) or {}
+    for imp in manifest.get('imports') or []:
+        for import_path in (imp.values() if isinstance(imp, dict) else [imp]):
+            files.append(resolve_import(base_path, import_path))
+    return files
+
+
+def manifest_digest(manifest_path, key=None):
+    """ The digest of a manifest and of its imports (e.g. sha256:<hex>). """
+
+    if key is None:
+        digest, prefix = hashlib.sha256(), 'sha256'
+    else:
+        digest, prefix = hmac.new(key.encode('utf-8'), digestmod=hashlib.sha256), 'hmac-sha256'
+
+    for path in _stamped_files(manifest_path):
+        with open(path, 'rb') as f:
+            content = f.read()
+        # the length avoids ambiguities when concatenating the files
+        digest.update('{}:{}\n'.format(os.path.basename(path), len(content)).encode('utf-8'))
+        digest.update(content)
+    return '{}:{}'.format(prefix, digest.hexdigest())
+
+
+def write_stamp(manifest_path, key=None):
+    path = stamp_path(manifest_path)
+    with open(path, 'w') as f:
+        f.write(manifest_digest(manifest_path, key) + '\n')
+    return path
+
+
+def verify_stamp(manifest_path, key=None):
+    """ True if the manifest has a stamp matching its current content. """
+
+    path = stamp_path(manifest_path)
+    if not os.path.exists(path):
+        logger.debug('No validation stamp', manifest=manifest_path)
+        return False
+
+    with open(path, 'r') as f:
+        stamp = f.read().strip()
+    try:
+        digest = manifest_digest(manifest_path, key)
+    except (OSError, ValueError, MalformedConfigurationError) as err:
+        logger.warn('Cannot verify the validation stamp', manifest=manifest_path, error=err)
+        return False
+
+    if not hmac.compare_digest(stamp, digest):
+        logger.warn('The validation stamp doesn\'t match the manifest', manifest=manifest_path)
+        return False
+    return True
+
+
+def _validate(manifest_path):
+    """ Run the full validation (toscaparser wants the imports next to the manifest). """
+
+    from app.tosca.parser import ToscaParser
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        manifest_dir = os.path.join(tmp_dir, 'manifest')
+        shutil.copytree(os.path.dirname(os.path.abspath(manifest_path)), manifest_dir)
+        imports_dir = os.path.join(manifest_dir, IMPORTS_DIR)
+        if os.path.isdir(imports_dir):
+            for file in os.listdir(imports_dir):
+                shutil.move(os.path.join(imports_dir, file), manifest_dir)
+        ToscaParser().build_model(
+            os.path.join(manifest_dir, os.path.basename(manifest_path)), trusted=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Validate and stamp a TOSCA manifest')
+    parser.add_argument('manifest')
+    parser.add_argument('--no-validation', action='store_true',
+                        help='stamp the manifest without validating it')
+    args = parser.parse_args()
+
+    if not args.no_validation:
+        try:
+            _validate(args.manifest)
+        except (ParsingError, ValueError) as err:
+            print('The manifest {0} is invalid: {1}'.format(args.manifest, err), file=sys.stderr)
+            return 1
+    print(write_stamp(args.manifest, AppConfig._TOSCA_STAMP_KEY))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
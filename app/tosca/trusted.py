@@ -0,0 +1,114 @@
+"""
+A parse-only stand-in for toscaparser's ToscaTemplate.
+
+It loads a (trusted, see app.tosca.stamp) manifest and its imports as plain
+YAML and exposes the small subset of the ToscaTemplate/NodeTemplate
+interface used by ToscaParser.build_model, so the model is built without the
+type-hierarchy validation of toscaparser.
+"""
+
+import os
+
+from app.core.exceptions import ParsingError
+from app.core.loader import Loader
+from app.core.logging import LoggingFacility
+
+
+logger = LoggingFacility.get_instance().get_logger()
+
+
+class _TopologyTemplate:
+
+    __slots__ = ('tpl',)
+
+    def __init__(self, tpl):
+        self.tpl = tpl
+
+
+class _NodeType:
+    """ A node type and its ancestors (e.g. APISoftware -> tosker.nodes.Software -> ...). """
+
+    __slots__ = ('ancestry', 'requirements')
+
+    def __init__(self, name, node_types):
+        self.ancestry = []
+        self.requirements = []
+        seen = set()
+        current = name
+        while current is not None and current not in seen:
+            seen.add(current)
+            self.ancestry.append(current)
+            definition = node_types.get(current) or {}
+            # nearest definitions first (as toscaparser)
+            self.requirements += definition.get('requirements') or []
+            current = definition.get('derived_from')
+
+
+class TrustedOutput:
+    """ An output of the topology template (as toscaparser's Output). """
+
+    __slots__ = ('name', 'attrs')
+
+    def __init__(self, name, attrs):
+        self.name = name
+        self.attrs = attrs if isinstance(attrs, dict) else {}
+
+    @property
+    def description(self):
+        return self.attrs.get('description')
+
+    @property
+    def value(self):
+        return self.attrs.get('value')
+
+
+class TrustedNodeTemplate:
+
+    __slots__ = ('name', 'type', 'entity_tpl', 'type_definition')
+
+    def __init__(self, name, entity_tpl, type_definition):
+        self.name = name
+        self.type = entity_tpl.get('type')
+        self.entity_tpl = entity_tpl
+        self.type_definition = type_definition
+
+    @property
+    def requirements(self):
+        return self.entity_tpl.get('requirements') or []
+
+    def is_derived_from(self, type_str):
+        return type_str in self.type_definition.ancestry
+
+
+class TrustedToscaTemplate:
+    """ Load a TOSCA manifest (and its local imports) without validating it. """
+
+    def __init__(self, path):
+        self.path = path
+        # a private copy: the TOSCA functions are resolved in place
+        self.tpl = Loader().load(path, cache=False)
+        if not isinstance(self.tpl, dict):
+            logger.error('The manifest is not a YAML map', manifest=path)
+            raise ParsingError('The manifest {} is not a YAML map'.format(path))
+
+        base_path = os.path.dirname(os.path.abspath(path))
+        node_types = {}
+        for imp in self.tpl.get('imports') or []:
+            for import_path in (imp.values() if isinstance(imp, dict) else [imp]):
+                imported = Loader().load(os.path.join(base_path, import_path)) or {}
+                node_types.update(imported.get('node_types') or {})
+        node_types.update(self.tpl.get('node_types') or {})
+
+        self.description = self.tpl.get('description')
+        self.topology_template = _TopologyTemplate(self.tpl.get('topology_template') or {})
+
+        self.outputs = [TrustedOutput(name, attrs) for name, attrs
+                        in (self.topology_template.tpl.get('outputs') or {}).items()]
+
+        types = {}
+        self.nodetemplates = []
+        for name, entity_tpl in (self.topology_template.tpl.get('node_templates') or {}).items():
+            type_name = entity_tpl.get('type')
+            if type_name not in types:
+                types[type_name] = _NodeType(type_name, node_types)
+            self.nodetemplates.append(TrustedNodeTemplate(name, entity_tpl, types[type_name]))
@@ -51,6 +51,7 @@ docker-compose -f $DOCKER_COMPOSE up -d
 
 export TOSKOSE_LOGS_PATH=$LOGS_PATH
 export TOSKOSE_APP_MODE=development
+export TOSKOSE_LOGS_LEVEL=DEBUG
 export FLASK_ENV=development
 export FLASK_APP=run.py
 
@@ -1,4 +1,12 @@
+# gthread workers: a blocking supervisord RPC holds a thread, not a whole worker
+# process, so a few slow nodes don't exhaust the capacity of the manager.
+# The jobs and the event streams are kept by the worker process serving them
+# (keep a single worker unless the requests are routed by client).
 gunicorn \
 --bind 0.0.0.0:${TOSKOSE_MANAGER_PORT} \
+--worker-class ${TOSKOSE_WORKER_CLASS:-gthread} \
+--workers ${TOSKOSE_WORKERS:-1} \
+--threads ${TOSKOSE_THREADS:-32} \
+--timeout ${TOSKOSE_WORKER_TIMEOUT:-120} \
 --chdir /toskose/source \
 'app.run:create_app()'
@@ -0,0 +1,154 @@
+""" Latency and throughput of the API against a local fleet of fake supervisord.
+
+The manager is built in-process on a synthetic deployment (see fleet.py) and
+driven through the Flask test client by --concurrency threads, scenario by
+scenario:
+
+- node list: GET /api/v1/node/
+- node info: GET /api/v1/node/<node>
+- lifecycle: POST (start) and DELETE (stop) /api/v1/node/<node>/<component>/<operation>
+- operation info: GET /api/v1/node/<node>/<component>/<operation>
+- operation log: GET /api/v1/node/<node>/<component>/<operation>/log
+- node log: GET /api/v1/node/<node>/log
+
+The API cache is disabled (unless --cache), so every request reaches the
+client and service layers.
+
+Usage: python -m tests.benchmarks.bench_api [--nodes N] [--hosted N]
+    [--latency S] [--failure-rate R] [--log-size KB] [--protocol XMLRPC|JSONRPC]
+    [--requests N] [--concurrency N] [--scenario NAME ...] [--cache] [--json] 2>/dev/null
+
+(the manager logs to stderr)
+"""
+
+import argparse
+import json
+import os
+import statistics
+import threading
+import time
+
+from tests.benchmarks.fleet import OPERATIONS, Fleet, component_name, node_name
+
+SCENARIOS = ('node list', 'node info', 'lifecycle', 'operation info', 'operation log', 'node log')
+
+
+def targets(fleet):
+    """ All the lifecycle operations of the fleet as (node, component, operation). """
+
+    return [(node_name(i), component_name(i, j), op)
+            for i in range(fleet.nodes) for j in range(fleet.hosted) for op in OPERATIONS]
+
+
+def scenarios(fleet, log_length):
+    """ name -> function(client, k) sending the k-th request(s) of the scenario,
+    returning the response status codes. """
+
+    operations = targets(fleet)
+
+    def operation_path(k):
+        return '/api/v1/node/{}/{}/{}'.format(*operations[k % len(operations)])
+
+    def lifecycle(client, k):
+        path = operation_path(k)
+        return [client.post(path).status_code, client.delete(path).status_code]
+
+    return {
+        'node list': lambda client, k: [client.get('/api/v1/node/').status_code],
+        'node info': lambda client, k: [
+            client.get('/api/v1/node/{}'.format(node_name(k % fleet.nodes))).status_code],
+        'lifecycle': lifecycle,
+        'operation info': lambda client, k: [client.get(operation_path(k)).status_code],
+        'operation log': lambda client, k: [client.get(
+            '{}/log?std_type=stdout&offset=0&length={}'.format(operation_path(k), log_length)).status_code],
+        'node log': lambda client, k: [client.get('/api/v1/node/{}/log?offset=0&length={}'.format(
+            node_name(k % fleet.nodes), log_length)).status_code],
+    }
+
+
+def run(app, scenario, requests, concurrency):
+    """ Send the requests of a scenario from concurrent clients. """
+
+    timings = []
+    errors = []
+    lock = threading.Lock()
+
+    def worker(offset):
+        client = app.test_client()
+        for k in range(offset, requests, concurrency):
+            start = time.perf_counter()
+            codes = scenario(client, k)
+            elapsed = (time.perf_counter() - start) * 1000
+            with lock:
+                timings.append(elapsed)
+                errors.extend(code for code in codes if code >= 400)
+
+    start = time.perf_counter()
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(concurrency)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    timings.sort()
+    return {
+        'requests': len(timings),
+        'errors': len(errors),
+        'p50': statistics.median(timings),
+        'p99': timings[min(len(timings) - 1, int(len(timings) * 0.99))],
+        'throughput': len(timings) / elapsed,
+    }
+
+
+def main():
+    argparser = argparse.ArgumentParser(description=__doc__)
+    argparser.add_argument('--nodes', type=int, default=10)
+    argparser.add_argument('--hosted', type=int, default=2, help='components per node')
+    argparser.add_argument('--latency', type=float, default=0.0, help='seconds per RPC')
+    argparser.add_argument('--failure-rate', type=float, default=0.0, help='probability of a failing RPC')
+    argparser.add_argument('--log-size', type=int, default=64, help='KB per log')
+    argparser.add_argument('--protocol', choices=['XMLRPC', 'JSONRPC'], default='XMLRPC')
+    argparser.add_argument('--requests', type=int, default=200, help='per scenario')
+    argparser.add_argument('--concurrency', type=int, default=8)
+    argparser.add_argument('--scenario', action='append', choices=SCENARIOS,
+                           help='run only these scenarios')
+    argparser.add_argument('--cache', action='store_true', help='keep the API cache enabled')
+    argparser.add_argument('--json', action='store_true', help='print the results as JSON')
+    args = argparser.parse_args()
+
+    with Fleet(nodes=args.nodes, hosted=args.hosted, latency=args.latency,
+               failure_rate=args.failure_rate, log_size=args.log_size * 1024,
+               protocol=args.protocol) as fleet:
+        # the configuration is read from the environment on import
+        os.environ.update(fleet.environ(), TOSKOSE_STARTUP_WARM_UP='false')
+        if not args.cache:
+            os.environ['TOSKOSE_API_CACHE_TTL'] = '0'
+        from app.manager import ToskoseManager
+        from app.run import create_app
+
+        app = create_app()
+        start = time.perf_counter()
+        ToskoseManager.get_instance().ensure_initialized()
+        startup = (time.perf_counter() - start) * 1000
+
+        selected = scenarios(fleet, args.log_size * 1024)
+        results = {}
+        for name in args.scenario or SCENARIOS:
+            results[name] = run(app, selected[name], args.requests, args.concurrency)
+
+    if args.json:
+        print(json.dumps({'args': vars(args), 'startup': startup, 'results': results}, indent=2))
+        return
+
+    print('{} nodes, {} components each, {} ({}s/RPC, {:.0%} failures), initialization {:.1f} ms'.format(
+        args.nodes, args.hosted, args.protocol, args.latency, args.failure_rate, startup))
+    print('{:<16} {:>8} {:>7} {:>10} {:>10} {:>10}'.format(
+        'scenario', 'requests', 'errors', 'p50 ms', 'p99 ms', 'req/s'))
+    for name, result in results.items():
+        print('{:<16} {requests:>8} {errors:>7} {p50:>10.2f} {p99:>10.2f} {throughput:>10.1f}'.format(
+            name, **result))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,177 @@
+""" Load test of the manager server: the requests to the responsive nodes must
+not queue behind the requests to a slow node.
+
+The nodes of the thinking case study are replaced by stand-in supervisord:
+maven answers every RPC after --latency seconds, node answers at once. The
+manager is served by gunicorn with the settings of entrypoint.sh, while
+--slow clients keep requesting the slow node and --fast clients the
+responsive one (the API cache is disabled).
+
+Usage: python -m tests.benchmarks.bench_concurrency [--worker-class sync|gthread]
+    [--workers N] [--threads N] [--latency S] [--duration S] [--budget MS]
+
+Exits with 1 if the p99 latency of the requests to the responsive node is
+over budget, e.g. with --worker-class sync --threads 1 (the sync workers of
+the previous entrypoint: with more threads gunicorn uses gthread anyway).
+"""
+
+import argparse
+import os
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+
+from ruamel.yaml import YAML
+
+from tests.benchmarks.fake_supervisord import FakeSupervisor, FakeSupervisordServer
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+CASE_STUDY_DIR = os.path.join(ROOT_DIR, 'tests', 'data', 'thinking')
+OPERATIONS = ['create', 'configure', 'start', 'stop', 'delete']
+
+
+def deploy(base_dir, servers):
+    """ The config and the manifest of the thinking case study, with the nodes
+    served by the stand-in supervisord. """
+
+    config_dir = os.path.join(base_dir, 'config')
+    manifest_dir = os.path.join(base_dir, 'manifest')
+    os.makedirs(config_dir)
+    shutil.copytree(os.path.join(CASE_STUDY_DIR, 'manifest'), manifest_dir)
+
+    yaml = YAML(typ='safe')
+    with open(os.path.join(CASE_STUDY_DIR, 'config', 'toskose.yml')) as f:
+        config = yaml.load(f)
+    for node_id, server in servers.items():
+        config['nodes'][node_id].update(alias=server.host, port=server.xmlrpc_port)
+    with open(os.path.join(config_dir, 'toskose.yml'), 'w') as f:
+        yaml.dump(config, f)
+
+    return config_dir, manifest_dir
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def serve(args, config_dir, manifest_dir, logs_dir):
+    """ Run the manager with gunicorn (as entrypoint.sh does). """
+
+    port = free_port()
+    env = dict(os.environ,
+               TOSKOSE_APP_MODE='testing',
+               TOSKOSE_CONFIG_PATH=config_dir,
+               TOSKOSE_TOSCA_MANIFEST_PATH=manifest_dir,
+               TOSKOSE_LOGS_PATH=logs_dir,
+               TOSKOSE_API_CACHE_TTL='0')
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn',
+         '--bind', '127.0.0.1:{}'.format(port),
+         '--worker-class', args.worker_class,
+         '--workers', str(args.workers),
+         '--threads', str(args.threads),
+         '--timeout', '120',
+         '--chdir', ROOT_DIR,
+         'app.run:create_app()'],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    url = 'http://127.0.0.1:{}'.format(port)
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(url + '/readyz', timeout=1):
+                return process, url
+        except (OSError, urllib.error.HTTPError):
+            time.sleep(0.2)
+    process.kill()
+    raise RuntimeError('the manager is not ready after 30s')
+
+
+def load(url, path, until, timings, errors):
+    while time.monotonic() < until:
+        start = time.perf_counter()
+        try:
+            with urllib.request.urlopen(url + path, timeout=120) as response:
+                response.read()
+            timings.append((time.perf_counter() - start) * 1000)
+        except OSError:
+            errors.append(path)
+
+
+def report(name, timings, errors):
+    if not timings:
+        print('{:<28} no request completed ({} errors)'.format(name, len(errors)))
+        return float('inf')
+    timings = sorted(timings)
+    p99 = timings[min(len(timings) - 1, int(len(timings) * 0.99))]
+    print('{:<28} {:>5} requests  p50 {:>8.1f} ms  p99 {:>8.1f} ms  max {:>8.1f} ms  ({} errors)'.format(
+        name, len(timings), statistics.median(timings), p99, timings[-1], len(errors)))
+    return p99
+
+
+def main():
+    argparser = argparse.ArgumentParser(description=__doc__)
+    argparser.add_argument('--worker-class', default='gthread')
+    argparser.add_argument('--workers', type=int, default=1)
+    argparser.add_argument('--threads', type=int, default=32)
+    argparser.add_argument('--latency', type=float, default=0.2, help='seconds per RPC of the slow node')
+    argparser.add_argument('--slow', type=int, default=8, help='clients of the slow node')
+    argparser.add_argument('--fast', type=int, default=4, help='clients of the responsive node')
+    argparser.add_argument('--duration', type=float, default=10, help='seconds')
+    argparser.add_argument('--budget', type=float, default=250, help='p99 (ms) of the responsive node')
+    args = argparser.parse_args()
+
+    servers = {
+        'maven': FakeSupervisordServer(FakeSupervisor(
+            ['api-' + op for op in OPERATIONS], latency=args.latency)),
+        'node': FakeSupervisordServer(FakeSupervisor(['gui-' + op for op in OPERATIONS])),
+    }
+    base_dir = tempfile.mkdtemp(prefix='toskose-bench-')
+    process = None
+    try:
+        for server in servers.values():
+            server.start()
+        config_dir, manifest_dir = deploy(base_dir, servers)
+        process, url = serve(args, config_dir, manifest_dir, os.path.join(base_dir, 'logs'))
+
+        timings = {'maven': [], 'node': []}
+        errors = {'maven': [], 'node': []}
+        until = time.monotonic() + args.duration
+        clients = [threading.Thread(target=load, args=(
+                       url, '/api/v1/node/{}'.format(node_id), until, timings[node_id], errors[node_id]))
+                   for node_id, count in (('maven', args.slow), ('node', args.fast))
+                   for _ in range(count)]
+        for client in clients:
+            client.start()
+        for client in clients:
+            client.join()
+
+        print('{} worker(s), worker class {}, {} thread(s)'.format(
+            args.workers, args.worker_class, args.threads))
+        report('slow node ({}s/RPC)'.format(args.latency), timings['maven'], errors['maven'])
+        p99 = report('responsive node', timings['node'], errors['node'])
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+        for server in servers.values():
+            server.stop()
+        shutil.rmtree(base_dir, ignore_errors=True)
+
+    if p99 > args.budget:
+        print('the requests to the responsive node queue behind the slow node '
+              '(p99 {:.1f} ms, budget {:.0f} ms)'.format(p99, args.budget))
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
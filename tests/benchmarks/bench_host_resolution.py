@@ -0,0 +1,58 @@
+""" Host container resolution on deep synthetic stacks.
+
+Each stack is a chain of software nodes hosted on each other, down to a
+container. The nodes are pushed top-down (the worst order for a resolution
+that memoises only the nodes already visited), and the depth can exceed the
+interpreter recursion limit.
+
+Usage: python -m tests.benchmarks.bench_host_resolution [--stacks N] [--depth N]
+"""
+
+import argparse
+import sys
+import time
+
+from app.core.exceptions import ParsingError
+from app.tosca.model.nodes import Container, Software
+from app.tosca.model.template import Template
+from app.tosca.parser import ToscaParser
+
+
+def build_stacks(stacks, depth, cycle=False):
+    tpl = Template('stacks')
+    for i in range(stacks):
+        container = Container('container{}'.format(i))
+        chain = [Software('stack{}_sw{}'.format(i, level)) for level in range(depth)]
+        # sw0 hosted on sw1, ..., the last one on the container (or on sw0)
+        for lower, upper in zip(chain[1:], chain):
+            upper.host = lower
+        chain[-1].host = chain[0] if cycle else container
+        for node in [container] + chain:
+            node.tpl = tpl
+            tpl.push(node)
+    return tpl
+
+
+def main():
+    argparser = argparse.ArgumentParser(description=__doc__)
+    argparser.add_argument('--stacks', type=int, default=10)
+    argparser.add_argument('--depth', type=int, default=5000)
+    args = argparser.parse_args()
+
+    tpl = build_stacks(args.stacks, args.depth)
+    start = time.perf_counter()
+    ToscaParser._add_extension(tpl)
+    elapsed = time.perf_counter() - start
+
+    assert all(sw.host_container.name.startswith('container') for sw in tpl.software)
+    print('{} stacks x {} levels (recursion limit {}): {:.1f} ms'.format(
+        args.stacks, args.depth, sys.getrecursionlimit(), elapsed * 1000))
+
+    try:
+        ToscaParser._add_extension(build_stacks(1, 4, cycle=True))
+    except ParsingError as err:
+        print('cycle: {}'.format(err))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+""" Import time of the manager (python -X importtime), as a regression gate.
+
+The heavy dependencies (toscaparser, ruamel.yaml, flask_restplus, flask_bcrypt,
+jsonschema, ...) are imported on first use, so importing the app must stay
+cheap and must not load them. The script fails (exit code 1) if one of them is
+imported or if the import time exceeds the budget.
+
+Usage: python -m tests.benchmarks.bench_import_time [--module app.run] [--budget MS] [--top N]
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+
+
+# ruamel.yaml, not its namespace package (ruamel is put in sys.modules at the
+# interpreter startup by the ruamel.yaml-nspkg.pth file)
+LAZY_MODULES = ('toscaparser', 'ruamel.yaml', 'flask_restplus', 'flask_bcrypt',
+                'jsonschema', 'docker', 'distutils')
+
+
+def is_lazy(name):
+    """ True if the module is (in) one of the LAZY_MODULES. """
+
+    return any(name == lazy or name.startswith(lazy + '.') for lazy in LAZY_MODULES)
+
+
+def import_times(module):
+    """ The cumulative import time (ms) of each module imported by `import module`. """
+
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE='1')
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import {}'.format(module)],
+        stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, env=env,
+        universal_newlines=True, check=True)
+
+    times = {}
+    for line in result.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line.split('|')
+        times[name.strip()] = int(cumulative) / 1000
+    return times
+
+
+def main():
+    argparser = argparse.ArgumentParser(description=__doc__)
+    argparser.add_argument('--module', default='app.run')
+    argparser.add_argument('--budget', type=float, default=500, help='ms')
+    argparser.add_argument('--top', type=int, default=10)
+    args = argparser.parse_args()
+
+    times = import_times(args.module)
+    total = times[args.module]
+    for name, elapsed in sorted(times.items(), key=lambda t: t[1], reverse=True)[:args.top]:
+        print('{:>8.1f} ms  {}'.format(elapsed, name))
+
+    failed = False
+    eager = sorted(name for name in times if is_lazy(name))
+    if eager:
+        print('imported eagerly: {}'.format(', '.join(eager)))
+        failed = True
+    if total > args.budget:
+        print('import {}: {:.1f} ms (budget {:.0f} ms)'.format(args.module, total, args.budget))
+        failed = True
+    else:
+        print('import {}: {:.1f} ms (budget {:.0f} ms) OK'.format(args.module, total, args.budget))
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,77 @@
+""" Memory footprint of the TOSCA model on a synthetic topology.
+
+Every container hosts a few software nodes and is attached to a volume,
+every software node connects to the software of the previous container.
+
+Usage: python -m tests.benchmarks.bench_model_memory [--nodes N] [--hosted N]
+"""
+
+import argparse
+import gc
+import time
+import tracemalloc
+
+from app.tosca.model.artifacts import DockerImage, File
+from app.tosca.model.nodes import Container, Software, Volume
+from app.tosca.model.template import Template
+
+
+def build_template(nodes, hosted):
+    """ Build a template of (about) the given number of nodes. """
+
+    tpl = Template('synthetic')
+    group = hosted + 2  # container + volume + hosted software
+    previous = []
+    for i in range(nodes // group):
+        container = Container('container{}'.format(i))
+        container.image = DockerImage('registry/image{}:1.0'.format(i))
+        container.ports = {8080 + i % 100: 8080}
+        volume = Volume('volume{}'.format(i))
+        container.add_volume(volume, '/data')
+        for node in (container, volume):
+            node.tpl = tpl
+            tpl.push(node)
+
+        current = []
+        for j in range(hosted):
+            software = Software('container{}_sw{}'.format(i, j))
+            software.host = container
+            software.add_artifact(File('jar', '/app/sw{}.jar'.format(j)))
+            software.interfaces = {'Standard': {
+                op: {'cmd': File(None, '/app/scripts/{}.sh'.format(op))}
+                for op in ('create', 'configure', 'start', 'stop', 'delete')}}
+            for target in previous:
+                software.add_connection(target)
+            software.tpl = tpl
+            tpl.push(software)
+            tpl.add_hosted(software, container)
+            container.add_hosted_node(software)
+            current.append(software)
+        previous = current[:1]
+    return tpl
+
+
+def main():
+    argparser = argparse.ArgumentParser(description=__doc__)
+    argparser.add_argument('--nodes', type=int, default=5000)
+    argparser.add_argument('--hosted', type=int, default=3)
+    args = argparser.parse_args()
+
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    tpl = build_template(args.nodes, args.hosted)
+    elapsed = time.perf_counter() - start
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    count = len(tpl.nodes)
+    print('{} nodes ({} containers, {} software, {} volumes)'.format(
+        count, len(tpl.containers), len(tpl.software), len(tpl.volumes)))
+    print('build:    {:8.1f} ms'.format(elapsed * 1000))
+    print('retained: {:8.1f} KB ({:.0f} B/node)'.format(current / 1024, current / count))
+    print('peak:     {:8.1f} KB'.format(peak / 1024))
+
+
+if __name__ == '__main__':
+    main()
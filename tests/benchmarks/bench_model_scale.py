@@ -0,0 +1,170 @@
+""" How the model building scales with the size of the topology.
+
+For every size, a synthetic deployment is generated (see fleet.py: every
+container hosts --hosted components, has a volume and every component has
+--dependencies dependencies) and measured in a fresh interpreter:
+
+- parse: ToscaParser.build_model of the trusted (stamped) manifest, and of
+  the validated one with --validate (toscaparser, much slower)
+- peak: the peak memory (tracemalloc) of the parse
+- startup: the first ToskoseManager.initialization (update_model included)
+- reload: a second initialization (as POST /api/v1/node/reload does, the
+  unchanged files are not parsed again)
+
+The results can be saved (--save) and compared with the ones of a previous
+release (--baseline): it exits with 1 if a measure grew more than --tolerance.
+
+Usage: python -m tests.benchmarks.bench_model_scale [--sizes 100,1000,3000]
+    [--hosted N] [--dependencies N] [--validate] [--save FILE]
+    [--baseline FILE] [--tolerance 0.25]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from tests.benchmarks.fleet import generate_config, generate_manifest, node_name, write_deployment
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+MANIFEST_FILE = 'synthetic.yaml'
+MEASURES = ('parse', 'validated_parse', 'peak_kb', 'startup', 'update_model', 'reload')
+
+
+def _timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, (time.perf_counter() - start) * 1000
+
+
+def measure(base_dir, validate):
+    """ Measure a generated deployment (in a fresh interpreter, see main). """
+
+    from app.core.loader import Loader
+    from app.manager import ToskoseManager
+    from app.tosca.parser import ToscaParser
+    from app.tosca.stamp import write_stamp
+
+    # the parser wants the imports next to the manifest (the manager merges them)
+    flat_dir = os.path.join(base_dir, 'flat')
+    os.makedirs(flat_dir)
+    for directory in ('manifest', os.path.join('manifest', 'imports')):
+        for file in os.listdir(os.path.join(base_dir, directory)):
+            path = os.path.join(base_dir, directory, file)
+            if os.path.isfile(path):
+                os.link(path, os.path.join(flat_dir, file))
+    flat_manifest_path = os.path.join(flat_dir, MANIFEST_FILE)
+    results = {}
+
+    # every measure starts with no parsed YAML document cached (but the reload)
+    model, results['parse'] = _timed(ToscaParser().build_model, flat_manifest_path, trusted=True)
+    results['nodes'] = len(model.nodes)
+    del model
+
+    Loader.clear_cache()
+    tracemalloc.start()
+    ToscaParser().build_model(flat_manifest_path, trusted=True)
+    results['peak_kb'] = tracemalloc.get_traced_memory()[1] / 1024
+    tracemalloc.stop()
+
+    if validate:
+        Loader.clear_cache()
+        _, results['validated_parse'] = _timed(
+            ToscaParser().build_model, flat_manifest_path, trusted=False)
+
+    # the manager trusts the stamped manifests (as built by the toskose tool)
+    write_stamp(os.path.join(base_dir, 'manifest', MANIFEST_FILE))
+    manager = ToskoseManager.get_instance()
+    Loader.clear_cache()
+    _, results['startup'] = _timed(manager.initialization)
+    results['update_model'] = manager.startup_timings['update_model']
+    _, results['reload'] = _timed(manager.initialization)
+    return results
+
+
+def run(size, args):
+    """ Generate a deployment of the given size and measure it in a child process. """
+
+    with tempfile.TemporaryDirectory(prefix='toskose-scale-') as base_dir:
+        write_deployment(
+            base_dir,
+            generate_manifest(size, args.hosted, volumes=True, dependencies=args.dependencies),
+            generate_config([(node_name(i), 9001) for i in range(size)]))
+        os.makedirs(os.path.join(base_dir, 'logs'))
+
+        env = dict(os.environ,
+                   TOSKOSE_APP_MODE='production',
+                   TOSKOSE_CONFIG_PATH=os.path.join(base_dir, 'config'),
+                   TOSKOSE_TOSCA_MANIFEST_PATH=os.path.join(base_dir, 'manifest'),
+                   TOSKOSE_LOGS_PATH=os.path.join(base_dir, 'logs'),
+                   # the manifest is parsed here (measured), not in a worker process
+                   TOSKOSE_STARTUP_PARALLEL='false')
+        command = [sys.executable, '-m', 'tests.benchmarks.bench_model_scale', '--child', base_dir]
+        if args.validate:
+            command.append('--validate')
+        child = subprocess.run(
+            command, env=env, cwd=ROOT_DIR,
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True)
+        if child.returncode != 0:
+            raise RuntimeError('the measure of {} containers failed:\n{}'.format(
+                size, '\n'.join(child.stderr.splitlines()[-20:])))
+        return json.loads(child.stdout.splitlines()[-1])
+
+
+def compare(results, baseline, tolerance):
+    """ The measures that grew more than the tolerance since the baseline. """
+
+    regressions = []
+    for size, measures in results.items():
+        for name, value in measures.items():
+            previous = baseline.get(size, {}).get(name)
+            if name in MEASURES and previous and value > previous * (1 + tolerance):
+                regressions.append('{} nodes, {}: {:.1f} -> {:.1f}'.format(size, name, previous, value))
+    return regressions
+
+
+def main():
+    argparser = argparse.ArgumentParser(description=__doc__)
+    argparser.add_argument('--sizes', default='100,1000,3000', help='the numbers of containers')
+    argparser.add_argument('--hosted', type=int, default=3, help='components per container')
+    argparser.add_argument('--dependencies', type=int, default=2, help='dependencies per component')
+    argparser.add_argument('--validate', action='store_true', help='measure the toscaparser validation too')
+    argparser.add_argument('--save', help='save the results (JSON)')
+    argparser.add_argument('--baseline', help='compare with saved results (JSON)')
+    argparser.add_argument('--tolerance', type=float, default=0.25)
+    argparser.add_argument('--child', help=argparse.SUPPRESS)
+    args = argparser.parse_args()
+
+    if args.child:
+        print(json.dumps(measure(args.child, args.validate)))
+        return
+
+    results = {}
+    print('{:>10} {:>7} {:>10} {:>10} {:>10} {:>10} {:>12} {:>10}'.format(
+        'containers', 'nodes', 'parse ms', 'valid. ms', 'peak KB', 'startup ms', 'update ms', 'reload ms'))
+    for size in [int(size) for size in args.sizes.split(',')]:
+        measures = results[str(size)] = run(size, args)
+        print('{:>10} {nodes:>7} {parse:>10.1f} {validated:>10} {peak_kb:>10.0f} {startup:>10.1f} '
+              '{update_model:>12.1f} {reload:>10.1f}'.format(
+                  size, validated='{:.1f}'.format(measures['validated_parse'])
+                  if 'validated_parse' in measures else '-', **measures))
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for regression in regressions:
+            print('regression: {}'.format(regression))
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+""" Benchmark of the client protocols (XML-RPC vs JSON-RPC) against a local
+stand-in supervisord.
+
+Usage: python -m tests.benchmarks.bench_protocols [--programs N] [--log-size KB]
+"""
+
+import argparse
+import json
+import statistics
+import time
+import xmlrpc.client
+
+from app.client.client import ProtocolType, ToskoseClientFactory
+from tests.benchmarks.fake_supervisord import FakeSupervisor, FakeSupervisordServer
+
+
+def wire_size(protocol, result):
+    """ The size (bytes) of the encoded response payload. """
+
+    if protocol is ProtocolType.XMLRPC:
+        return len(xmlrpc.client.dumps((result,), methodresponse=True).encode('utf-8'))
+    return len(json.dumps({'jsonrpc': '2.0', 'id': 1, 'result': result},
+                          separators=(',', ':')).encode('utf-8'))
+
+
+def measure(call, iterations):
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        result = call()
+        timings.append((time.perf_counter() - start) * 1000)
+    return result, timings
+
+
+def main():
+    argparser = argparse.ArgumentParser(description=__doc__)
+    argparser.add_argument('--programs', type=int, default=200)
+    argparser.add_argument('--log-size', type=int, default=512, help='KB')
+    argparser.add_argument('--iterations', type=int, default=50)
+    args = argparser.parse_args()
+
+    programs = ['component{}-{}'.format(i // 5, op) for i, op in zip(
+        range(args.programs),
+        ['create', 'configure', 'start', 'stop', 'delete'] * args.programs)]
+    fake = FakeSupervisor(programs, log_size=args.log_size * 1024)
+
+    with FakeSupervisordServer(fake) as server:
+        clients = {
+            ProtocolType.XMLRPC: ToskoseClientFactory.create(
+                protocol_type=ProtocolType.XMLRPC.name,
+                hostname=server.host, port=server.xmlrpc_port,
+                username='admin', password='admin'),
+            ProtocolType.JSONRPC: ToskoseClientFactory.create(
+                protocol_type=ProtocolType.JSONRPC.name,
+                hostname=server.host, port=server.jsonrpc_port,
+                username='admin', password='admin'),
+        }
+
+        calls = {
+            'getAllProcessInfo': lambda c: c.get_all_process_info(),
+            'getProcessInfo': lambda c: c.get_process_info(programs[0]),
+            'readProcessStdoutLog': lambda c: c.read_process_stdout_log(programs[0], 0, 0),
+        }
+
+        for name, call in calls.items():
+            results = {}
+            for protocol, client in clients.items():
+                result, timings = measure(lambda: call(client), args.iterations)
+                results[protocol] = result
+                print('{:<22} {:<8} p50 {:>7.2f} ms  p99 {:>7.2f} ms  {:>9} B'.format(
+                    name, protocol.name,
+                    statistics.median(timings),
+                    sorted(timings)[int(len(timings) * 0.99) - 1],
+                    wire_size(protocol, result)))
+            assert results[ProtocolType.XMLRPC] == results[ProtocolType.JSONRPC], \
+                'the protocols disagree on {}'.format(name)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+""" Micro-benchmark of the XML-RPC response parsers (stock vs fast).
+
+Usage: python -m tests.benchmarks.bench_xmlrpc_parser [--processes N] [--log-size MB]
+"""
+
+import argparse
+import io
+import timeit
+import xmlrpc.client
+
+from app.client.impl.xmlrpc_transport import ParserType, ToskoseTransport
+
+
+class _Response(io.BytesIO):
+    """ A file-like stand-in for an HTTP response. """
+
+    def getheader(self, name, default=None):
+        return default
+
+
+def process_info(i):
+    return {
+        'name': 'component{}-create'.format(i),
+        'group': 'component{}-create'.format(i),
+        'description': 'pid {}, uptime 0:03:12'.format(1000 + i),
+        'start': 1200361776,
+        'stop': 0,
+        'now': 1200361812,
+        'state': 20,
+        'statename': 'RUNNING',
+        'spawnerr': '',
+        'exitstatus': 0,
+        'logfile': '/logs/component{}-create.log'.format(i),
+        'stdout_logfile': '/logs/component{}-create.log'.format(i),
+        'stderr_logfile': '',
+        'pid': 1000 + i,
+    }
+
+
+def payloads(processes, log_size):
+    line = 'INFO [main] org.apache.maven.cli - Building thinking-api 1.0 <&>\n'
+    log = (line * (log_size // len(line) + 1))[:log_size]
+    return {
+        'getAllProcessInfo({})'.format(processes): xmlrpc.client.dumps(
+            ([process_info(i) for i in range(processes)],),
+            methodresponse=True).encode('utf-8'),
+        'readProcessStdoutLog({}B)'.format(log_size): xmlrpc.client.dumps(
+            (log,), methodresponse=True).encode('utf-8'),
+    }
+
+
+def parse(transport, payload):
+    transport.verbose = False
+    return transport.parse_response(_Response(payload))
+
+
+def main():
+    argparser = argparse.ArgumentParser(description=__doc__)
+    argparser.add_argument('--processes', type=int, default=500)
+    argparser.add_argument('--log-size', type=int, default=4, help='MB')
+    argparser.add_argument('--repeat', type=int, default=5)
+    argparser.add_argument('--number', type=int, default=10)
+    args = argparser.parse_args()
+
+    transports = {t: ToskoseTransport(parser=t) for t in ParserType}
+
+    for name, payload in payloads(args.processes, args.log_size * 1024 * 1024).items():
+        results = {t: parse(transport, payload) for t, transport in transports.items()}
+        assert results[ParserType.FAST] == results[ParserType.STOCK], \
+            'the parsers disagree on {}'.format(name)
+
+        timings = {}
+        for t, transport in transports.items():
+            best = min(timeit.repeat(
+                lambda: parse(transport, payload),
+                repeat=args.repeat, number=args.number))
+            timings[t] = best / args.number * 1000
+
+        print('{:<32} {:>8.1f} KB  stock {:>8.2f} ms  fast {:>8.2f} ms  speedup x{:.2f}'.format(
+            name, len(payload) / 1024,
+            timings[ParserType.STOCK], timings[ParserType.FAST],
+            timings[ParserType.STOCK] / timings[ParserType.FAST]))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,256 @@
+""" An in-process stand-in for supervisord.
+
+It implements the subset of the supervisord API used by the manager on an
+in-memory process table, and it can be served both over XML-RPC (as
+supervisord does) and over JSON-RPC (as the toskosed/jsonrpc_bridge.py
+sidecar does).
+"""
+
+import random
+import socketserver
+import threading
+import time
+from xmlrpc.client import Fault
+from xmlrpc.server import SimpleXMLRPCRequestHandler, SimpleXMLRPCServer
+
+from toskosed.jsonrpc_bridge import JSONRPCServer, MethodNotFound
+
+
+# supervisord fault codes
+UNKNOWN_METHOD = 1
+BAD_NAME = 10
+NO_FILE = 20
+FAILED = 30
+ALREADY_STARTED = 60
+NOT_RUNNING = 70
+
+STATES = {
+    'STOPPED': 0,
+    'STARTING': 10,
+    'RUNNING': 20,
+    'BACKOFF': 30,
+    'STOPPING': 40,
+    'EXITED': 100,
+    'FATAL': 200,
+    'UNKNOWN': 1000,
+}
+
+
+class FakeSupervisor:
+    """ The in-memory state of a fake supervisord instance.
+
+    Args:
+        programs (list): the program names (e.g. ['api-create', 'api-start']).
+        log_size (int): the size (bytes) of the log of each program.
+        latency (float): seconds to wait before answering each call.
+        failure_rate (float): the probability (0-1) of answering a call with
+            a FAILED fault.
+        seed (int): the seed of the injected failures.
+    """
+
+    def __init__(self, programs, log_size=1024, latency=0.0, identification='supervisor',
+                 failure_rate=0.0, seed=None):
+        self.latency = latency
+        self.identification = identification
+        self.failure_rate = failure_rate
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._processes = {name: self._process_info(name) for name in programs}
+        line = '[{}] INFO fake log line of a toskosed lifecycle operation\n'
+        self._logs = {
+            name: (line.format(name) * (log_size // len(line) + 1))[:log_size]
+            for name in programs
+        }
+        self._main_log = ''.join(self._logs.values())[:log_size]
+
+        self._methods = {
+            'supervisor.getAPIVersion': lambda: '3.0',
+            'supervisor.getSupervisorVersion': lambda: '4.0.4',
+            'supervisor.getIdentification': lambda: self.identification,
+            'supervisor.getState': lambda: {'statecode': 1, 'statename': 'RUNNING'},
+            'supervisor.getPID': lambda: 1,
+            'supervisor.readLog': lambda offset, length: self._read(self._main_log, offset, length),
+            'supervisor.clearLog': lambda: True,
+            'supervisor.getProcessInfo': self._get_process_info,
+            'supervisor.getAllProcessInfo': self._get_all_process_info,
+            'supervisor.startProcess': self._start_process,
+            'supervisor.stopProcess': self._stop_process,
+            'supervisor.stopAllProcesses': self._stop_all_processes,
+            'supervisor.signalProcess': self._signal_process,
+            'supervisor.readProcessStdoutLog': self._read_process_log,
+            'supervisor.readProcessStderrLog': lambda name, offset, length: '',
+            'supervisor.clearProcessLogs': lambda name: bool(self._process(name)),
+            'system.multicall': self._multicall,
+        }
+
+    @staticmethod
+    def _process_info(name):
+        now = int(time.time())
+        return {
+            'name': name, 'group': name, 'description': 'Not started',
+            'start': 0, 'stop': 0, 'now': now,
+            'state': STATES['STOPPED'], 'statename': 'STOPPED',
+            'spawnerr': '', 'exitstatus': 0,
+            'logfile': '/logs/{}.log'.format(name),
+            'stdout_logfile': '/logs/{}.log'.format(name),
+            'stderr_logfile': '', 'pid': 0,
+        }
+
+    def _process(self, name):
+        try:
+            return self._processes[name]
+        except KeyError:
+            raise Fault(BAD_NAME, 'BAD_NAME: {}'.format(name))
+
+    @staticmethod
+    def _read(log, offset, length):
+        if length == 0:
+            return log[offset:]
+        return log[offset:offset + length]
+
+    def _set_state(self, process, statename):
+        process['state'] = STATES[statename]
+        process['statename'] = statename
+        process['now'] = int(time.time())
+
+    def _get_process_info(self, name):
+        with self._lock:
+            return dict(self._process(name))
+
+    def _get_all_process_info(self):
+        with self._lock:
+            return [dict(p) for p in self._processes.values()]
+
+    def _start_process(self, name, wait=True):
+        with self._lock:
+            process = self._process(name)
+            if process['statename'] in ('STARTING', 'RUNNING', 'BACKOFF'):
+                raise Fault(ALREADY_STARTED, 'ALREADY_STARTED: {}'.format(name))
+            self._set_state(process, 'RUNNING')
+            process['start'] = int(time.time())
+            process['pid'] = 1000 + len(name)
+            process['description'] = 'pid {}, uptime 0:00:00'.format(process['pid'])
+            return True
+
+    def _stop_process(self, name, wait=True):
+        with self._lock:
+            process = self._process(name)
+            if process['statename'] not in ('STARTING', 'RUNNING', 'BACKOFF'):
+                raise Fault(NOT_RUNNING, 'NOT_RUNNING: {}'.format(name))
+            self._set_state(process, 'STOPPED')
+            process['stop'] = int(time.time())
+            process['pid'] = 0
+            return True
+
+    def _stop_all_processes(self, wait=True):
+        results = []
+        for name in list(self._processes):
+            try:
+                self._stop_process(name, wait)
+                results.append({'name': name, 'group': name, 'status': 80, 'description': 'OK'})
+            except Fault:
+                pass
+        return results
+
+    def _signal_process(self, name, signal):
+        with self._lock:
+            process = self._process(name)
+            if process['statename'] != 'RUNNING':
+                raise Fault(NOT_RUNNING, 'NOT_RUNNING: {}'.format(name))
+            return True
+
+    def _read_process_log(self, name, offset, length):
+        self._process(name)
+        return self._read(self._logs[name], offset, length)
+
+    def _multicall(self, calls):
+        results = []
+        for call in calls:
+            try:
+                results.append([self._invoke(call['methodName'], call.get('params', []))])
+            except Fault as fault:
+                results.append({'faultCode': fault.faultCode, 'faultString': fault.faultString})
+            except MethodNotFound:
+                results.append({'faultCode': UNKNOWN_METHOD, 'faultString': 'UNKNOWN_METHOD'})
+        return results
+
+    def _invoke(self, method, params):
+        try:
+            target = self._methods[method]
+        except KeyError:
+            raise MethodNotFound(method)
+        return target(*params)
+
+    def dispatch(self, method, params):
+        """ Call a method by its dotted name (e.g. supervisor.getState). """
+
+        if self.latency:
+            time.sleep(self.latency)
+        if self.failure_rate and self._random.random() < self.failure_rate:
+            raise Fault(FAILED, 'FAILED: injected failure of {}'.format(method))
+        return self._invoke(method, params)
+
+
+class _QuietXMLRPCRequestHandler(SimpleXMLRPCRequestHandler):
+    rpc_paths = ('/RPC2',)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class _ThreadedXMLRPCServer(socketserver.ThreadingMixIn, SimpleXMLRPCServer):
+    daemon_threads = True
+
+
+def _unknown_method(fake):
+    def dispatch(method, params):
+        try:
+            return fake.dispatch(method, params)
+        except MethodNotFound:
+            raise Fault(UNKNOWN_METHOD, 'UNKNOWN_METHOD')
+    return dispatch
+
+
+class FakeSupervisordServer:
+    """ Serve a FakeSupervisor over XML-RPC and JSON-RPC on localhost.
+
+    The ports are chosen by the OS (see xmlrpc_port and jsonrpc_port).
+    """
+
+    def __init__(self, fake, host='127.0.0.1', username='admin', password='admin'):
+        self.fake = fake
+        self.host = host
+
+        self._xmlrpc = _ThreadedXMLRPCServer(
+            (host, 0), requestHandler=_QuietXMLRPCRequestHandler,
+            allow_none=True, logRequests=False)
+        self._xmlrpc._dispatch = _unknown_method(fake)
+
+        self._jsonrpc = JSONRPCServer((host, 0), fake.dispatch, username, password)
+        self._threads = []
+
+    @property
+    def xmlrpc_port(self):
+        return self._xmlrpc.server_address[1]
+
+    @property
+    def jsonrpc_port(self):
+        return self._jsonrpc.server_address[1]
+
+    def start(self):
+        for server in (self._xmlrpc, self._jsonrpc):
+            thread = threading.Thread(target=server.serve_forever, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def stop(self):
+        for server in (self._xmlrpc, self._jsonrpc):
+            server.shutdown()
+            server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
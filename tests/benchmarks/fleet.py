@@ -0,0 +1,261 @@
+""" A local fleet of fake supervisord nodes, with a matching synthetic
+deployment (toskose.yml and TOSCA manifest).
+
+Every node is a tosker container hosting some software components, and every
+lifecycle operation of a component is a program of the fake supervisord of
+its node (e.g. node3_sw1-create), as in a toskosed image.
+
+    with Fleet(nodes=20, latency=0.01) as fleet:
+        os.environ.update(fleet.environ())
+        ...
+
+The deployments can also be generated without the fleet (the nodes are then
+expected at node<i>:9001), e.g. for the parser benchmarks:
+
+Usage: python -m tests.benchmarks.fleet --nodes N [--hosted N] [--volumes]
+    [--dependencies N] --out DIR
+"""
+
+import argparse
+import os
+import shutil
+import tempfile
+
+from ruamel.yaml import YAML
+
+from tests.benchmarks.fake_supervisord import FakeSupervisor, FakeSupervisordServer
+
+OPERATIONS = ('create', 'configure', 'start', 'stop', 'delete')
+TOSKER_TYPES = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    'data', 'thinking', 'manifest', 'imports', 'tosker-types.yaml')
+
+USER = 'admin'
+PASSWORD = 'admin'
+
+
+def node_name(i):
+    return 'node{}'.format(i)
+
+
+def component_name(i, j):
+    return 'node{}_sw{}'.format(i, j)
+
+
+def volume_name(i):
+    return 'node{}_volume'.format(i)
+
+
+def programs(i, hosted):
+    """ The supervisord programs of a node (a program for each lifecycle operation). """
+
+    return ['{}-{}'.format(component_name(i, j), op) for j in range(hosted) for op in OPERATIONS]
+
+
+def generate_manifest(nodes, hosted, volumes=False, dependencies=0):
+    """ A TOSCA manifest of containers hosting software components (as a dict).
+
+    The components of a node connect to the first one of the previous node.
+
+    Args:
+        volumes (bool): attach a volume to every container.
+        dependencies (int): the components of the previous nodes (at most)
+            every component depends on, besides its connection.
+    """
+
+    templates = {}
+    for i in range(nodes):
+        templates[node_name(i)] = {
+            'type': 'tosker.nodes.Container',
+            'artifacts': {
+                'my_image': {
+                    'file': 'registry/image{}:1.0'.format(i),
+                    'type': 'tosker.artifacts.Image',
+                    'repository': 'docker_hub',
+                },
+            },
+        }
+        if volumes:
+            templates[volume_name(i)] = {'type': 'tosker.nodes.Volume'}
+            templates[node_name(i)]['requirements'] = [{
+                'storage': {
+                    'node': volume_name(i),
+                    'relationship': {
+                        'type': 'tosca.relationships.AttachesTo',
+                        'properties': {'location': '/data'},
+                    },
+                },
+            }]
+        for j in range(hosted):
+            requirements = [{'host': node_name(i)}]
+            if i > 0:
+                requirements.append({'connection': component_name(i - 1, 0)})
+            # (the previous node is the connection)
+            for k in range(2, 2 + min(dependencies, i - 1)):
+                requirements.append({'dependency': component_name(i - k, j)})
+            templates[component_name(i, j)] = {
+                'type': 'tosker.nodes.Software',
+                'requirements': requirements,
+                'interfaces': {
+                    'Standard': {
+                        op: {'implementation': 'scripts/{}/{}.sh'.format(component_name(i, j), op)}
+                        for op in OPERATIONS
+                    },
+                },
+            }
+
+    return {
+        'tosca_definitions_version': 'tosca_simple_yaml_1_0',
+        'description': 'A synthetic application of {} nodes'.format(nodes),
+        'repositories': {'docker_hub': 'https://registry.hub.docker.com/'},
+        'imports': [{'tosker': 'tosker-types.yaml'}],
+        'topology_template': {'node_templates': templates},
+    }
+
+
+def generate_config(addresses, protocol='XMLRPC'):
+    """ The toskose configuration of the nodes (as a dict).
+
+    Args:
+        addresses (list): the (host, port) of the supervisord of each node.
+    """
+
+    nodes = {}
+    for i, (host, port) in enumerate(addresses):
+        nodes[node_name(i)] = {
+            'alias': host,
+            'port': port,
+            'user': USER,
+            'password': PASSWORD,
+            'log_level': 'INFO',
+            'api_protocol': protocol,
+            'docker': {'name': 'registry/node{}-toskosed'.format(i), 'tag': 'latest'},
+        }
+
+    return {
+        'title': 'Synthetic',
+        'description': 'A synthetic application of {} nodes'.format(len(addresses)),
+        'nodes': nodes,
+        'manager': {
+            'alias': 'manager',
+            'port': 10000,
+            'user': USER,
+            'password': PASSWORD,
+            'mode': 'production',
+            'secret_key': 'secret',
+            'docker': {'name': 'registry/synthetic-manager', 'tag': 'latest'},
+        },
+    }
+
+
+def write_deployment(base_dir, manifest, config):
+    """ Write the manifest (with the tosker types) and the configuration
+    as the manager expects them (TOSKOSE_TOSCA_MANIFEST_PATH, TOSKOSE_CONFIG_PATH). """
+
+    manifest_dir = os.path.join(base_dir, 'manifest')
+    config_dir = os.path.join(base_dir, 'config')
+    os.makedirs(os.path.join(manifest_dir, 'imports'))
+    os.makedirs(config_dir)
+    shutil.copy(TOSKER_TYPES, os.path.join(manifest_dir, 'imports'))
+
+    yaml = YAML(typ='safe')
+    yaml.default_flow_style = False
+    with open(os.path.join(manifest_dir, 'synthetic.yaml'), 'w') as f:
+        yaml.dump(manifest, f)
+    with open(os.path.join(config_dir, 'toskose.yml'), 'w') as f:
+        yaml.dump(config, f)
+
+    return config_dir, manifest_dir
+
+
+class Fleet:
+    """ N fake supervisord (served on localhost) and their deployment.
+
+    Args:
+        nodes (int): the number of nodes.
+        hosted (int): the software components hosted on each node.
+        latency (float): seconds each supervisord waits before answering a call.
+        failure_rate (float): the probability of a call failing (FAILED fault).
+        log_size (int): the size (bytes) of the log of each program.
+        protocol (str): the client protocol of the nodes (XMLRPC or JSONRPC).
+        seed (int): the seed of the injected failures.
+    """
+
+    def __init__(self, nodes=10, hosted=2, latency=0.0, failure_rate=0.0,
+                 log_size=1024, protocol='XMLRPC', seed=0):
+        self.nodes = nodes
+        self.hosted = hosted
+        self.protocol = protocol
+        self.servers = [
+            FakeSupervisordServer(FakeSupervisor(
+                programs(i, hosted), log_size=log_size, latency=latency,
+                failure_rate=failure_rate, seed=None if seed is None else seed + i))
+            for i in range(nodes)
+        ]
+        self.base_dir = None
+        self.config_dir = None
+        self.manifest_dir = None
+
+    def supervisor(self, i):
+        """ The fake supervisord of the i-th node. """
+
+        return self.servers[i].fake
+
+    def start(self):
+        self.base_dir = tempfile.mkdtemp(prefix='toskose-fleet-')
+        os.makedirs(os.path.join(self.base_dir, 'logs'))
+        for server in self.servers:
+            server.start()
+
+        addresses = [
+            (server.host, server.xmlrpc_port if self.protocol == 'XMLRPC' else server.jsonrpc_port)
+            for server in self.servers
+        ]
+        self.config_dir, self.manifest_dir = write_deployment(
+            self.base_dir,
+            generate_manifest(self.nodes, self.hosted),
+            generate_config(addresses, self.protocol))
+        return self
+
+    def stop(self):
+        for server in self.servers:
+            server.stop()
+        if self.base_dir is not None:
+            shutil.rmtree(self.base_dir, ignore_errors=True)
+
+    def environ(self):
+        """ The environment of a manager deploying the fleet. """
+
+        return {
+            'TOSKOSE_APP_MODE': 'production',
+            'TOSKOSE_CONFIG_PATH': self.config_dir,
+            'TOSKOSE_TOSCA_MANIFEST_PATH': self.manifest_dir,
+            'TOSKOSE_LOGS_PATH': os.path.join(self.base_dir, 'logs'),
+        }
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    argparser = argparse.ArgumentParser(description='Generate a synthetic deployment')
+    argparser.add_argument('--nodes', type=int, required=True)
+    argparser.add_argument('--hosted', type=int, default=2, help='components per node')
+    argparser.add_argument('--volumes', action='store_true', help='attach a volume to every node')
+    argparser.add_argument('--dependencies', type=int, default=0, help='dependencies per component')
+    argparser.add_argument('--out', required=True, help='the output directory (config/ and manifest/)')
+    args = argparser.parse_args()
+
+    config_dir, manifest_dir = write_deployment(
+        args.out,
+        generate_manifest(args.nodes, args.hosted, args.volumes, args.dependencies),
+        generate_config([(node_name(i), 9001) for i in range(args.nodes)]))
+    print(config_dir)
+    print(manifest_dir)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+# pytest configurations
+
+import os
+import shutil
+
+import pytest
+from _pytest.monkeypatch import MonkeyPatch
+
+from app.config import AppConfig, ToskoseConfig
+from tests.benchmarks.fake_supervisord import FakeSupervisor, FakeSupervisordServer
+from tests.helpers import full_path
+
+OPERATIONS = ['create', 'configure', 'start', 'stop', 'delete']
+
+
+@pytest.fixture(scope='session')
+def thinking(tmp_path_factory):
+    """ The thinking application, its nodes served by fake supervisord instances. """
+
+    servers = {
+        'maven': FakeSupervisordServer(FakeSupervisor(
+            ['api-' + op for op in OPERATIONS + ['push_default']])).start(),
+        'node': FakeSupervisordServer(FakeSupervisor(['gui-' + op for op in OPERATIONS])).start(),
+    }
+
+    base_dir = tmp_path_factory.mktemp('thinking')
+    manifest_dir = str(base_dir / 'manifest')
+    config_dir = str(base_dir / 'config')
+    shutil.copytree(full_path('thinking/manifest'), manifest_dir)
+    os.makedirs(config_dir)
+    with open(full_path('thinking/config/toskose.yml')) as f:
+        config = f.read()
+    for node_id, port in (('maven', 9001), ('node', 9002)):
+        config = config.replace(
+            'alias: {}\n    port: {}'.format(node_id, port),
+            'alias: 127.0.0.1\n    port: {}'.format(servers[node_id].xmlrpc_port))
+    with open(os.path.join(config_dir, 'toskose.yml'), 'w') as f:
+        f.write(config)
+
+    # pytest.MonkeyPatch.context() is not available in pytest 5
+    mp = MonkeyPatch()
+    try:
+        mp.setattr(ToskoseConfig, 'APP_CONFIG_PATH', config_dir)
+        mp.setattr(ToskoseConfig, 'APP_MANIFEST_PATH', manifest_dir)
+        mp.setattr(AppConfig, '_APP_MODE', 'testing')
+        mp.setattr(AppConfig, '_STARTUP_WARM_UP', False)
+        mp.setattr(AppConfig, '_API_CACHE_TTL', 60.0)
+        yield servers
+    finally:
+        mp.undo()
+        for server in servers.values():
+            server.stop()
+
+
+@pytest.fixture(scope='session')
+def app(thinking):
+    from app.run import create_app
+
+    return create_app()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
@@ -0,0 +1,56 @@
+""" A failing node fails only its own operations of a batch. """
+
+import pytest
+
+from app.api.services import node_service
+from app.api.services.node_service import NodeService
+from app.client.exceptions import SupervisordClientFaultError
+from app.core.exceptions import ClientOperationFailedError
+
+
+class _Client:
+
+    def __init__(self, error=None):
+        self.error = error
+        self.calls = []
+
+    def multicall(self, calls):
+        if self.error is not None:
+            raise self.error
+        self.calls.extend(calls)
+        return [True for _ in calls]
+
+
+class _Manager:
+
+    def __init__(self, clients):
+        self.clients = clients
+
+    def lifecycle_operations(self, node_id, component_id):
+        return ['run']
+
+    def get_client(self, node_id):
+        return self.clients[node_id]
+
+
+def _operation(node_id, action='start'):
+    return {'node_id': node_id, 'component_id': 'api', 'operation': 'run', 'action': action}
+
+
+@pytest.mark.parametrize('error', [
+    SupervisordClientFaultError('the multicall failed'),
+    ClientOperationFailedError('the multicall failed'),
+])
+def test_node_fault_fails_only_its_operations(monkeypatch, error):
+    clients = {'maven': _Client(error), 'node': _Client()}
+    monkeypatch.setattr(node_service.ToskoseManager, 'get_instance',
+                        staticmethod(lambda: _Manager(clients)))
+
+    results = NodeService().execute_batch(
+        [_operation('maven'), _operation('node'), _operation('maven', 'stop')])
+
+    assert [(r.node_id, r.success) for r in results] == \
+        [('maven', False), ('node', True), ('maven', False)]
+    assert results[0].error == 'the multicall failed'
+    assert clients['node'].calls == [
+        {'methodName': 'supervisor.startProcess', 'params': ['api-run', True]}]
@@ -0,0 +1,64 @@
+""" The read-only responses are revalidated with their ETag, and invalidated as
+soon as an operation of the node is started or stopped. """
+
+from app.api.utils.cache import cache_response, cached_response, invalidate_node
+
+OPERATION = '/api/v1/node/maven/api/create'
+
+
+def _state(client):
+    response = client.get(OPERATION)
+    assert response.status_code == 200
+    return response.get_json()['state_name'], response.headers['ETag']
+
+
+def test_etag_revalidation(client):
+    response = client.get(OPERATION)
+    etag = response.headers['ETag']
+    assert response.status_code == 200
+    assert etag.startswith('W/')
+
+    revalidated = client.get(OPERATION, headers={'If-None-Match': etag})
+    assert revalidated.status_code == 304
+    assert revalidated.data == b''
+
+    changed = client.get(OPERATION, headers={'If-None-Match': 'W/"stale"'})
+    assert changed.status_code == 200
+    assert changed.headers['ETag'] == etag
+
+
+def test_model_responses_are_revalidated(client):
+    response = client.get('/api/v1/node/maven/api')
+    assert response.status_code == 200
+
+    revalidated = client.get('/api/v1/node/maven/api',
+                             headers={'If-None-Match': response.headers['ETag']})
+    assert revalidated.status_code == 304
+
+
+def test_start_and_stop_invalidate(client):
+    _state(client)
+    assert client.post(OPERATION).status_code == 200
+    state, started_etag = _state(client)
+    assert state == 'RUNNING'
+
+    assert client.delete(OPERATION).status_code == 200
+    state, stopped_etag = _state(client)
+    assert state == 'STOPPED'
+    assert stopped_etag != started_etag
+
+    # the previous version is not returned anymore
+    assert client.get(OPERATION, headers={'If-None-Match': started_etag}).status_code == 200
+
+
+def test_response_fetched_before_an_invalidation_is_not_cached(app):
+    invalidate_node('maven')
+    with app.test_request_context(OPERATION):
+        assert cached_response() is None
+        # e.g. the operation was started while the response was fetched
+        invalidate_node('maven')
+        cache_response(app.response_class(b'{"state_name": "STOPPED"}', mimetype='application/json'))
+
+    # kept with the previous generation: never returned
+    with app.test_request_context(OPERATION):
+        assert cached_response() is None
@@ -0,0 +1,78 @@
+""" The large responses of the compressible resources (e.g. logs and bulk status)
+are gzip/deflate-compressed, as negotiated with the client. """
+
+import gzip
+import json
+import zlib
+
+import pytest
+
+from app.config import AppConfig
+
+NODES = '/api/v1/node/'
+
+
+@pytest.fixture
+def min_size(monkeypatch):
+    monkeypatch.setattr(AppConfig, '_API_COMPRESSION_MIN_SIZE', 0)
+
+
+def _json(response):
+    encoding = response.headers.get('Content-Encoding')
+    data = response.data
+    if encoding == 'gzip':
+        data = gzip.decompress(data)
+    elif encoding == 'deflate':
+        data = zlib.decompress(data)
+    return json.loads(data.decode('utf-8'))
+
+
+@pytest.mark.parametrize('accept_encoding,encoding', [
+    ('gzip', 'gzip'),
+    ('deflate', 'deflate'),
+    ('gzip;q=0.5, deflate', 'deflate'),
+    ('gzip, deflate;q=0.5', 'gzip'),
+    ('identity', None),
+    ('gzip;q=0', None),
+    (None, None),
+])
+def test_negotiation(client, min_size, accept_encoding, encoding):
+    identity = _json(client.get(NODES))
+    headers = {'Accept-Encoding': accept_encoding} if accept_encoding else {}
+
+    response = client.get(NODES, headers=headers)
+
+    assert response.status_code == 200
+    assert response.headers.get('Content-Encoding') == encoding
+    assert 'Accept-Encoding' in response.vary
+    assert _json(response) == identity
+
+
+def test_small_responses_are_not_compressed(client, monkeypatch):
+    size = len(client.get(NODES).data)
+    monkeypatch.setattr(AppConfig, '_API_COMPRESSION_MIN_SIZE', size + 1)
+
+    response = client.get(NODES, headers={'Accept-Encoding': 'gzip'})
+
+    assert 'Content-Encoding' not in response.headers
+    # the encoding still depends on the client (e.g. for the proxies)
+    assert 'Accept-Encoding' in response.vary
+
+
+def test_other_resources_are_not_compressed(client, min_size):
+    response = client.get('/api/v1/node/maven/api/create', headers={'Accept-Encoding': 'gzip'})
+
+    assert response.status_code == 200
+    assert 'Content-Encoding' not in response.headers
+    assert 'Accept-Encoding' not in response.vary
+
+
+def test_compressed_responses_are_revalidated(client, min_size):
+    response = client.get(NODES, headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+
+    revalidated = client.get(NODES, headers={
+        'Accept-Encoding': 'gzip', 'If-None-Match': response.headers['ETag']})
+
+    assert revalidated.status_code == 304
+    assert revalidated.data == b''
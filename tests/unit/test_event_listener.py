@@ -0,0 +1,105 @@
+""" The event listener reads the events from supervisord (header and payload),
+forwards the state changes to the manager and always acknowledges them. """
+
+import io
+
+import pytest
+
+from toskosed.event_listener import Forwarder, parse_tokens, read_event, serve, to_event
+
+
+def _event(eventname, payload, serial=7):
+    header = 'ver:3.0 server:supervisor serial:{} pool:toskose-events poolserial:{} ' \
+             'eventname:{} len:{}\n'.format(serial, serial, eventname, len(payload))
+    return (header + payload).encode('utf-8')
+
+
+STARTING = _event('PROCESS_STATE_STARTING',
+                  'processname:api-start groupname:api-start from_state:STOPPED tries:0')
+RUNNING = _event('PROCESS_STATE_RUNNING',
+                 'processname:api-start groupname:api-start from_state:STARTING pid:42')
+TICK = _event('TICK_60', 'when:1571500000')
+REMOTE = _event('REMOTE_COMMUNICATION', 'type:ping\nhello\nworld')
+PROCESS_LOG = _event('PROCESS_LOG_STDOUT', 'processname:api-start groupname:api-start pid:42\nsome output')
+
+
+class _Forwarder(Forwarder):
+    """ Collect the forwarded events (or fail to forward them). """
+
+    def __init__(self, error=None):
+        super().__init__('http://manager:10000/', 'maven', 'admin', 'admin')
+        self.error = error
+        self.events = []
+
+    def forward(self, events):
+        if self.error is not None:
+            raise self.error
+        self.events.extend(events)
+
+
+def _serve(forwarder, *events):
+    stdout, stderr = io.BytesIO(), io.StringIO()
+    with pytest.raises(EOFError):
+        serve(forwarder, io.BytesIO(b''.join(events)), stdout, stderr)
+    return stdout.getvalue(), stderr.getvalue()
+
+
+def test_parse_tokens():
+    assert parse_tokens('processname:api-start groupname:api-start from_state:STOPPED') == \
+        {'processname': 'api-start', 'groupname': 'api-start', 'from_state': 'STOPPED'}
+    assert parse_tokens('url:http://manager:10000 ignored') == {'url': 'http://manager:10000'}
+
+
+def test_read_event():
+    stdin = io.BytesIO(RUNNING + TICK)
+
+    headers, payload = read_event(stdin)
+
+    assert headers['eventname'] == 'PROCESS_STATE_RUNNING'
+    assert payload == 'processname:api-start groupname:api-start from_state:STARTING pid:42'
+    # the next event is left in the stream
+    assert read_event(stdin)[0]['eventname'] == 'TICK_60'
+    with pytest.raises(EOFError):
+        read_event(stdin)
+
+
+def test_to_event():
+    event = to_event(*read_event(io.BytesIO(RUNNING)))
+
+    assert event.pop('timestamp') > 0
+    assert event == {'eventname': 'PROCESS_STATE_RUNNING', 'serial': 7, 'processname': 'api-start',
+                     'groupname': 'api-start', 'from_state': 'STARTING', 'pid': 42}
+
+
+def test_to_event_remote_communication():
+    event = to_event(*read_event(io.BytesIO(REMOTE)))
+
+    assert (event['type'], event['data']) == ('ping', 'hello\nworld')
+
+
+def test_serve():
+    forwarder = _Forwarder()
+
+    stdout, stderr = _serve(forwarder, STARTING, RUNNING, PROCESS_LOG, TICK)
+
+    # READY before each event, RESULT after each one (even if not forwarded)
+    assert stdout == b'READY\n' + b'RESULT 2\nOKREADY\n' * 4
+    assert stderr == ''
+    assert [event['eventname'] for event in forwarder.events] == \
+        ['PROCESS_STATE_STARTING', 'PROCESS_STATE_RUNNING', 'TICK_60']
+    assert forwarder.events[0]['tries'] == 0 and forwarder.events[2]['when'] == 1571500000
+
+
+def test_serve_acknowledges_when_the_manager_is_unavailable():
+    forwarder = _Forwarder(error=OSError('Connection refused'))
+
+    stdout, stderr = _serve(forwarder, RUNNING)
+
+    assert stdout == b'READY\nRESULT 2\nOKREADY\n'
+    assert 'Cannot forward PROCESS_STATE_RUNNING to http://manager:10000/api/v1/events/supervisord' in stderr
+
+
+def test_forwarder_credentials():
+    assert Forwarder('http://manager:10000', 'maven', 'admin', 'admin').headers['Authorization'] == \
+        'Basic YWRtaW46YWRtaW4='
+    assert 'Authorization' not in Forwarder('http://manager:10000', 'maven').headers
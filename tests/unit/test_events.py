@@ -0,0 +1,86 @@
+""" The events are ingested only with the supervisord credentials of the node. """
+
+import base64
+
+import pytest
+
+from app.api.services.event_service import EventService
+from app.core.exceptions import AuthenticationError
+
+INGEST = '/api/v1/events/supervisord'
+
+
+def _event(statename='RUNNING'):
+    return {'eventname': 'PROCESS_STATE_' + statename, 'processname': 'gui-start',
+            'groupname': 'gui-start', 'from_state': 'STARTING', 'pid': 1}
+
+
+def _basic(credentials):
+    return {'Authorization': 'Basic ' + base64.b64encode(credentials.encode()).decode()}
+
+
+@pytest.fixture
+def errors(app, monkeypatch):
+    """ The errors are answered by the API error handlers (not raised). """
+
+    monkeypatch.setitem(app.config, 'PROPAGATE_EXCEPTIONS', False)
+
+
+@pytest.mark.parametrize('username,password', [
+    (None, None),
+    ('admin', None),
+    ('admin', 'wrong'),
+    ('wrong', 'admin'),
+])
+def test_invalid_credentials(app, username, password):
+    with pytest.raises(AuthenticationError):
+        EventService.get_instance().ingest(
+            node_id='node', events=[_event()], username=username, password=password)
+
+
+def test_rejected_events_are_not_recorded(app):
+    before = EventService.get_instance().changes('node')
+
+    with pytest.raises(AuthenticationError):
+        EventService.get_instance().ingest(
+            node_id='node', events=[_event('FATAL')], username='admin', password='wrong')
+
+    assert EventService.get_instance().changes('node') == before
+
+
+@pytest.mark.parametrize('headers', [
+    {},
+    _basic('admin:wrong'),
+    _basic('admin'),
+    {'Authorization': 'Bearer admin'},
+])
+def test_api_rejects_invalid_credentials(client, errors, headers):
+    response = client.post(INGEST, json={'node_id': 'node', 'events': [_event()]}, headers=headers)
+
+    assert response.status_code == 401
+
+
+def test_api_accepts_the_node_credentials(client, errors):
+    before = EventService.get_instance().changes('node')
+
+    response = client.post(INGEST, json={'node_id': 'node', 'events': [_event()]},
+                           headers=_basic('admin:admin'))
+
+    assert response.status_code == 204
+    assert EventService.get_instance().changes('node') == before + 1
+
+
+@pytest.mark.parametrize('node_id', ['nope', 'mongodb'])
+def test_unknown_and_standalone_nodes_are_not_disclosed(app, node_id):
+    # with credentials valid for the other nodes
+    with pytest.raises(AuthenticationError):
+        EventService.get_instance().ingest(
+            node_id=node_id, events=[_event()], username='admin', password='admin')
+
+
+@pytest.mark.parametrize('node_id', ['nope', 'mongodb', 'node'])
+def test_api_answers_unauthorized_for_any_node(client, errors, node_id):
+    response = client.post(INGEST, json={'node_id': node_id, 'events': [_event()]},
+                           headers=_basic('admin:wrong'))
+
+    assert response.status_code == 401
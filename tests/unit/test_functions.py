@@ -0,0 +1,93 @@
+""" The TOSCA functions are resolved in dependency order, once, and re-resolved
+incrementally when the inputs change. """
+
+import os
+import shutil
+
+import pytest
+
+from app.core.exceptions import ParsingError
+from app.tosca.functions import FunctionResolver
+from app.tosca.parser import ToscaParser
+from tests.helpers import full_path
+
+
+def _topology(nodes, inputs=None):
+    return {
+        'inputs': {name: {'type': 'integer', 'default': value}
+                   for name, value in (inputs or {}).items()},
+        'node_templates': nodes,
+    }
+
+
+def test_resolution_follows_the_dependencies():
+    topology = _topology({
+        # declared before the properties they read
+        'gui': {'properties': {'api': {'get_property': ['api', 'port']}}},
+        'proxy': {'properties': {'upstream': {'get_property': ['gui', 'api']}}},
+        'api': {'properties': {'port': {'get_input': 'api_port'}}},
+    }, inputs={'api_port': 8000})
+
+    FunctionResolver(topology, '/app').resolve()
+
+    nodes = topology['node_templates']
+    assert nodes['api']['properties']['port'] == 8000
+    assert nodes['gui']['properties']['api'] == 8000
+    assert nodes['proxy']['properties']['upstream'] == 8000
+
+
+def test_reference_cycle():
+    topology = _topology({
+        'api': {'properties': {'port': {'get_property': ['gui', 'port']}}},
+        'gui': {'properties': {'port': {'get_property': ['api', 'port']}}},
+    })
+
+    with pytest.raises(ParsingError, match='Cyclic reference'):
+        FunctionResolver(topology, '/app')
+
+
+def test_missing_input():
+    topology = _topology({'api': {'properties': {'port': {'get_input': 'api_port'}}}})
+
+    with pytest.raises(ParsingError, match=r'Missing input \[api_port\]'):
+        FunctionResolver(topology, '/app').resolve()
+
+
+def test_invalid_input_arguments():
+    topology = _topology({'api': {'properties': {'port': {'get_input': ['api', 'port']}}}})
+
+    with pytest.raises(ParsingError, match='Invalid arguments'):
+        FunctionResolver(topology, '/app')
+
+
+def test_update_inputs_resolves_only_the_dependents():
+    topology = _topology({
+        'api': {'properties': {'port': {'get_input': 'api_port'},
+                               'branch': {'get_input': 'branch'}}},
+        'gui': {'properties': {'api': {'get_property': ['api', 'port']}}},
+    }, inputs={'api_port': 8000, 'branch': 'master'})
+    resolver = FunctionResolver(topology, '/app')
+    resolver.resolve()
+
+    sites = resolver.update_inputs({'api_port': 9000})
+
+    assert [site.location for site in sites] == ['api.properties.port', 'gui.properties.api']
+    nodes = topology['node_templates']
+    assert nodes['gui']['properties']['api'] == 9000
+    assert nodes['api']['properties']['branch'] == 'master'
+    assert resolver.update_inputs({'api_port': 9000}) == []
+
+
+@pytest.mark.parametrize('trusted', [True, False])
+def test_update_inputs_refreshes_the_model(tmp_path, trusted):
+    manifest_dir = str(tmp_path / 'manifest')
+    shutil.copytree(full_path('thinking/manifest'), manifest_dir)
+    for file in os.listdir(os.path.join(manifest_dir, 'imports')):
+        shutil.copy(os.path.join(manifest_dir, 'imports', file), manifest_dir)
+    model = ToscaParser().build_model(os.path.join(manifest_dir, 'thinking.yaml'), trusted=trusted)
+
+    refreshed = ToscaParser.update_inputs(model, {'api_port': 9000})
+
+    assert refreshed == ['gui', 'maven']
+    assert model['maven'].ports == {8080: 9000}
+    assert model['gui'].interfaces['Standard']['configure']['inputs']['apiPort'] == 9000
@@ -0,0 +1,48 @@
+""" The host container of every software node is resolved whatever the depth
+of the hosting chain, and hosting cycles are parsing errors. """
+
+import sys
+
+import pytest
+
+from app.core.exceptions import ParsingError
+from app.tosca.model.nodes import Software
+from app.tosca.model.template import Template
+from app.tosca.parser import ToscaParser
+from tests.benchmarks.bench_host_resolution import build_stacks
+
+
+def test_deep_stacks():
+    depth = sys.getrecursionlimit() + 100
+    tpl = build_stacks(2, depth)
+
+    ToscaParser._resolve_host_containers(tpl)
+
+    for software in tpl.software:
+        stack = software.name.split('_')[0]
+        assert software.host_container.name == stack.replace('stack', 'container')
+
+
+def test_hosting_cycle():
+    tpl = build_stacks(1, 3, cycle=True)
+
+    with pytest.raises(ParsingError, match='Hosting cycle detected: stack0_sw'):
+        ToscaParser._resolve_host_containers(tpl)
+
+
+def test_self_hosting():
+    tpl = Template('self')
+    software = Software('api')
+    software.host = software
+    tpl.push(software)
+
+    with pytest.raises(ParsingError, match='api -> api'):
+        ToscaParser._resolve_host_containers(tpl)
+
+
+def test_missing_host():
+    tpl = Template('orphan')
+    tpl.push(Software('api'))
+
+    with pytest.raises(ParsingError):
+        ToscaParser._resolve_host_containers(tpl)
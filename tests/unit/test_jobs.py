@@ -0,0 +1,128 @@
+""" A job goes from pending to running, and ends succeeded or failed according
+to the final state of the lifecycle operation. """
+
+import pytest
+
+from app.api.services.job_service import JobService, JobStatus
+from app.api.services.node_service import LifecycleOperationActionType
+from app.config import AppConfig
+from app.core.exceptions import ResourceNotFoundError
+
+OPERATION = dict(node_id='node', component_id='gui', operation='start')
+
+
+@pytest.fixture
+def fake(thinking, app, monkeypatch):
+    """ The fake supervisord of the node (its processes stopped afterwards). """
+
+    monkeypatch.setattr(AppConfig, '_JOBS_POLL_INTERVAL', 0.05)
+    fake = thinking['node'].fake
+    yield fake
+    with fake._lock:
+        for process in fake._processes.values():
+            fake._set_state(process, 'STOPPED')
+            process['spawnerr'] = ''
+
+
+def _starting_in(fake, monkeypatch, statename, spawnerr=''):
+    """ Make startProcess leave the process in the given state. """
+
+    def start_process(name, wait=True):
+        with fake._lock:
+            process = fake._process(name)
+            fake._set_state(process, statename)
+            process['spawnerr'] = spawnerr
+        return True
+    monkeypatch.setitem(fake._methods, 'supervisor.startProcess', start_process)
+
+
+def _updates(job_id):
+    """ The (status, state) of every update of a job, until it's done. """
+
+    updates = []
+    for info in JobService.get_instance().watch(job_id, keep_alive=5):
+        assert info is not None, 'the job is stuck'
+        updates.append((info.status, info.state))
+    return updates
+
+
+def test_start_succeeded(fake):
+    job = JobService.get_instance().submit(action=LifecycleOperationActionType.START, **OPERATION)
+    assert job.status == JobStatus.PENDING.value
+
+    updates = _updates(job.job_id)
+
+    assert updates[-1] == (JobStatus.SUCCEEDED.value, 'RUNNING')
+    statuses = [status for status, _ in updates]
+    assert statuses == sorted(statuses, key=[s.value for s in JobStatus].index)
+
+
+def test_start_waits_for_the_operation(fake, monkeypatch):
+    _starting_in(fake, monkeypatch, 'STARTING')
+
+    job = JobService.get_instance().submit(action=LifecycleOperationActionType.START, **OPERATION)
+    for info in JobService.get_instance().watch(job.job_id, keep_alive=5):
+        assert info is not None and not info.status == JobStatus.SUCCEEDED.value
+        if info.state == 'STARTING':
+            assert info.status == JobStatus.RUNNING.value
+            break
+    with fake._lock:
+        fake._set_state(fake._process('gui-start'), 'RUNNING')
+
+    assert _updates(job.job_id)[-1] == (JobStatus.SUCCEEDED.value, 'RUNNING')
+
+
+def test_start_failed(fake, monkeypatch):
+    _starting_in(fake, monkeypatch, 'FATAL', spawnerr='Exited too quickly')
+
+    job = JobService.get_instance().submit(action=LifecycleOperationActionType.START, **OPERATION)
+
+    assert _updates(job.job_id)[-1] == (JobStatus.FAILED.value, 'FATAL')
+    assert JobService.get_instance().job_info(job.job_id).error == 'Exited too quickly'
+
+
+def test_stop_of_a_stopped_operation_failed(fake):
+    job = JobService.get_instance().submit(action=LifecycleOperationActionType.STOP, **OPERATION)
+
+    assert _updates(job.job_id)[-1][0] == JobStatus.FAILED.value
+    assert JobService.get_instance().job_info(job.job_id).error == 'Process gui-start not running'
+
+
+def test_unknown_operation(fake):
+    with pytest.raises(ResourceNotFoundError):
+        JobService.get_instance().submit(
+            action=LifecycleOperationActionType.START,
+            node_id='node', component_id='gui', operation='nope')
+
+
+def test_unknown_job(fake):
+    with pytest.raises(ResourceNotFoundError):
+        JobService.get_instance().job_info('nope')
+    # not when the updates are iterated (e.g. once the stream is started)
+    with pytest.raises(ResourceNotFoundError):
+        JobService.get_instance().watch('nope')
+
+
+def test_job_purged_while_watched(fake):
+    service = JobService.get_instance()
+    job = service.submit(action=LifecycleOperationActionType.START, **OPERATION)
+    updates = service.watch(job.job_id, keep_alive=5)
+    with service._changed:
+        # e.g. purged while a stream was slow to consume its updates
+        del service._jobs[job.job_id]
+
+    statuses = [info.status for info in updates if info is not None]
+
+    assert statuses[-1] == JobStatus.SUCCEEDED.value
+
+
+def test_api(fake, client):
+    response = client.post('/api/v1/node/node/gui/start?async=true')
+    assert response.status_code == 202
+    location = response.headers['Location']
+    job_id = response.get_json()['job_id']
+    assert location.endswith('/api/v1/jobs/' + job_id)
+
+    _updates(job_id)
+    job = client.get(location).get_json()
+    assert (job['status'], job['state']) == (JobStatus.SUCCEEDED.value, 'RUNNING')
@@ -0,0 +1,100 @@
+""" The JSON-RPC sidecar never serves a call without the credentials, nor a
+method that supervisord doesn't expose. """
+
+import base64
+import gzip
+import json
+import threading
+import urllib.error
+import urllib.request
+
+import pytest
+
+from toskosed.jsonrpc_bridge import (JSONRPC_PATH, METHOD_NOT_FOUND, JSONRPCServer,
+                                     supervisord_dispatcher)
+
+
+@pytest.fixture
+def server():
+    # never reached: the invalid names are rejected before the RPC
+    server = JSONRPCServer(('127.0.0.1', 0), supervisord_dispatcher('http://127.0.0.1:1/RPC2'),
+                           'admin', 'secret')
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def _post(server, method, credentials=None, headers=None):
+    request = urllib.request.Request(
+        'http://127.0.0.1:{}{}'.format(server.server_address[1], JSONRPC_PATH),
+        data=json.dumps({'jsonrpc': '2.0', 'id': 1, 'method': method}).encode('utf-8'),
+        headers=headers or {})
+    if credentials is not None:
+        request.add_header('Authorization', 'Basic ' + base64.b64encode(credentials.encode()).decode())
+    with urllib.request.urlopen(request, timeout=5) as response:
+        return response.headers.get('Content-Encoding'), response.read()
+
+
+def _call(server, method, credentials=None):
+    _, body = _post(server, method, credentials)
+    return json.loads(body.decode('utf-8'))
+
+
+@pytest.mark.parametrize('username,password', [(None, None), ('admin', None), ('', 'secret')])
+def test_credentials_are_required(username, password):
+    with pytest.raises(ValueError):
+        JSONRPCServer(('127.0.0.1', 0), lambda method, params: None, username, password)
+
+
+@pytest.mark.parametrize('credentials', [None, 'admin:wrong', 'admin'])
+def test_unauthorized(server, credentials):
+    with pytest.raises(urllib.error.HTTPError) as err:
+        _call(server, 'supervisor.getState', credentials)
+    assert err.value.code == 401
+
+
+@pytest.mark.parametrize('method', ['__class__', 'supervisor._ServerProxy__request', 'a..b'])
+def test_method_not_found(server, method):
+    response = _call(server, method, 'admin:secret')
+    assert response['error']['code'] == METHOD_NOT_FOUND
+
+
+@pytest.fixture
+def log_server(request):
+    """ A server answering every call with a log of the given size (bytes). """
+
+    server = JSONRPCServer(('127.0.0.1', 0), lambda method, params: 'x' * request.param,
+                           'admin', 'secret', compression_threshold=1000)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.mark.parametrize('log_server,accept_encoding,compressed', [
+    (2000, 'gzip', True),
+    (2000, 'deflate, gzip;q=0.5', True),
+    (2000, None, False),
+    (2000, 'deflate', False),
+    (100, 'gzip', False),
+], indirect=['log_server'])
+def test_compression(log_server, accept_encoding, compressed):
+    headers = {'Accept-Encoding': accept_encoding} if accept_encoding else {}
+    encoding, body = _post(log_server, 'supervisor.readLog', 'admin:secret', headers)
+
+    assert encoding == ('gzip' if compressed else None)
+    if compressed:
+        body = gzip.decompress(body)
+    assert json.loads(body.decode('utf-8'))['result'].startswith('xxx')
+
+
+@pytest.mark.parametrize('log_server', [2000], indirect=True)
+def test_compression_disabled(log_server):
+    log_server.compression_threshold = None
+
+    encoding, _ = _post(log_server, 'supervisor.readLog', 'admin:secret', {'Accept-Encoding': 'gzip'})
+
+    assert encoding is None
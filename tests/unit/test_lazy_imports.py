@@ -0,0 +1,30 @@
+""" The manager must start without importing its heavy dependencies (and without
+building the model): they are loaded on first use. """
+
+import subprocess
+import sys
+
+from tests.benchmarks.bench_import_time import is_lazy
+
+
+def _run(code):
+    result = subprocess.run([sys.executable, '-c', code], stdout=subprocess.PIPE,
+                            universal_newlines=True, check=True)
+    return result.stdout.split()
+
+
+def test_app_import_is_lazy():
+    imported = _run(
+        'import sys\n'
+        'import app.run, app.manager\n'
+        'print(*sorted(sys.modules))')
+
+    assert [name for name in imported if is_lazy(name)] == []
+
+
+def test_manager_is_initialized_on_first_use():
+    initialized = _run(
+        'from app.manager import ToskoseManager\n'
+        'print(ToskoseManager.get_instance().initialized)')
+
+    assert initialized == ['False']
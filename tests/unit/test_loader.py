@@ -0,0 +1,108 @@
+""" The parsed documents are cached until their file changes (mtime or size),
+or is removed. """
+
+import os
+import shutil
+
+import pytest
+
+from app.core.loader import Loader, _cache
+
+
+@pytest.fixture
+def loader():
+    Loader.clear_cache()
+    yield Loader()
+    Loader.clear_cache()
+
+
+def _write(path, content, mtime_ns=None):
+    with open(str(path), 'w') as f:
+        f.write(content)
+    if mtime_ns is not None:
+        os.utime(str(path), ns=(mtime_ns, mtime_ns))
+
+
+def test_unchanged_file_is_cached(tmp_path, loader):
+    path = tmp_path / 'toskose.yml'
+    _write(path, 'nodes: {maven: {port: 9001}}\n')
+
+    document = loader.load(str(path))
+
+    assert loader.load(str(path)) is document
+    assert loader.load(str(path), cache=False) == document
+    assert loader.load(str(path), cache=False) is not document
+
+
+def test_mtime_change(tmp_path, loader):
+    path = tmp_path / 'toskose.yml'
+    # same size, the mtime only tells them apart
+    _write(path, 'port: 9001\n', mtime_ns=1000000000)
+    assert loader.load(str(path)) == {'port': 9001}
+
+    _write(path, 'port: 9002\n', mtime_ns=2000000000)
+
+    assert loader.load(str(path)) == {'port': 9002}
+
+
+def test_size_change(tmp_path, loader):
+    path = tmp_path / 'toskose.yml'
+    _write(path, 'port: 9001\n', mtime_ns=1000000000)
+    assert loader.load(str(path)) == {'port': 9001}
+
+    # the same mtime (e.g. a coarse filesystem clock)
+    _write(path, 'port: 19001\n', mtime_ns=1000000000)
+
+    assert loader.load(str(path)) == {'port': 19001}
+
+
+def test_copy_shares_the_document(tmp_path, loader):
+    original, copy = tmp_path / 'a.yml', tmp_path / 'b.yml'
+    _write(original, 'port: 9001\n')
+    _write(copy, 'port: 9001\n')
+
+    assert loader.load(str(copy)) is loader.load(str(original))
+
+
+def test_stale_document_is_dropped(tmp_path, loader):
+    path = tmp_path / 'toskose.yml'
+    _write(path, 'port: 9001\n', mtime_ns=1000000000)
+    loader.load(str(path))
+    _write(path, 'port: 9002\n', mtime_ns=2000000000)
+    loader.load(str(path))
+
+    assert list(_cache._by_digest.values()) == [{'port': 9002}]
+
+
+def test_removed_copies_are_dropped(tmp_path, loader):
+    """ e.g. the manifest copied in a new temporary dir at each reload, and edited """
+
+    for version in range(5):
+        copy_dir = tmp_path / 'copy-{}'.format(version)
+        copy_dir.mkdir()
+        _write(copy_dir / 'manifest.yml', 'version: {}\n'.format(version))
+        assert loader.load(str(copy_dir / 'manifest.yml')) == {'version': version}
+        shutil.rmtree(str(copy_dir))
+
+    _write(tmp_path / 'toskose.yml', 'port: 9001\n')
+    loader.load(str(tmp_path / 'toskose.yml'))
+
+    assert list(_cache._by_path) == [str(tmp_path / 'toskose.yml')]
+    assert list(_cache._by_digest.values()) == [{'port': 9001}]
+
+
+def test_least_recently_used_documents_are_dropped(tmp_path, loader, monkeypatch):
+    monkeypatch.setattr(_cache, '_max_documents', 2)
+    paths = []
+    for port in (9001, 9002, 9003):
+        paths.append(str(tmp_path / '{}.yml'.format(port)))
+        _write(paths[-1], 'port: {}\n'.format(port))
+
+    first = loader.load(paths[0])
+    loader.load(paths[1])
+    assert loader.load(paths[0]) is first
+    loader.load(paths[2])
+
+    assert sorted(document['port'] for document in _cache._by_digest.values()) == [9001, 9003]
+    assert sorted(_cache._by_path) == sorted([paths[0], paths[2]])
+    assert loader.load(paths[1]) == {'port': 9002}
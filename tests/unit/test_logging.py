@@ -0,0 +1,149 @@
+""" The records are rendered when they are queued (not when they are written by
+the listener thread), with their fields, and the disabled levels cost nothing. """
+
+import json
+import logging
+import os
+import queue
+import sys
+
+import pytest
+
+from app.core.logging import (JsonFormatter, LoggingFacility, StructuredLogger, TextFormatter,
+                              _QueueHandler)
+
+
+class _Rendered:
+    """ Count how many times it's rendered. """
+
+    def __init__(self):
+        self.renders = 0
+
+    def __str__(self):
+        self.renders += 1
+        return 'rendered'
+
+
+class _ListHandler(logging.Handler):
+
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+@pytest.fixture
+def logger():
+    """ A structured logger (WARNING level) and the records it emits. """
+
+    stdlib_logger = logging.getLogger('tests.structured')
+    stdlib_logger.setLevel(logging.WARNING)
+    stdlib_logger.propagate = False
+    handler = _ListHandler()
+    stdlib_logger.addHandler(handler)
+    yield StructuredLogger(stdlib_logger), handler.records
+    stdlib_logger.removeHandler(handler)
+
+
+def _record(msg='Batch failed on node %s', args=('maven',), exc_info=None, **fields):
+    record = logging.LogRecord('tests', logging.ERROR, __file__, 1, msg, args, exc_info)
+    record.fields = fields
+    return record
+
+
+def test_disabled_levels_are_not_rendered(logger):
+    structured_logger, records = logger
+    value = _Rendered()
+
+    structured_logger.debug('Parsing node %s', value, node=value)
+    structured_logger.info('Parsing node %s', value, node=value)
+
+    assert records == []
+    assert value.renders == 0
+
+
+def test_enabled_levels(logger):
+    structured_logger, records = logger
+
+    structured_logger.warn('Batch failed on node %s', 'maven', error='timeout')
+    try:
+        raise ValueError('boom')
+    except ValueError:
+        structured_logger.exception('Cannot poll the state of the nodes', node='maven')
+
+    assert [record.levelno for record in records] == [logging.WARNING, logging.ERROR]
+    assert records[0].getMessage() == 'Batch failed on node maven'
+    assert records[0].fields == {'error': 'timeout'}
+    assert records[1].exc_info[0] is ValueError
+    assert records[1].fields == {'node': 'maven'}
+
+
+def test_records_are_frozen_when_queued():
+    nodes = ['maven']
+    value = _Rendered()
+    try:
+        raise ValueError('boom')
+    except ValueError:
+        record = _record(exc_info=sys.exc_info(), nodes=nodes, error=value, attempt=1)
+    handler = _QueueHandler(queue.Queue())
+
+    handler.handle(record)
+    nodes.append('node')
+    queued = handler.queue.get_nowait()
+
+    assert (queued.msg, queued.args) == ('Batch failed on node maven', None)
+    assert queued.exc_info is None and 'ValueError: boom' in queued.exc_text
+    assert queued.fields == {'nodes': ['maven'], 'error': 'rendered', 'attempt': 1}
+    assert value.renders == 1
+
+
+def test_text_formatter():
+    formatter = TextFormatter('%(levelname)s: %(message)s')
+    record = _record(node='maven', error='Connection refused', attempt=1, nodes=['maven'])
+
+    assert formatter.format(record) == \
+        'ERROR: Batch failed on node maven node=maven error="Connection refused" attempt=1 nodes=["maven"]'
+    assert formatter.format(_record()) == 'ERROR: Batch failed on node maven'
+
+
+def test_json_formatter():
+    try:
+        raise ValueError('boom')
+    except ValueError:
+        record = _record(exc_info=sys.exc_info(), node='maven', message='not the message')
+
+    entry = json.loads(JsonFormatter().format(record))
+
+    assert entry['level'] == 'ERROR'
+    assert entry['message'] == 'Batch failed on node maven'
+    assert entry['node'] == 'maven'
+    assert 'ValueError: boom' in entry['exception']
+    assert set(entry) == {'time', 'level', 'message', 'exception', 'node'}
+
+
+@pytest.mark.skipif(not hasattr(os, 'register_at_fork'), reason='no fork hooks')
+def test_listener_restarted_in_a_forked_process(tmp_path):
+    facility = LoggingFacility.get_instance()
+    path = str(tmp_path / 'child.log')
+    # only written by the listener of the child (started after the fork)
+    handler = logging.FileHandler(path)
+    handler.setFormatter(facility.formatter)
+    facility._handlers.append(handler)
+    try:
+        pid = os.fork()
+        if pid == 0:
+            try:
+                facility.get_logger().warn('Logged by the child', pid=os.getpid())
+                facility._LoggingFacility__stop_listener()
+            finally:
+                os._exit(0)
+        _, status = os.waitpid(pid, 0)
+    finally:
+        facility._handlers.remove(handler)
+        handler.close()
+
+    assert status == 0
+    with open(path) as f:
+        assert 'Logged by the child pid={}'.format(pid) in f.read()
@@ -0,0 +1,171 @@
+""" The Toskose config must match the TOSCA manifest, the manifest can be parsed
+in a worker process whose logs are written by the manager, and the model is
+refreshed when the TOSCA inputs change. """
+
+import logging
+import os
+import pickle
+import shutil
+from concurrent.futures import Future, ProcessPoolExecutor
+
+import pytest
+
+from app.config import AppConfig, ToskoseConfig
+from app.core.exceptions import ConfigurationError, FatalError
+from app.core.loader import Loader
+from app.core.logging import LoggingFacility
+from app.manager import ToskoseManager, _load_manifest_in_worker
+from app.tosca.parser import ToscaParser
+from app.tosca.stamp import write_stamp
+from tests.helpers import full_path
+
+
+@pytest.fixture(scope='module')
+def model(tmp_path_factory):
+    manifest_dir = str(tmp_path_factory.mktemp('thinking') / 'manifest')
+    shutil.copytree(full_path('thinking/manifest'), manifest_dir)
+    for file in os.listdir(os.path.join(manifest_dir, 'imports')):
+        shutil.copy(os.path.join(manifest_dir, 'imports', file), manifest_dir)
+    return ToscaParser().build_model(os.path.join(manifest_dir, 'thinking.yaml'))
+
+
+@pytest.fixture
+def config():
+    return Loader().load(full_path('thinking/config/toskose.yml'), cache=False)
+
+
+def test_cross_validation(config, model):
+    ToskoseManager._cross_validation(config, model)
+
+
+def test_cross_validation_unknown_node(config, model):
+    config['nodes']['mongodb-typo'] = config['nodes']['maven']
+
+    with pytest.raises(ConfigurationError):
+        ToskoseManager._cross_validation(config, model)
+
+
+def test_cross_validation_not_a_container(config, model):
+    # a software component, not a container node
+    config['nodes']['api'] = config['nodes'].pop('maven')
+
+    with pytest.raises(ConfigurationError):
+        ToskoseManager._cross_validation(config, model)
+
+
+def test_cross_validation_missing_hosting_node(config, model, caplog):
+    del config['nodes']['node']
+
+    with caplog.at_level(logging.WARNING):
+        ToskoseManager._cross_validation(config, model)
+
+    assert any(getattr(record, 'fields', None) == {'node': 'node'} and 'hosting software components'
+               in record.getMessage() for record in caplog.records)
+
+
+@pytest.fixture
+def stamped(tmp_path):
+    """ A trusted manifest (its loading is logged at the INFO level). """
+
+    manifest_dir = str(tmp_path / 'manifest')
+    shutil.copytree(full_path('thinking/manifest'), manifest_dir)
+    write_stamp(os.path.join(manifest_dir, 'thinking.yaml'))
+    return manifest_dir
+
+
+def _trusted(records):
+    return [record for record in records
+            if record.getMessage() == 'Loading the trusted manifest (validation skipped)']
+
+
+def test_worker_records_are_sent_back(stamped):
+    result, error, records = _load_manifest_in_worker(stamped)
+
+    assert error is None
+    assert result[0].name == 'thinking'
+    assert len(_trusted(records)) == 1
+    # picklable, to be sent back to the manager process
+    assert _trusted(pickle.loads(pickle.dumps(records)))[0].fields == {'manifest': 'thinking.yaml'}
+
+
+def test_worker_error_is_sent_back(tmp_path):
+    result, error, records = _load_manifest_in_worker(str(tmp_path / 'nope'))
+
+    assert result is None
+    assert isinstance(pickle.loads(pickle.dumps(error)), FatalError)
+
+
+def test_replay(stamped, caplog):
+    _, _, records = _load_manifest_in_worker(stamped)
+    before = len(_trusted(caplog.records))
+
+    LoggingFacility.get_instance().replay(records)
+
+    assert len(_trusted(caplog.records)) == before + 1
+
+
+@pytest.fixture
+def parallel(thinking, stamped, monkeypatch):
+    monkeypatch.setattr(AppConfig, '_STARTUP_PARALLEL', True)
+    monkeypatch.setattr(ToskoseConfig, 'APP_MANIFEST_PATH', stamped)
+
+
+def test_load_all_in_a_worker_process(parallel, caplog):
+    config, model = ToskoseManager.get_instance()._load_all({})
+
+    assert set(config['nodes']) == {'maven', 'node'}
+    assert model.name == 'thinking'
+    workers = {record.process for record in _trusted(caplog.records)}
+    assert workers and os.getpid() not in workers
+
+
+def test_load_all_falls_back_to_the_manager_process(parallel, monkeypatch, caplog):
+    def submit(self, fn, *args):
+        future = Future()
+        future.set_exception(TypeError('can\'t pickle _thread.lock objects'))
+        return future
+    monkeypatch.setattr(ProcessPoolExecutor, 'submit', submit)
+
+    _, model = ToskoseManager.get_instance()._load_all({})
+
+    assert model.name == 'thinking'
+    assert {record.process for record in _trusted(caplog.records)} == {os.getpid()}
+
+
+def test_load_all_sequentially_by_default(thinking, stamped, monkeypatch, caplog):
+    monkeypatch.setattr(ToskoseConfig, 'APP_MANIFEST_PATH', stamped)
+    monkeypatch.setattr(ProcessPoolExecutor, '__init__', None)
+
+    _, model = ToskoseManager.get_instance()._load_all({})
+
+    assert model.name == 'thinking'
+    assert {record.process for record in _trusted(caplog.records)} == {os.getpid()}
+
+
+@pytest.fixture
+def manager(app):
+    manager = ToskoseManager.get_instance()
+    manager.ensure_initialized()
+    yield manager
+    # the model is shared by the other tests
+    manager.update_inputs({'api_port': 8000})
+
+
+def test_update_inputs(manager):
+    version = manager.model_version
+
+    refreshed = manager.update_inputs({'api_port': 9000})
+
+    assert refreshed == ['gui', 'maven']
+    assert manager.model_version == version + 1
+    assert manager.node_by_id('maven').ports == {8080: 9000}
+    # the indexes are rebuilt
+    gui = manager.component_by_id('node', 'gui')
+    assert gui.interfaces['Standard']['configure']['inputs']['apiPort'] == 9000
+
+
+def test_update_unchanged_inputs(manager):
+    version = manager.model_version
+
+    assert manager.update_inputs({'api_port': 8000}) == []
+    assert manager.model_version == version
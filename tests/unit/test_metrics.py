@@ -0,0 +1,66 @@
+""" The cells of the finished threads are folded into the metric, so the shards
+do not grow with the threads (e.g. a ThreadPoolExecutor per batch request). """
+
+import threading
+
+from app.core.metrics import Counter, Histogram
+
+THREADS = 50
+UPDATES = 100
+
+
+def _run_threads(target):
+    for _ in range(THREADS):
+        thread = threading.Thread(target=target)
+        thread.start()
+        thread.join()
+
+
+def test_counter_shards_are_bounded():
+    counter = Counter('test_total', 'Test counter.', ('node',))
+
+    def update():
+        for _ in range(UPDATES):
+            counter.inc('maven')
+            counter.inc('api', amount=2)
+
+    _run_threads(update)
+
+    assert len(counter._shards) <= 1
+    assert counter.values() == {('maven',): THREADS * UPDATES, ('api',): 2 * THREADS * UPDATES}
+
+
+def test_histogram_shards_are_bounded():
+    histogram = Histogram('test_seconds', 'Test histogram.', buckets=(0.1, 1.0))
+
+    def update():
+        for _ in range(UPDATES):
+            histogram.observe(0.5)
+
+    _run_threads(update)
+    histogram.observe(2.0)
+
+    assert len(histogram._shards) <= 2
+    cell = histogram._merged()[()]
+    assert cell[:3] == [0, THREADS * UPDATES, 1]
+    assert cell[-1] == 0.5 * THREADS * UPDATES + 2.0
+
+
+def test_running_threads_are_collected():
+    counter = Counter('test_running_total', 'Test counter.')
+    updated, done = threading.Event(), threading.Event()
+
+    def update():
+        counter.inc()
+        updated.set()
+        done.wait()
+
+    thread = threading.Thread(target=update)
+    thread.start()
+    updated.wait()
+    counter.inc()
+
+    assert counter.values() == {(): 2}
+    done.set()
+    thread.join()
+    assert counter.values() == {(): 2}
@@ -0,0 +1,181 @@
+""" The subscribers of the cluster state get a snapshot, then the changes polled
+from the nodes or pushed by them, and they can resume from the last one. """
+
+import pytest
+
+from app.api.services.event_service import EventService
+from app.api.services.state_service import BUFFER_SIZE, StateService
+from app.config import AppConfig
+
+
+def _event(statename):
+    return {'eventname': 'PROCESS_STATE_' + statename, 'processname': 'gui-start',
+            'groupname': 'gui-start', 'from_state': 'STOPPED', 'pid': 1}
+
+
+def _push(*statenames):
+    """ Push the state changes of gui-start (one ingest per change). """
+
+    for statename in statenames:
+        EventService.get_instance().ingest(
+            node_id='node', events=[_event(statename)], username='admin', password='admin')
+
+
+_subscribers = []
+
+
+def _watch(service, **kwargs):
+    changes = service.watch(keep_alive=5, **kwargs)
+    _subscribers.append(changes)
+    return changes
+
+
+def _next(changes):
+    change = next(changes)
+    assert change is not None, 'no changes'
+    return change
+
+
+@pytest.fixture
+def state(thinking, app, monkeypatch):
+    """ The state service (the nodes polled once, unless told otherwise). """
+
+    monkeypatch.setattr(AppConfig, '_EVENTS_STREAM_INTERVAL', 60)
+    service = StateService.get_instance()
+    yield service
+
+    # the subscribers leave
+    for changes in _subscribers:
+        changes.close()
+    del _subscribers[:]
+
+    # the poller stops with the last subscriber
+    poller = service._poller
+    if poller is not None:
+        poller.join(timeout=5)
+    assert service._subscribers == 0
+    assert service._poller is None
+    assert service._nodes == {}
+
+
+def test_snapshot(state):
+    changes = _watch(state)
+    seq, event, snapshot = _next(changes)
+
+    assert event == 'snapshot'
+    nodes = {node['node_id']: node for node in snapshot}
+    assert set(nodes) == {'maven', 'node'}
+    assert nodes['node']['reachable'] and nodes['node']['supervisor_state'] == 'RUNNING'
+    operations = {operation['process']: operation for operation in nodes['node']['operations']}
+    assert operations['gui-start']['component_id'] == 'gui'
+    assert operations['gui-start']['operation'] == 'start'
+    assert operations['gui-start']['state'] == 'STOPPED'
+
+
+def test_polled_changes(state, thinking, monkeypatch):
+    monkeypatch.setattr(AppConfig, '_EVENTS_STREAM_INTERVAL', 0.05)
+    fake = thinking['node'].fake
+
+    changes = _watch(state)
+    _next(changes)
+    try:
+        with fake._lock:
+            fake._set_state(fake._process('gui-start'), 'RUNNING')
+        _, event, data = _next(changes)
+    finally:
+        changes.close()
+        with fake._lock:
+            fake._set_state(fake._process('gui-start'), 'STOPPED')
+
+    assert event == 'operation'
+    assert (data['node_id'], data['component_id'], data['operation'], data['state']) == \
+        ('node', 'gui', 'start', 'RUNNING')
+
+
+def test_node_changes(state):
+    changes = _watch(state)
+    _next(changes)
+    with state._changed:
+        # e.g. the node was unreachable at the previous poll
+        state._diff('node', dict(state._nodes['node'], reachable=False), state._nodes['node'])
+    _, event, data = _next(changes)
+
+    assert (event, data) == ('node', {'node_id': 'node', 'reachable': True, 'supervisor_state': 'RUNNING'})
+
+
+def test_pushed_changes(state):
+    changes = _watch(state)
+    seq, _, _ = _next(changes)
+    _push('STARTING')
+    starting = _next(changes)
+    _push('RUNNING')
+    running = _next(changes)
+
+    assert [change[0] for change in (starting, running)] == [seq + 1, seq + 2]
+    assert [change[2]['state'] for change in (starting, running)] == ['STARTING', 'RUNNING']
+    # merged with the polled state
+    assert running[2]['pid'] == 1 and running[2]['exit_status'] == 0
+    assert running[2]['component_id'] == 'gui'
+
+
+def test_pushed_changes_without_subscribers(state):
+    seq = state._seq
+    _push('RUNNING')
+
+    assert state._seq == seq and not state._changes
+
+
+def test_resume(state):
+    changes = _watch(state)
+    _next(changes)
+    _push('RUNNING')
+    seq, _, _ = _next(changes)
+    _push('STOPPING', 'STOPPED')
+
+    # the subscriber reconnecting gets the changes it missed, no snapshot
+    resumed = _watch(state, last_event_id=seq)
+    missed = [_next(resumed), _next(resumed)]
+    # unknown (e.g. a previous run of the manager): a snapshot
+    unknown = _watch(state, last_event_id=state._seq + 100)
+    snapshot = _next(unknown)
+
+    assert [(change[0], change[1], change[2]['state']) for change in missed] == \
+        [(seq + 1, 'operation', 'STOPPING'), (seq + 2, 'operation', 'STOPPED')]
+    assert snapshot[1] == 'snapshot'
+
+
+def test_lagging_subscriber_gets_a_snapshot(state):
+    lagging = _watch(state)
+    seq, _, _ = _next(lagging)
+    _push(*['RUNNING', 'STOPPED'] * (BUFFER_SIZE // 2 + 1))
+
+    change = _next(lagging)
+    resumed = _watch(state, last_event_id=seq)
+    resumed_change = _next(resumed)
+
+    assert (change[0], change[1]) == (seq + BUFFER_SIZE + 2, 'snapshot')
+    assert resumed_change[1] == 'snapshot'
+
+
+def test_poller_stops_with_the_last_subscriber(state):
+    first, second = _watch(state), _watch(state)
+    _next(first)
+    _next(second)
+    poller = state._poller
+
+    first.close()
+    poller.join(timeout=0.2)
+    assert poller.is_alive() and state._subscribers == 1
+
+    second.close()
+    poller.join(timeout=5)
+    assert not poller.is_alive() and state._poller is None
+
+
+def test_api_stream(state, client):
+    response = client.get('/api/v1/events', headers={'Last-Event-ID': 'nope'})
+    _subscribers.append(response)
+
+    assert response.mimetype == 'text/event-stream'
+    first = next(response.response).decode()
+    assert first.startswith('id: {}\nevent: snapshot\ndata: '.format(state._seq))
@@ -0,0 +1,144 @@
+""" A stamped manifest is built without toscaparser into the same model, and
+only if its stamp matches its content (and key). """
+
+import os
+import shutil
+
+import pytest
+
+from app.config import AppConfig
+from app.tosca.model.artifacts import Artifact, File
+from app.tosca.model.nodes import Root, _slot_names
+from app.tosca.model.relationships import Relationship
+from app.tosca.parser import ToscaParser
+from app.tosca.stamp import stamp_path, verify_stamp, write_stamp
+from tests.helpers import full_path
+
+KEY = 'stamp-key'
+
+
+@pytest.fixture
+def manifest(tmp_path):
+    manifest_dir = str(tmp_path / 'manifest')
+    shutil.copytree(full_path('thinking/manifest'), manifest_dir)
+    return os.path.join(manifest_dir, 'thinking.yaml')
+
+
+@pytest.fixture
+def flat_manifest(manifest):
+    """ The manifest with its imports next to it (as toscaparser wants them). """
+
+    imports_dir = os.path.join(os.path.dirname(manifest), 'imports')
+    for file in os.listdir(imports_dir):
+        shutil.copy(os.path.join(imports_dir, file), os.path.dirname(manifest))
+    return manifest
+
+
+def _summary(value):
+    """ A comparable view of the model (the nodes by name, the files by path). """
+
+    if isinstance(value, Root):
+        return value.name
+    if isinstance(value, Relationship):
+        return (type(value).__name__, _summary(value.origin), _summary(value.to),
+                getattr(value, 'alias', None), getattr(value, 'location', None))
+    if isinstance(value, File):
+        return ('File', value.file_path)
+    if isinstance(value, Artifact):
+        return (type(value).__name__, getattr(value, 'format', str(value)))
+    if isinstance(value, dict):
+        return {k: _summary(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_summary(v) for v in value]
+    if isinstance(value, (set, frozenset)):
+        return sorted(_summary(v) for v in value)
+    return value
+
+
+def _model_summary(model):
+    return {
+        node.name: (type(node).__name__, {
+            slot: _summary(getattr(node, slot, None))
+            for slot in _slot_names(type(node)) if slot not in ('tpl', '_mark', 'protocol')})
+        for node in model.nodes
+    }
+
+
+def test_trusted_model_parity(flat_manifest):
+    trusted = ToscaParser().build_model(flat_manifest, trusted=True)
+    validated = ToscaParser().build_model(flat_manifest, trusted=False)
+
+    assert _model_summary(trusted) == _model_summary(validated)
+    assert trusted.description == validated.description
+    assert trusted.imports == validated.imports
+
+
+def test_trusted_outputs_parity(flat_manifest):
+    with open(flat_manifest) as f:
+        content = f.read()
+    with open(flat_manifest, 'w') as f:
+        f.write(content.replace('topology_template:\n', 'topology_template:\n'
+                                '  outputs:\n'
+                                '    api_port:\n'
+                                '      description: The port of the API\n'
+                                '      value: { get_input: api_port }\n'
+                                '    gui_url:\n'
+                                '      value: http://localhost:8080\n', 1))
+
+    trusted = ToscaParser().build_model(flat_manifest, trusted=True)
+    validated = ToscaParser().build_model(flat_manifest, trusted=False)
+
+    def outputs(model):
+        return sorted((output.name, output.description, output.value) for output in model.outputs)
+    assert outputs(trusted) == outputs(validated) == [
+        ('api_port', 'The port of the API', 8000),
+        ('gui_url', None, 'http://localhost:8080'),
+    ]
+
+
+@pytest.mark.parametrize('key', [None, KEY])
+def test_stamp(manifest, key):
+    assert not verify_stamp(manifest, key)
+
+    write_stamp(manifest, key)
+
+    assert verify_stamp(manifest, key)
+
+
+def test_stamp_key_mismatch(manifest):
+    write_stamp(manifest, KEY)
+
+    assert not verify_stamp(manifest, None)
+    assert not verify_stamp(manifest, 'another-key')
+
+
+@pytest.mark.parametrize('changed', ['thinking.yaml', os.path.join('imports', 'tosker-types.yaml')])
+def test_stamp_content_mismatch(manifest, changed):
+    write_stamp(manifest, KEY)
+    with open(os.path.join(os.path.dirname(manifest), changed), 'a') as f:
+        f.write('\n# changed\n')
+
+    assert not verify_stamp(manifest, KEY)
+
+
+def test_corrupted_stamp(manifest):
+    write_stamp(manifest, KEY)
+    with open(stamp_path(manifest), 'w') as f:
+        f.write('hmac-sha256:' + '0' * 64 + '\n')
+
+    assert not verify_stamp(manifest, KEY)
+
+
+def test_untrusted_manifest_is_validated(monkeypatch, manifest):
+    monkeypatch.setattr(AppConfig, '_TOSCA_STAMP_KEY', KEY)
+    monkeypatch.setattr(AppConfig, '_TOSCA_FULL_VALIDATION', False)
+    write_stamp(manifest, KEY)
+    assert ToscaParser._is_trusted(manifest)
+
+    monkeypatch.setattr(AppConfig, '_TOSCA_FULL_VALIDATION', True)
+    assert not ToscaParser._is_trusted(manifest)
+
+    monkeypatch.setattr(AppConfig, '_TOSCA_FULL_VALIDATION', False)
+    with open(manifest, 'a') as f:
+        f.write('\n# changed\n')
+    assert not ToscaParser._is_trusted(manifest)
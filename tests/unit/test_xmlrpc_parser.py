@@ -0,0 +1,88 @@
+""" The FAST XML-RPC parser decodes the responses as the stock unmarshaller. """
+
+import gzip
+import xmlrpc.client
+
+import pytest
+
+from app.client.impl.xmlrpc_transport import ParserType, ToskoseTransport
+from tests.benchmarks.bench_xmlrpc_parser import _Response, payloads
+
+
+class _GzipResponse(_Response):
+
+    def getheader(self, name, default=None):
+        return 'gzip' if name == 'Content-Encoding' else default
+
+
+def _parse(parser, payload, response=_Response):
+    transport = ToskoseTransport(parser=parser)
+    # set by request(), not called here
+    transport.verbose = False
+    return transport.parse_response(response(payload))
+
+
+VALUES = [
+    'plain <&> text',
+    '',
+    0,
+    -2 ** 31,
+    2 ** 31 - 1,
+    True,
+    1.5,
+    None,
+    [],
+    {},
+    {'nested': [{'a': [1, 'b', False]}, []], '': 'empty name'},
+    xmlrpc.client.Binary(b'\x00\x01binary'),
+    xmlrpc.client.DateTime('20261019T14:00:00'),
+]
+
+
+@pytest.mark.parametrize('value', VALUES, ids=[type(v).__name__ for v in VALUES])
+def test_values(value):
+    payload = xmlrpc.client.dumps((value,), methodresponse=True, allow_none=True).encode('utf-8')
+
+    assert _parse(ParserType.FAST, payload) == _parse(ParserType.STOCK, payload)
+
+
+@pytest.mark.parametrize('response', [_Response, _GzipResponse])
+def test_supervisord_responses(response):
+    for payload in payloads(50, 100 * 1024).values():
+        if response is _GzipResponse:
+            payload = gzip.compress(payload)
+
+        assert _parse(ParserType.FAST, payload, response) == _parse(ParserType.STOCK, payload, response)
+
+
+def test_extension_types():
+    payload = (b'<?xml version="1.0"?><methodResponse><params>'
+               b'<param><value><i8>1099511627776</i8></value></param>'
+               b'<param><value><ex:nil xmlns:ex="http://ws.apache.org/xmlrpc/namespaces/extensions"/>'
+               b'</value></param></params></methodResponse>')
+
+    assert _parse(ParserType.FAST, payload) == _parse(ParserType.STOCK, payload) == (2 ** 40, None)
+
+
+def test_untyped_value_is_a_string():
+    payload = (b'<?xml version="1.0"?><methodResponse><params><param>'
+               b'<value>untyped</value></param></params></methodResponse>')
+
+    assert _parse(ParserType.FAST, payload) == _parse(ParserType.STOCK, payload) == ('untyped',)
+
+
+@pytest.mark.parametrize('parser', list(ParserType))
+def test_fault(parser):
+    payload = xmlrpc.client.dumps(xmlrpc.client.Fault(10, 'BAD_NAME: api-run'),
+                                  methodresponse=True).encode('utf-8')
+
+    with pytest.raises(xmlrpc.client.Fault) as err:
+        _parse(parser, payload)
+    assert (err.value.faultCode, err.value.faultString) == (10, 'BAD_NAME: api-run')
+
+
+def test_invalid_response():
+    payload = b'<?xml version="1.0"?><methodCall><methodName>x</methodName></methodCall>'
+
+    with pytest.raises(xmlrpc.client.ResponseError):
+        _parse(ParserType.FAST, payload)
@@ -0,0 +1,134 @@
+"""
+A supervisord event listener forwarding the state changes of the processes
+(the lifecycle operations) to the Toskose Manager, so the manager learns about
+them without polling the node.
+
+It runs as an event listener of the supervisord inside a toskosed image and
+only depends on the standard library, so it can be copied as it is into the
+image. For example:
+
+    [eventlistener:toskose-events]
+    command=python3 /toskose/event_listener.py --node-id maven
+        --manager-url http://toskose-manager:10000
+        --username admin --password admin
+    events=PROCESS_STATE,TICK_60,REMOTE_COMMUNICATION
+
+The PROCESS_STATE_* events are posted to /api/v1/events/supervisord, the
+TICK_60 events as heartbeats (the manager knows the push path is alive) and
+the REMOTE_COMMUNICATION events as they are (e.g. a ping sent by the manager
+with supervisor.sendRemoteCommEvent). The credentials are the supervisord
+ones of the node in the toskose configuration.
+
+The events are acknowledged even if the manager can't be reached (it falls
+back to polling), otherwise supervisord would send them again and again.
+"""
+
+import argparse
+import base64
+import json
+import sys
+import time
+import urllib.request
+
+
+EVENTS_PATH = '/api/v1/events/supervisord'
+FORWARDED_EVENTS = ('PROCESS_STATE_', 'TICK_', 'REMOTE_COMMUNICATION')
+
+
+def parse_tokens(line):
+    """ Parse a supervisord "key:value key:value" line. """
+
+    return dict(token.split(':', 1) for token in line.split() if ':' in token)
+
+
+def read_event(stdin):
+    """ Read the next event (header and payload) sent by supervisord. """
+
+    header_line = stdin.readline()
+    if not header_line:
+        raise EOFError('supervisord closed the stream')
+    headers = parse_tokens(header_line.decode('utf-8'))
+    payload = stdin.read(int(headers['len'])).decode('utf-8')
+    return headers, payload
+
+
+def to_event(headers, payload):
+    """ The JSON-friendly event posted to the manager. """
+
+    event = {
+        'eventname': headers['eventname'],
+        'serial': int(headers.get('serial', 0)),
+        'timestamp': time.time(),
+    }
+    if headers['eventname'] == 'REMOTE_COMMUNICATION':
+        # type:<type>\n<data>
+        first_line, _, data = payload.partition('\n')
+        event['type'] = parse_tokens(first_line).get('type')
+        event['data'] = data
+        return event
+
+    body = payload.split('\n', 1)[0]
+    for key, value in parse_tokens(body).items():
+        event[key] = int(value) if key in ('pid', 'expected', 'tries', 'when') else value
+    return event
+
+
+class Forwarder:
+    """ Post the events to the manager. """
+
+    def __init__(self, manager_url, node_id, username=None, password=None, timeout=2):
+        self.url = manager_url.rstrip('/') + EVENTS_PATH
+        self.node_id = node_id
+        self.timeout = timeout
+        self.headers = {'Content-Type': 'application/json'}
+        if username is not None and password is not None:
+            credentials = '{}:{}'.format(username, password).encode('utf-8')
+            self.headers['Authorization'] = 'Basic {}'.format(
+                base64.b64encode(credentials).decode('ascii'))
+
+    def forward(self, events):
+        body = json.dumps({'node_id': self.node_id, 'events': events}).encode('utf-8')
+        request = urllib.request.Request(self.url, data=body, headers=self.headers, method='POST')
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            response.read()
+
+
+def serve(forwarder, stdin, stdout, stderr):
+    """ The event listener protocol: READY, read an event, RESULT. """
+
+    while True:
+        stdout.write(b'READY\n')
+        stdout.flush()
+
+        headers, payload = read_event(stdin)
+        if headers.get('eventname', '').startswith(FORWARDED_EVENTS):
+            try:
+                forwarder.forward([to_event(headers, payload)])
+            except (OSError, ValueError) as err:
+                # e.g. urllib.error.URLError, the manager is not available
+                stderr.write('Cannot forward {} to {}: {}\n'.format(
+                    headers.get('eventname'), forwarder.url, err))
+                stderr.flush()
+
+        stdout.write(b'RESULT 2\nOK')
+        stdout.flush()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='supervisord event listener for the Toskose Manager')
+    parser.add_argument('--node-id', required=True)
+    parser.add_argument('--manager-url', required=True)
+    parser.add_argument('--username')
+    parser.add_argument('--password')
+    parser.add_argument('--timeout', type=float, default=2)
+    args = parser.parse_args()
+
+    forwarder = Forwarder(args.manager_url, args.node_id, args.username, args.password, args.timeout)
+    try:
+        serve(forwarder, sys.stdin.buffer, sys.stdout.buffer, sys.stderr)
+    except (EOFError, KeyboardInterrupt):
+        pass
+
+
+if __name__ == '__main__':
+    main()